@@ -0,0 +1,260 @@
+"""
+NFL Analytics Index
+In-memory struct-of-arrays copy of games and team stats with offset indexes for NFLQueries
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from database import Game, BettingLine, TeamStatsSnapshot, DataVersion
+
+# Columns of a cached game row; names match NFLQueries._games_select
+GAME_COLUMNS = (
+    Game.game_id, Game.season, Game.week, Game.game_date, Game.game_type,
+    Game.home_team, Game.away_team, Game.home_score, Game.away_score,
+    Game.overtime, Game.is_divisional,
+    BettingLine.game_id.isnot(None).label('has_betting_line'),
+    BettingLine.spread_line, BettingLine.total_line,
+    BettingLine.home_moneyline, BettingLine.away_moneyline,
+)
+
+# Weeks per season slot in the packed (season, week) key
+WEEK_SLOTS = 32
+
+
+def _week_key(season, week):
+    return season * WEEK_SLOTS + week
+
+
+class _IndexData:
+    """One load of the database: column arrays, offsets and rows serialized on first use"""
+
+    def __init__(self, version: int, game_rows: List, stats_rows: List,
+                 format_game: Callable, format_stats: Callable):
+        self.version = version
+        self.loaded_at = time.time()
+
+        # Games in (season, week, date, game_id) order, so every week is one slice
+        game_rows = sorted(game_rows, key=lambda r: (r.season, r.week, r.game_date, r.game_id))
+        self.game_rows = game_rows
+        self.format_game = format_game
+        self._games = [None] * len(game_rows)
+        teams = sorted({r.home_team for r in game_rows} | {r.away_team for r in game_rows}
+                       | {r.team for r in stats_rows})
+        self.team_codes = {team: code for code, team in enumerate(teams)}
+        self.game_types = sorted({r.game_type for r in game_rows})
+
+        n = len(game_rows)
+        self.season = np.fromiter((r.season for r in game_rows), np.int16, n)
+        self.week = np.fromiter((r.week for r in game_rows), np.int8, n)
+        self.day = np.fromiter((r.game_date.toordinal() for r in game_rows), np.int32, n)
+        self.game_type = np.fromiter((self.game_types.index(r.game_type) for r in game_rows), np.int8, n)
+        self.home = np.fromiter((self.team_codes[r.home_team] for r in game_rows), np.int16, n)
+        self.away = np.fromiter((self.team_codes[r.away_team] for r in game_rows), np.int16, n)
+        self.week_keys = _week_key(self.season.astype(np.int32), self.week)
+        # Scheduled games are stored with NULL scores; history lookups skip them
+        self.completed = np.fromiter(
+            (r.home_score is not None and r.away_score is not None for r in game_rows), bool, n)
+
+        # Per team: rows of every game it played, newest first
+        team = np.concatenate([self.home, self.away])
+        rows = np.concatenate([np.arange(n), np.arange(n)]).astype(np.int32)
+        order = np.lexsort((-self.day[rows], team))
+        self.team_rows = rows[order]
+        self.team_offsets = np.searchsorted(team[order], np.arange(len(teams) + 1)).astype(np.int32)
+
+        # Per unordered matchup: rows newest first
+        low, high = np.minimum(self.home, self.away), np.maximum(self.home, self.away)
+        pair = low.astype(np.int32) * len(teams) + high
+        order = np.lexsort((-self.day, pair))
+        self.pair_keys = pair[order]
+        self.pair_rows = order.astype(np.int32)
+
+        # Stats snapshots in (season, week, team) order, so every week is one slice
+        stats_rows = sorted(stats_rows, key=lambda r: (r.season, r.week, r.team))
+        self.stats_rows = stats_rows
+        self.format_stats = format_stats
+        self._stats = [None] * len(stats_rows)
+        m = len(stats_rows)
+        self.stats_keys = _week_key(
+            np.fromiter((r.season for r in stats_rows), np.int32, m),
+            np.fromiter((r.week for r in stats_rows), np.int32, m))
+        self.stats_team = np.fromiter((self.team_codes[r.team] for r in stats_rows), np.int16, m)
+        self.point_diff_5 = np.fromiter(
+            (np.nan if r.point_diff_avg_5 is None else r.point_diff_avg_5 for r in stats_rows), np.float64, m)
+
+    def game(self, i: int) -> Dict:
+        """Copy of game row ``i`` serialized"""
+        if self._games[i] is None:
+            self._games[i] = self.format_game(self.game_rows[i])
+        return dict(self._games[i])
+
+    def stats(self, i: int) -> Dict:
+        """Copy of stats row ``i`` serialized"""
+        if self._stats[i] is None:
+            self._stats[i] = self.format_stats(self.stats_rows[i])
+        return dict(self._stats[i])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column and offset arrays (serialized rows excluded)"""
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
+
+
+class AnalyticsIndex:
+    """Answers team/season/week lookups from array slices instead of SQL
+
+    Games and team stat snapshots are loaded once into NumPy columns with
+    teams and game types as small-int codes. Offset indexes per team,
+    per (season, week) and per matchup pair reduce each lookup to a slice
+    plus a small vectorized filter. Rows are serialized once per load with
+    the caller's formatters (on first use) and lookups return copies. The data version
+    is re-read at most every ``version_check_interval`` seconds and the
+    index is rebuilt when it moves; readers keep the previous load until
+    the new one is swapped in.
+    """
+
+    def __init__(self, db_manager, format_game: Callable, format_stats: Callable,
+                 version_check_interval: float = 1.0):
+        self.db_manager = db_manager
+        self.format_game = format_game
+        self.format_stats = format_stats
+        self.version_check_interval = version_check_interval
+        self.reloads = 0
+
+        self._data: Optional[_IndexData] = None
+        self._lock = threading.Lock()
+        self._version_checked_at = float('-inf')
+
+    def current(self) -> _IndexData:
+        """The loaded index, rebuilt first if the data version moved"""
+        now = time.monotonic()
+        if self._data is not None and now - self._version_checked_at < self.version_check_interval:
+            return self._data
+
+        with self._lock:
+            if self._data is None or now - self._version_checked_at >= self.version_check_interval:
+                with self.db_manager.get_read_session() as session:
+                    version = self._data_version(session)
+                    if self._data is None or version != self._data.version:
+                        self._data = self._load(session, version)
+                        self.reloads += 1
+                self._version_checked_at = now
+            return self._data
+
+    def reload(self):
+        """Rebuild from the database now, whatever the data version"""
+        with self._lock, self.db_manager.get_read_session() as session:
+            self._data = self._load(session, self._data_version(session))
+            self._version_checked_at = time.monotonic()
+            self.reloads += 1
+
+    def stats(self) -> Dict:
+        """Size of the loaded index"""
+        data = self.current()
+        return {
+            'data_version': data.version,
+            'games': len(data.game_rows),
+            'team_stats': len(data.stats_rows),
+            'teams': len(data.team_codes),
+            'array_bytes': data.nbytes,
+            'reloads': self.reloads,
+        }
+
+    # ==================== GAME LOOKUPS ====================
+
+    def week_games(self, season: int, week: int) -> List[Dict]:
+        """Games of one week, oldest first"""
+        data = self.current()
+        start, end = np.searchsorted(data.week_keys, [_week_key(season, week), _week_key(season, week) + 1])
+        return [data.game(i) for i in range(start, end)]
+
+    def weeks_games(self, weeks: List[Tuple[int, int]]) -> Dict[Tuple[int, int], List[Dict]]:
+        """Games of many (season, week) keys"""
+        return {(season, week): self.week_games(season, week) for season, week in weeks}
+
+    def team_games(self, team: str, season: Optional[int] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Completed games a team played, newest first"""
+        data = self.current()
+        rows = self._team_rows(data, team)
+        rows = rows[data.completed[rows]]
+        if season:
+            rows = rows[data.season[rows] == season]
+        return [data.game(i) for i in rows[:limit or None]]
+
+    def teams_games(self, teams: List[str], season: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """Completed games of many teams, newest first (a game appears under both of its teams)"""
+        return {team: self.team_games(team, season) for team in teams}
+
+    def head_to_head(self, team1: str, team2: str, last_n: Optional[int] = None) -> List[Dict]:
+        """Completed games between two teams at either venue, newest first"""
+        data = self.current()
+        codes = data.team_codes
+        if team1 not in codes or team2 not in codes:
+            return []
+        low, high = sorted((codes[team1], codes[team2]))
+        key = low * len(codes) + high
+        start, end = np.searchsorted(data.pair_keys, [key, key + 1])
+        rows = data.pair_rows[start:end]
+        return [data.game(i) for i in rows[data.completed[rows]][:last_n or None]]
+
+    def latest_week(self, season: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """(season, week) of the most recent week with completed games"""
+        data = self.current()
+        end = len(data.week_keys)
+        if season:
+            end = np.searchsorted(data.week_keys, _week_key(season + 1, 0))
+        rows = np.flatnonzero(data.completed[:end])
+        if len(rows) == 0 or (season and data.season[rows[-1]] != season):
+            return None
+        return int(data.season[rows[-1]]), int(data.week[rows[-1]])
+
+    # ==================== TEAM STATISTICS ====================
+
+    def team_stats(self, team: str, season: int, week: int) -> Optional[Dict]:
+        """A team's stat snapshot for one week, or None"""
+        data = self.current()
+        code = data.team_codes.get(team)
+        if code is None:
+            return None
+        start, end = self._stats_slice(data, season, week)
+        match = np.flatnonzero(data.stats_team[start:end] == code)
+        return data.stats(start + match[0]) if len(match) else None
+
+    def power_rankings(self, season: int, week: int) -> List[Dict]:
+        """Stat snapshots of one week by 5-game point differential, missing values last"""
+        data = self.current()
+        start, end = self._stats_slice(data, season, week)
+        diff = data.point_diff_5[start:end]
+        order = np.lexsort((data.stats_team[start:end], -np.nan_to_num(diff, nan=0.0), np.isnan(diff)))
+        return [data.stats(start + i) for i in order]
+
+    def _team_rows(self, data: _IndexData, team: str) -> np.ndarray:
+        code = data.team_codes.get(team)
+        if code is None:
+            return data.team_rows[:0]
+        return data.team_rows[data.team_offsets[code]:data.team_offsets[code + 1]]
+
+    def _stats_slice(self, data: _IndexData, season: int, week: int) -> Tuple[int, int]:
+        key = _week_key(season, week)
+        start, end = np.searchsorted(data.stats_keys, [key, key + 1])
+        return int(start), int(end)
+
+    def _data_version(self, session) -> int:
+        try:
+            version = session.query(DataVersion.version).filter(DataVersion.id == 1).scalar()
+        except OperationalError:
+            return 0
+        return version or 0
+
+    def _load(self, session, version: int) -> _IndexData:
+        game_rows = session.execute(
+            select(*GAME_COLUMNS).outerjoin(BettingLine, BettingLine.game_id == Game.game_id)
+        ).all()
+        stats_rows = session.execute(select(TeamStatsSnapshot.__table__)).all()
+        return _IndexData(version, game_rows, stats_rows, self.format_game, self.format_stats)
@@ -0,0 +1,348 @@
+"""
+NFL Betting API Server
+Asyncio HTTP service behind the frontend's /api endpoints
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import format_datetime
+from datetime import timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from queries import NFLQueries
+
+TEAM_INFO = {
+    'ARI': ('Cardinals', 'Arizona'), 'ATL': ('Falcons', 'Atlanta'),
+    'BAL': ('Ravens', 'Baltimore'), 'BUF': ('Bills', 'Buffalo'),
+    'CAR': ('Panthers', 'Carolina'), 'CHI': ('Bears', 'Chicago'),
+    'CIN': ('Bengals', 'Cincinnati'), 'CLE': ('Browns', 'Cleveland'),
+    'DAL': ('Cowboys', 'Dallas'), 'DEN': ('Broncos', 'Denver'),
+    'DET': ('Lions', 'Detroit'), 'GB': ('Packers', 'Green Bay'),
+    'HOU': ('Texans', 'Houston'), 'IND': ('Colts', 'Indianapolis'),
+    'JAX': ('Jaguars', 'Jacksonville'), 'KC': ('Chiefs', 'Kansas City'),
+    'LA': ('Rams', 'Los Angeles'), 'LAC': ('Chargers', 'Los Angeles'),
+    'LV': ('Raiders', 'Las Vegas'), 'MIA': ('Dolphins', 'Miami'),
+    'MIN': ('Vikings', 'Minnesota'), 'NE': ('Patriots', 'New England'),
+    'NO': ('Saints', 'New Orleans'), 'NYG': ('Giants', 'New York'),
+    'NYJ': ('Jets', 'New York'), 'PHI': ('Eagles', 'Philadelphia'),
+    'PIT': ('Steelers', 'Pittsburgh'), 'SEA': ('Seahawks', 'Seattle'),
+    'SF': ('49ers', 'San Francisco'), 'TB': ('Buccaneers', 'Tampa Bay'),
+    'TEN': ('Titans', 'Tennessee'), 'WAS': ('Commanders', 'Washington'),
+}
+
+REASONS = {200: 'OK', 204: 'No Content', 304: 'Not Modified', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+# Seconds the data version is trusted before SQLite is asked again
+STATUS_REFRESH_INTERVAL = 1.0
+
+
+class BadRequest(Exception):
+    """Invalid query parameters"""
+
+
+class NFLApiServer:
+    """Serves NFLQueries over HTTP with conditional-GET support
+
+    Blocking SQLite work runs in a bounded thread pool. Every response
+    carries an ETag and Last-Modified derived from the pipeline's data
+    and predictions versions, so SWR revalidations of unchanged data
+    return 304 without running a query.
+    """
+
+    def __init__(self, db_path: str = "nfl_autonomous.db", host: str = "127.0.0.1",
+                 port: int = 8000, max_workers: int = 8, max_age: int = 30):
+        self.queries = NFLQueries(db_path)
+        self.host = host
+        self.port = port
+        self.max_age = max_age
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-db")
+        self.logger = logging.getLogger('nfl_api')
+
+        self._status = {'version': 0, 'predictions_version': 0, 'updated_at': None}
+        self._status_checked_at = float('-inf')
+        self._status_lock = None
+        self._server = None
+
+        self.routes = {
+            '/api/games': self.games,
+            '/api/odds': self.odds,
+            '/api/predictions': self.predictions,
+            '/api/betting-data': self.betting_data,
+        }
+
+    # ==================== ENDPOINTS ====================
+
+    def games(self, params: Dict) -> List[Dict]:
+        """Game objects for a week"""
+        season, week = self._resolve_week(params)
+        if not season:
+            return []
+        return [self._game_payload(game) for game in self.queries.get_games_by_week(season, week)]
+
+    def odds(self, params: Dict) -> List[Dict]:
+        """BettingOdds objects for a week"""
+        season, week = self._resolve_week(params)
+        if not season:
+            return []
+        updated = self._last_updated()
+        return [self._odds_payload(game, updated) for game in self.queries.get_games_by_week(season, week)]
+
+    def predictions(self, params: Dict) -> List[Dict]:
+        """Stored predictions for a week, the current one by default (unscored games are omitted)"""
+        season, week = self._resolve_week(params)
+        if not season:
+            return []
+        predictions = self.queries.get_predictions(season, week)
+        return [self._prediction_payload(game, predictions[game['game_id']])
+                for game in self.queries.get_games_by_week(season, week) if game['game_id'] in predictions]
+
+    def betting_data(self, params: Dict) -> List[Dict]:
+        """BettingData objects (game + odds, plus predictions once scored) for a week"""
+        season, week = self._resolve_week(params)
+        if not season:
+            return []
+        updated = self._last_updated()
+        predictions = self.queries.get_predictions(season, week)
+
+        results = []
+        for game in self.queries.get_games_by_week(season, week):
+            item = {'game': self._game_payload(game), 'odds': self._odds_payload(game, updated)}
+            if game['game_id'] in predictions:
+                item['predictions'] = self._prediction_payload(game, predictions[game['game_id']])
+            results.append(item)
+        return results
+
+    # ==================== PAYLOADS ====================
+
+    def _resolve_week(self, params: Dict) -> Tuple[Optional[int], Optional[int]]:
+        """(season, week) from query params, defaulting to the week being played or next up"""
+        try:
+            season = int(params['season']) if 'season' in params else None
+            week = int(params['week']) if 'week' in params else None
+        except ValueError:
+            raise BadRequest("season and week must be integers")
+
+        if season and week:
+            return season, week
+
+        current = self.queries.get_current_week(season)
+        if not current:
+            return None, None
+        return current[0], week or current[1]
+
+    def _team_payload(self, abbreviation: str) -> Dict:
+        name, city = TEAM_INFO.get(abbreviation, (abbreviation, ''))
+        return {'id': abbreviation.lower(), 'name': name, 'city': city, 'abbreviation': abbreviation}
+
+    def _game_payload(self, game: Dict) -> Dict:
+        completed = game['home_score'] is not None and game['away_score'] is not None
+        return {
+            'id': game['game_id'],
+            'homeTeam': self._team_payload(game['home_team']),
+            'awayTeam': self._team_payload(game['away_team']),
+            'gameTime': game['game_date'],
+            'week': game['week'],
+            'season': game['season'],
+            'status': 'completed' if completed else 'scheduled',
+            'homeScore': game['home_score'],
+            'awayScore': game['away_score']
+        }
+
+    def _odds_payload(self, game: Dict, updated: Optional[str]) -> Dict:
+        return {
+            'gameId': game['game_id'],
+            'spread': game.get('spread_line'),
+            'overUnder': game.get('total_line'),
+            'homeMoneyline': game.get('home_moneyline'),
+            'awayMoneyline': game.get('away_moneyline'),
+            'lastUpdated': updated
+        }
+
+    def _prediction_payload(self, game: Dict, prediction: Dict) -> Dict:
+        home_prob = prediction['home_win_prob']
+        winner = game['home_team'] if home_prob >= 0.5 else game['away_team']
+        confidence = max(home_prob, 1 - home_prob)
+        # Win probability and margin come from separate models and can disagree on close games
+        margin = prediction['predicted_margin']
+        favorite = game['home_team'] if margin >= 0 else game['away_team']
+        reasoning = f"Model v{prediction['model_version']}: {winner} wins {confidence:.0%}; " \
+                    f"projected {favorite} by {abs(margin):.1f}, total {prediction['predicted_total']:.1f}"
+        if game.get('spread_line') is not None:
+            # spread_line is positive when the home team is favored
+            reasoning += f"; line {game['home_team']} {-game['spread_line']:+.1f}"
+        if game.get('total_line') is not None:
+            reasoning += f", O/U {game['total_line']:.1f}"
+        return {
+            'gameId': game['game_id'],
+            'predictedWinner': winner,
+            'confidence': round(confidence, 4),
+            'reasoning': reasoning,
+            'homeWinProbability': round(home_prob, 4),
+            'predictedMargin': round(margin, 2),
+            'predictedTotal': round(prediction['predicted_total'], 2),
+            'homeCoverProbability': None if prediction['home_cover_prob'] is None
+            else round(prediction['home_cover_prob'], 4),
+            'overProbability': None if prediction['over_prob'] is None else round(prediction['over_prob'], 4),
+            'modelVersion': prediction['model_version']
+        }
+
+    def _last_updated(self) -> Optional[str]:
+        updated_at = self._status['updated_at']
+        return updated_at.replace(tzinfo=timezone.utc).isoformat() if updated_at else None
+
+    # ==================== HTTP ====================
+
+    async def _refresh_status(self):
+        """Re-read the data version at most once per STATUS_REFRESH_INTERVAL"""
+        if time.monotonic() - self._status_checked_at < STATUS_REFRESH_INTERVAL:
+            return
+        async with self._status_lock:
+            if time.monotonic() - self._status_checked_at < STATUS_REFRESH_INTERVAL:
+                return
+            loop = asyncio.get_running_loop()
+            self._status = await loop.run_in_executor(self.executor, self.queries.get_data_status)
+            self._status_checked_at = time.monotonic()
+
+    def _cache_headers(self, target: str) -> Dict[str, str]:
+        """ETag / Last-Modified / Cache-Control for a request target at the current data and predictions versions"""
+        digest = hashlib.sha1(target.encode('utf-8')).hexdigest()[:12]
+        headers = {
+            'ETag': f'"v{self._status["version"]}.{self._status["predictions_version"]}-{digest}"',
+            'Cache-Control': f'public, max-age={self.max_age}, stale-while-revalidate={self.max_age * 10}',
+        }
+        if self._status['updated_at']:
+            headers['Last-Modified'] = format_datetime(
+                self._status['updated_at'].replace(tzinfo=timezone.utc), usegmt=True)
+        return headers
+
+    async def respond(self, method: str, target: str, request_headers: Dict[str, str]) -> Tuple[int, Dict, bytes]:
+        """Status, headers and body for one request"""
+        cors = {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Expose-Headers': 'ETag, Last-Modified',
+        }
+
+        if method == 'OPTIONS':
+            cors.update({'Access-Control-Allow-Methods': 'GET, HEAD, OPTIONS',
+                         'Access-Control-Allow-Headers': 'If-None-Match, Content-Type'})
+            return 204, cors, b''
+        if method not in ('GET', 'HEAD'):
+            return 405, cors, b''
+
+        url = urlsplit(target)
+        handler = self.routes.get(url.path.rstrip('/') or '/')
+        if handler is None:
+            return 404, cors, json.dumps({'error': 'not found'}).encode('utf-8')
+
+        await self._refresh_status()
+        headers = {**cors, **self._cache_headers(target)}
+
+        if_none_match = request_headers.get('if-none-match', '')
+        if if_none_match == '*' or headers['ETag'] in (tag.strip() for tag in if_none_match.split(',')):
+            return 304, headers, b''
+
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        loop = asyncio.get_running_loop()
+        try:
+            payload = await loop.run_in_executor(self.executor, handler, params)
+        except BadRequest as e:
+            return 400, cors, json.dumps({'error': str(e)}).encode('utf-8')
+        except Exception as e:
+            self.logger.exception(f"{target} failed: {e}")
+            return 500, cors, json.dumps({'error': 'internal error'}).encode('utf-8')
+
+        headers['Content-Type'] = 'application/json'
+        body = json.dumps(payload, default=str).encode('utf-8')
+        return 200, headers, b'' if method == 'HEAD' else body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """HTTP/1.1 keep-alive loop for one client connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                if headers.get('content-length'):
+                    await reader.readexactly(int(headers['content-length']))
+
+                status, response_headers, body = await self.respond(method, target, headers)
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                response_headers['Content-Length'] = str(len(body))
+                response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+
+                head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n" + ''.join(
+                    f"{name}: {value}\r\n" for name, value in response_headers.items()) + "\r\n"
+                writer.write(head.encode('latin-1') + body)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        """Bind the listening socket"""
+        self._status_lock = asyncio.Lock()
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.logger.info(f"API listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        """Start (if needed) and serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        """Stop accepting connections and release the thread pool"""
+        if self._server is not None:
+            self._server.close()
+        self.executor.shutdown(wait=False)
+
+
+def main():
+    """Run the API server"""
+    parser = argparse.ArgumentParser(description="NFL betting API server")
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=8, help="Threads for blocking SQLite work")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(message)s', datefmt='%H:%M:%S')
+    server = NFLApiServer(args.db, args.host, args.port, args.workers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,33 +3,118 @@ Autonomous NFL Data Pipeline - 2025
 Just run it. It knows what to do.
 """
 
-import nfl_data_py as nfl
 import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Optional, Tuple
+import argparse
 import logging
+import os
+import queue
+import threading
 import time
 from pathlib import Path
 
-from database import get_database_manager, Game, BettingLine, TeamPerformance
-from etl_pipeline_db import DatabaseETL
+from database import get_database_manager, Game, BettingLine, TeamPerformance, TeamSeasonSummary
+from etl_pipeline_db import DatabaseETL, build_bulk_rows
+from fetch_cache import ScheduleCache
+from migrations import SchemaMigrator
+from pipeline_metrics import PipelineMetrics
+from predictions import PredictionService
 from queries import NFLQueries
 
+try:
+    import fcntl
+except ImportError:
+    # Windows: lock the file's first byte instead
+    fcntl = None
+    import msvcrt
+
+# First season the pipeline loads and keeps current
+FIRST_SEASON = 2020
+
+# Days after kickoff before a game's intraday line history is thinned
+LINE_HISTORY_SETTLE_DAYS = 7
+
+# Days of settled games each run re-scans; older ones were thinned by earlier runs (at least daily)
+LINE_HISTORY_COMPACT_WINDOW_DAYS = 28
+
+
+class PipelineLock:
+    """Non-blocking OS lock on a file, held for the duration of a pipeline run
+
+    The OS drops the lock if the process dies, so a crashed run never
+    leaves a stale lock behind. The file records the holder's PID.
+    """
+
+    def __init__(self, path: str = "logs/pipeline.lock"):
+        self.path = Path(path)
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Take the lock; False if another process holds it"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = open(self.path, 'a+')
+        try:
+            if fcntl:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            handle.close()
+            return False
+
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def release(self):
+        """Drop the lock"""
+        if self._file is None:
+            return
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
 
 class AutonomousNFLPipeline:
     """A pipeline that just knows what to do"""
 
-    def __init__(self, db_path: str = "nfl_autonomous.db"):
+    def __init__(self, db_path: str = "nfl_autonomous.db", bulk_load: bool = True,
+                 cache_dir: str = "cache", fixture_dir: Optional[str] = None, workers: int = 1,
+                 profile: bool = False, model_dir: str = "models", log_dir: str = "logs",
+                 first_season: int = FIRST_SEASON, today: Optional[date] = None):
         self.db_path = db_path
+        self.first_season = first_season
+        self.today = today  # Fixed date for offline runs and benchmarks; None follows the clock
+        self.bulk_load = bulk_load  # Batched upserts instead of per-row session.merge
+        self.workers = workers  # > 1 transforms seasons in a process pool; 1 keeps the serial path
+        self.profile = profile  # cProfile every run; dumps go to logs/profiles
+        self.live = False  # Set by the scheduler during game windows: short schedule cache TTL
+        self.schedule_cache = ScheduleCache(cache_dir, fixture_dir)
         self.db_manager = get_database_manager(db_path)
-        self.db_manager.create_tables()
+        # Databases built by earlier versions are upgraded in place before anything reads them
+        self.schema_changes = SchemaMigrator(self.db_manager).upgrade()
         self.etl = DatabaseETL(db_path)
         self.queries = NFLQueries(db_path)
+        # Re-scores games whose model inputs changed; idle until a model has been trained
+        self.predictions = PredictionService(db_path, model_dir, str(Path(cache_dir) / "features"))
 
         # Setup logging to both console and file
         # Create logs directory if it doesn't exist
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+
+        # Stage timings and SQL statistics, appended per run next to the log
+        self.metrics = PipelineMetrics([self.db_manager.engine, self.db_manager.read_engine], log_dir)
 
         # Create log filename with current month
         log_file = log_dir / f"autonomous_pipeline_{datetime.now().strftime('%Y%m')}.log"
@@ -57,9 +142,13 @@ class AutonomousNFLPipeline:
         self.logger.addHandler(console_handler)
         self.logger.addHandler(file_handler)
 
+        for change in self.schema_changes:
+            self.logger.info(f"Schema v{change['version']}: {change['name']} "
+                             f"({change['backfill_rows']} rows backfilled, {change['seconds']:.1f}s)")
+
     def get_current_nfl_context(self) -> Dict:
         """Understand where we are in the NFL universe"""
-        today = date.today()
+        today = self.today or date.today()
         current_season = today.year if today.month >= 9 else today.year - 1
 
         # Calculate current week
@@ -101,9 +190,10 @@ class AutonomousNFLPipeline:
         """Look around and understand what needs to be done"""
         context = self.get_current_nfl_context()
 
-        # Check what we have vs what's actually available from API
-        seasons_to_check = list(range(2020, context['current_season'] + 1))
+        # Fetch each season once and diff it against the stored content hashes
+        seasons_to_check = list(range(self.first_season, context['current_season'] + 1))
         database_status = {}
+        changes = {}
         total_missing = 0
 
         with self.db_manager.get_session() as session:
@@ -111,59 +201,45 @@ class AutonomousNFLPipeline:
                 completed_count = session.query(Game)\
                     .filter(Game.season == season, Game.home_score.isnot(None)).count()
 
-                # For current season, check what's actually available from API
-                if season == context['current_season']:
-                    # Try to fetch current season data to see what's available
-                    try:
-                        api_data = nfl.import_schedules([season])
-                        available_completed = api_data.dropna(subset=['home_score', 'away_score'])
-                        api_completed_count = len(available_completed)
-
-                        # Add revision window games
-                        revision_ids = self.get_recent_games_for_revision(season)
-                        needs_revision = len(revision_ids)
-
-                        missing = max(0, api_completed_count - completed_count)
-                        needs_attention = missing > 0 or needs_revision > 0
-
-                        database_status[season] = {
-                            'have': completed_count,
-                            'api_available': api_completed_count,
-                            'missing': missing,
-                            'needs_revision': needs_revision,
-                            'needs_attention': needs_attention
-                        }
-                        total_missing += missing
-
-                    except Exception as e:
-                        self.logger.error(f"Failed to check API for {season}: {e}")
-                        database_status[season] = {
-                            'have': completed_count,
-                            'api_available': 'unknown',
-                            'missing': 0,
-                            'needs_revision': 0,
-                            'needs_attention': False
-                        }
-                else:
-                    # For historical seasons, assume they're complete if we have reasonable data
-                    # Only mark as needing attention if we have very few games
-                    reasonable_threshold = 250  # Most NFL seasons have 256-285 games
-                    needs_attention = completed_count < reasonable_threshold
-
+                try:
+                    with self.metrics.stage('fetch'):
+                        api_data = self.fetch_schedules(season)
+                        self.metrics.add_rows(len(api_data))
+                except Exception as e:
+                    self.logger.error(f"Failed to check API for {season}: {e}")
                     database_status[season] = {
                         'have': completed_count,
-                        'api_available': 'historical',
+                        'api_available': 'unknown',
                         'missing': 0,
                         'needs_revision': 0,
-                        'needs_attention': needs_attention
+                        'needs_attention': False
                     }
+                    continue
+
+                # Scheduled games are stored too (NULL scores), so the upcoming slate can be scored.
+                # Outside the fetch guard: a database error fails the run instead of reading as "nothing changed"
+                with self.metrics.stage('detect_changes'):
+                    changed, new_count = self.detect_changes(season, api_data, session)
+                    self.metrics.add_rows(len(changed))
+
+                database_status[season] = {
+                    'have': completed_count,
+                    'api_available': len(api_data),
+                    'missing': new_count,
+                    'needs_revision': len(changed) - new_count,
+                    'needs_attention': len(changed) > 0
+                }
+                total_missing += new_count
+                if len(changed) > 0:
+                    changes[season] = changed
 
         # Determine what action to take
         seasons_needing_attention = sum(1 for status in database_status.values() if status['needs_attention'])
+        total_changed = sum(len(changed) for changed in changes.values())
 
-        if total_missing == 0 and seasons_needing_attention == 0:
+        if seasons_needing_attention == 0:
             action_needed = "monitor"
-        elif total_missing < 10 and seasons_needing_attention <= 1:
+        elif total_changed < 10 and seasons_needing_attention <= 1:
             action_needed = "light_update"
         else:
             action_needed = "full_update"
@@ -171,100 +247,96 @@ class AutonomousNFLPipeline:
         return {
             'context': context,
             'database_status': database_status,
+            'changes': changes,
             'total_missing': total_missing,
             'seasons_needing_attention': seasons_needing_attention,
             'action_needed': action_needed
         }
 
-    def get_recent_games_for_revision(self, season: int) -> Set[str]:
-        """Get games that might need revision (2 week window)"""
-        if season != self.get_current_nfl_context()['current_season']:
-            return set()
-
-        cutoff = datetime.now() - timedelta(weeks=2)
-
-        with self.db_manager.get_session() as session:
-            recent = session.query(Game.game_id)\
-                .filter(
-                    Game.season == season,
-                    Game.game_date >= cutoff.date(),
-                    Game.home_score.isnot(None)
-                ).all()
-
-            return set(game_id for (game_id,) in recent)
-
-    def smart_fetch_for_season(self, season: int, needed: int) -> Optional[pd.DataFrame]:
-        """Intelligently fetch just what we need for a season"""
-        try:
-            # Get all available data
-            all_data = nfl.import_schedules([season])
-
-            # For current season, filter to completed only
-            context = self.get_current_nfl_context()
-            if season == context['current_season']:
-                all_data = all_data.dropna(subset=['home_score', 'away_score'])
-
-            if len(all_data) == 0:
-                return None
-
-            # Get what we already have
-            with self.db_manager.get_session() as session:
-                existing = set(
-                    game_id for (game_id,) in
-                    session.query(Game.game_id).filter(Game.season == season).all()
-                )
-
-            # Determine what to include
-            available_ids = set(all_data['game_id'].tolist())
-            missing_ids = available_ids - existing
-
-            # Add revision candidates for current season
-            revision_ids = set()
-            if season == context['current_season']:
-                revision_ids = self.get_recent_games_for_revision(season)
-
-            # Combine what we need
-            ids_to_include = missing_ids.union(revision_ids)
-
-            if len(ids_to_include) == 0:
-                return None
+    def fetch_schedules(self, season: int) -> pd.DataFrame:
+        """Season schedule through the on-disk cache (TTL follows the season phase)"""
+        context = self.get_current_nfl_context()
+        if season != context['current_season']:
+            phase = 'historical'
+        else:
+            phase = 'live' if self.live else context['phase']
+        return self.schedule_cache.get_schedules(season, phase)
 
-            # Return filtered data
-            filtered = all_data[all_data['game_id'].isin(ids_to_include)]
+    def detect_changes(self, season: int, api_data: pd.DataFrame, session) -> Tuple[pd.DataFrame, int]:
+        """Rows whose content hash differs from the stored one, plus how many are new games"""
+        if len(api_data) == 0:
+            return api_data, 0
 
-            self.logger.info(f"{season}: Fetching {len(filtered)} games ({len(missing_ids)} new, {len(revision_ids)} revisions)")
+        stored = dict(
+            session.query(Game.game_id, Game.content_hash).filter(Game.season == season).all()
+        )
 
-            return filtered
+        hashes = self.etl.content_hashes(api_data)
+        stored_hashes = api_data['game_id'].map(stored)
+        changed = api_data[hashes != stored_hashes]
+        new_count = int((~changed['game_id'].isin(stored.keys())).sum())
 
-        except Exception as e:
-            self.logger.error(f"{season}: Fetch failed - {str(e)}")
-            return None
+        return changed, new_count
 
     def process_season_data(self, season: int, data: pd.DataFrame) -> bool:
-        """Process season data directly through ETL without temporary files"""
+        """Process season data directly through ETL without temporary files
+
+        Game hashes are committed cleared and only stored in the final
+        transaction, after stats and summaries: if any stage fails, the games
+        still differ from the source and the next run processes them again.
+        """
+        hashes = dict(zip(data['game_id'], self.etl.content_hashes(data)))
         try:
             # Process each entity type in separate transactions for better error handling
             with self.db_manager.get_session() as session:
                 try:
-                    # Process core game data first
-                    games_count = self.etl.process_games(data, session)
-                    session.commit()
-
-                    # Process betting lines
-                    betting_count = self.etl.process_betting_lines(data, session)
-                    session.commit()
-
-                    # Process conditions
-                    conditions_count = self.etl.process_game_conditions(data, session)
-                    session.commit()
-
-                    # Process team performances
-                    performance_count = self.etl.process_team_performances(data, session)
-                    session.commit()
-
-                    # Calculate derived statistics
-                    stats_count = self.etl.calculate_team_stats(session)
-                    session.commit()
+                    if self.bulk_load:
+                        # All entity tables in one batched upsert transaction
+                        with self.metrics.stage('bulk_load'):
+                            counts = self.etl.bulk_load(data, session)
+                            games_count = counts['games']
+                            self.etl.set_content_hashes(session, dict.fromkeys(hashes))
+                            session.commit()
+                            self.metrics.add_rows(games_count)
+                    else:
+                        # Process core game data first
+                        with self.metrics.stage('process_games'):
+                            games_count = self.etl.process_games(data, session)
+                            self.etl.set_content_hashes(session, dict.fromkeys(hashes))
+                            session.commit()
+                            self.metrics.add_rows(games_count)
+
+                        # Process betting lines
+                        with self.metrics.stage('process_betting_lines'):
+                            betting_count = self.etl.process_betting_lines(data, session)
+                            session.commit()
+                            self.metrics.add_rows(betting_count)
+
+                        # Process conditions
+                        with self.metrics.stage('process_game_conditions'):
+                            conditions_count = self.etl.process_game_conditions(data, session)
+                            session.commit()
+                            self.metrics.add_rows(conditions_count)
+
+                        # Process team performances
+                        with self.metrics.stage('process_team_performances'):
+                            performance_count = self.etl.process_team_performances(data, session)
+                            session.commit()
+                            self.metrics.add_rows(performance_count)
+
+                    # Recalculate derived statistics from the earliest changed game
+                    with self.metrics.stage('team_stats'):
+                        stats_count = self.etl.update_team_stats(session, data['game_id'].tolist())
+                        session.commit()
+                        self.metrics.add_rows(stats_count)
+
+                    # Refresh materialized summaries for the affected teams and seasons
+                    with self.metrics.stage('summaries'):
+                        summary_count = self.etl.update_summaries(session, data['game_id'].tolist())
+                        self.etl.set_content_hashes(session, hashes)
+                        self.etl.bump_data_version(session)
+                        session.commit()
+                        self.metrics.add_rows(summary_count)
 
                     self.logger.info(f"{season}: Processed {games_count} games successfully")
                     return True
@@ -275,12 +347,163 @@ class AutonomousNFLPipeline:
                         return True
                     else:
                         session.rollback()
+                        # Stages committed before the failure are visible; drop results cached before them
+                        self.etl.bump_data_version(session)
+                        session.commit()
                         raise
 
         except Exception as e:
             self.logger.error(f"{season}: Processing failed - {str(e)}")
             return False
 
+    def backfill_parallel(self, changes: Dict[int, pd.DataFrame]) -> Tuple[int, int]:
+        """Transform seasons in a process pool and write them through a single writer
+
+        Worker processes turn each season frame into upsert rows. Finished
+        batches are handed to this thread through a bounded queue and written
+        one season at a time, so SQLite never sees competing writers. Rolling
+        stats are updated once, after every season has been written.
+        """
+        workers = min(self.workers, len(changes))
+        batches = queue.Queue(maxsize=workers)
+
+        def produce():
+            # Never more than `workers` seasons in flight; a full queue stalls submission
+            pending_seasons = list(changes.items())
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                in_flight = {}
+                while pending_seasons or in_flight:
+                    while pending_seasons and len(in_flight) < workers:
+                        season, frame = pending_seasons.pop(0)
+                        in_flight[pool.submit(build_bulk_rows, frame)] = season
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        season = in_flight.pop(future)
+                        try:
+                            batches.put((season, future.result(), None))
+                        except Exception as e:
+                            batches.put((season, None, e))
+            batches.put(None)
+
+        producer = threading.Thread(target=produce, name="backfill-producer", daemon=True)
+        producer.start()
+
+        successful_seasons = 0
+        total_updated = 0
+        written_hashes = {}
+
+        while True:
+            with self.metrics.stage('transform_wait'):
+                batch = batches.get()
+            if batch is None:
+                break
+
+            season, rows, error = batch
+            if error is not None:
+                self.logger.error(f"{season}: Transform failed - {error}")
+                continue
+
+            # Hashes stay cleared until stats and summaries are written for every season
+            hashes = {row['game_id']: row['content_hash'] for row in rows['games']}
+            try:
+                with self.metrics.stage('bulk_load'), self.db_manager.get_session() as session:
+                    self.etl.write_bulk_rows(session, rows)
+                    self.etl.set_content_hashes(session, dict.fromkeys(hashes))
+                    session.commit()
+                    self.metrics.add_rows(len(rows['games']))
+            except Exception as e:
+                self.logger.error(f"{season}: Processing failed - {str(e)}")
+                continue
+
+            written_hashes.update(hashes)
+            successful_seasons += 1
+            total_updated += len(hashes)
+            self.logger.info(f"{season}: Processed {len(hashes)} games successfully")
+
+        producer.join()
+
+        if written_hashes:
+            written_game_ids = list(written_hashes)
+            with self.db_manager.get_session() as session:
+                try:
+                    with self.metrics.stage('team_stats'):
+                        self.metrics.add_rows(self.etl.update_team_stats(session, written_game_ids))
+                        session.commit()
+                    with self.metrics.stage('summaries'):
+                        self.metrics.add_rows(self.etl.update_summaries(session, written_game_ids))
+                        self.etl.set_content_hashes(session, written_hashes)
+                        self.etl.bump_data_version(session)
+                        session.commit()
+                except Exception:
+                    session.rollback()
+                    # The seasons' games are committed; drop results cached before them
+                    self.etl.bump_data_version(session)
+                    session.commit()
+                    raise
+
+        return successful_seasons, total_updated
+
+    def ensure_summaries(self):
+        """Build materialized summaries if the database has games but no summary rows"""
+        with self.db_manager.get_session() as session:
+            if session.query(TeamSeasonSummary).first() is not None:
+                return
+            if session.query(TeamPerformance).first() is None:
+                return
+
+            self.logger.info("Building materialized summary tables...")
+            self.etl.update_summaries(session)
+            self.etl.bump_data_version(session)
+            session.commit()
+
+    def rebuild_performances(self, seasons: Optional[List[int]] = None,
+                             game_ids: Optional[List[str]] = None) -> int:
+        """Regenerate team performances from stored games and lines, then roll stats forward
+
+        Repairs derived rows (e.g. after a line correction) without downloading
+        anything. Without ``seasons`` or ``game_ids`` every table is rebuilt.
+        """
+        with self.db_manager.get_session() as session:
+            rows = self.etl.rebuild_team_performances(session, seasons, game_ids)
+
+            affected = game_ids
+            if seasons is not None and game_ids is None:
+                affected = [game_id for (game_id,) in
+                            session.query(Game.game_id).filter(Game.season.in_(seasons))]
+            if affected is None or affected:
+                self.etl.update_team_stats(session, affected)
+                self.etl.update_summaries(session, affected)
+            self.etl.bump_data_version(session)
+            session.commit()
+
+        self.logger.info(f"Rebuilt {rows} team performances")
+        return rows
+
+    def compact_line_history(self) -> int:
+        """Thin the line history of games that settled within the last LINE_HISTORY_COMPACT_WINDOW_DAYS"""
+        settled_before = (self.today or date.today()) - timedelta(days=LINE_HISTORY_SETTLE_DAYS)
+        settled_after = settled_before - timedelta(days=LINE_HISTORY_COMPACT_WINDOW_DAYS)
+        with self.metrics.stage('compact_line_history'), self.db_manager.get_session() as session:
+            removed = self.etl.compact_line_history(session, settled_before, settled_after)
+            session.commit()
+            self.metrics.add_rows(removed)
+
+        if removed:
+            self.logger.info(f"Line history: compacted {removed} intraday changes")
+        return removed
+
+    def update_predictions(self) -> int:
+        """Score games whose inputs changed with the latest model, so API reads never run it"""
+        with self.metrics.stage('predictions'):
+            try:
+                scored = self.predictions.score_changed()
+            except Exception as e:
+                self.logger.error(f"Prediction scoring failed: {e}")
+                return 0
+            self.metrics.add_rows(scored)
+        return scored
+
     def execute_action(self, assessment: Dict) -> Dict:
         """Execute whatever action is needed"""
         action = assessment['action_needed']
@@ -310,6 +533,23 @@ class AutonomousNFLPipeline:
 
         self.logger.info(f"Updating {len(seasons_to_update)} seasons: {seasons_to_update}")
 
+        if self.workers > 1 and self.bulk_load and len(seasons_to_update) > 1:
+            for season in seasons_to_update:
+                status = assessment['database_status'][season]
+                self.logger.info(f"{season}: Queued {len(assessment['changes'][season])} games "
+                                 f"({status['missing']} new, {status['needs_revision']} revisions)")
+
+            changes = {season: assessment['changes'][season] for season in seasons_to_update}
+            successful_seasons, total_updated = self.backfill_parallel(changes)
+
+            return {
+                'action_taken': action,
+                'seasons_attempted': len(seasons_to_update),
+                'seasons_successful': successful_seasons,
+                'games_updated': total_updated,
+                'success': successful_seasons > 0
+            }
+
         # Process each season
         total_updated = 0
         successful_seasons = 0
@@ -317,12 +557,10 @@ class AutonomousNFLPipeline:
         for season in seasons_to_update:
             status = assessment['database_status'][season]
 
-            # Fetch data for this season
-            season_data = self.smart_fetch_for_season(season, status['missing'])
-
-            if season_data is None:
-                self.logger.info(f"{season}: No processable data available")
-                continue
+            # Only rows whose content changed since the last run
+            season_data = assessment['changes'][season]
+            self.logger.info(f"{season}: Upserting {len(season_data)} games "
+                             f"({status['missing']} new, {status['needs_revision']} revisions)")
 
             # Process it
             if self.process_season_data(season, season_data):
@@ -342,21 +580,39 @@ class AutonomousNFLPipeline:
         start_time = time.time()
 
         self.logger.info("NFL Pipeline starting...")
+        self.metrics.start(profile=self.profile)
+        result = {'action_taken': 'failed', 'games_updated': 0, 'success': False}
 
-        # Understand the situation
-        assessment = self.assess_situation()
-        context = assessment['context']
+        try:
+            # Databases created before the summary tables existed get them built once
+            with self.metrics.stage('ensure_summaries'):
+                self.ensure_summaries()
 
-        self.logger.info(f"Current: {context['current_season']} season, Week {context['current_week']} ({context['phase']})")
+            # Understand the situation
+            with self.metrics.stage('assess'):
+                assessment = self.assess_situation()
+            context = assessment['context']
 
-        # Log database status summary
-        if assessment['total_missing'] > 0 or assessment['seasons_needing_attention'] > 0:
-            self.logger.info(f"Assessment: {assessment['total_missing']} games missing, {assessment['seasons_needing_attention']} seasons need attention")
-        else:
-            self.logger.info("Assessment: Database is current")
+            self.logger.info(f"Current: {context['current_season']} season, Week {context['current_week']} ({context['phase']})")
 
-        # Do what needs to be done
-        result = self.execute_action(assessment)
+            # Log database status summary
+            if assessment['total_missing'] > 0 or assessment['seasons_needing_attention'] > 0:
+                self.logger.info(f"Assessment: {assessment['total_missing']} games missing, {assessment['seasons_needing_attention']} seasons need attention")
+            else:
+                self.logger.info("Assessment: Database is current")
+
+            # Do what needs to be done
+            with self.metrics.stage('execute'):
+                result = self.execute_action(assessment)
+
+            # Keep line history bounded however often the scheduler polls
+            self.compact_line_history()
+
+            self.update_predictions()
+        finally:
+            metrics = self.metrics.finish(action=result['action_taken'],
+                                          games_updated=result['games_updated'],
+                                          success=result.get('success', False))
 
         # Report results
         duration = time.time() - start_time
@@ -370,14 +626,37 @@ class AutonomousNFLPipeline:
             **result,
             'duration': duration,
             'context': context,
-            'total_missing_before': assessment['total_missing']
+            'total_missing_before': assessment['total_missing'],
+            'metrics': metrics
         }
 
-
 def main():
     """Just run the pipeline"""
-    pipeline = AutonomousNFLPipeline()
-    result = pipeline.run()
+    parser = argparse.ArgumentParser(description="Autonomous NFL data pipeline")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Worker processes for multi-season backfills (1 = serial)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profile the run and print stage timings and a ranked hot-spot table")
+    parser.add_argument('--rebuild-performances', type=int, nargs='*', metavar='SEASON',
+                        help="Regenerate team performances and stats from stored data (no seasons = all)")
+    args = parser.parse_args()
+
+    pipeline = AutonomousNFLPipeline(workers=args.workers, profile=args.profile)
+    lock = PipelineLock()
+    if not lock.acquire():
+        print("Another pipeline run is in progress")
+        return
+    try:
+        if args.rebuild_performances is not None:
+            rows = pipeline.rebuild_performances(args.rebuild_performances or None)
+            print(f"Rebuilt {rows} team performances")
+            return
+        result = pipeline.run()
+    finally:
+        lock.release()
+
+    if args.profile:
+        print(pipeline.metrics.report())
 
     # Simple output
     if result['games_updated'] > 0:
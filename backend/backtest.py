@@ -0,0 +1,304 @@
+"""
+NFL Betting Backtest
+Vectorized strategy evaluation over stored lines and odds, with a multi-core grid search
+"""
+
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from database import get_database_manager, Game
+from snapshot_export import STATS_FEATURES, SnapshotReader, snapshot_select
+
+MARKETS = ('spread', 'moneyline', 'over', 'under')
+
+# Market -> (odds column taken, opposite side's odds column)
+MARKET_ODDS = {
+    'spread': ('spread_odds', 'opp_spread_odds'),
+    'moneyline': ('moneyline_odds', 'opp_moneyline_odds'),
+    'over': ('over_odds', 'under_odds'),
+    'under': ('under_odds', 'over_odds'),
+}
+
+# Snapshot stats that reset each season rather than rolling across seasons
+SEASON_COUNTERS = ('season_wins', 'season_losses', 'season_ats_wins', 'season_ats_losses')
+
+GRID_CHUNK_SIZE = 64
+
+
+def american_to_decimal(odds: np.ndarray) -> np.ndarray:
+    """Decimal payout (stake included) for American odds; NaN where odds are missing"""
+    odds = np.asarray(odds, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(odds > 0, 1 + odds / 100, 1 + 100 / -odds)
+
+
+class Backtester:
+    """Evaluates betting rules against the team-centric frame
+
+    One row per team per completed game, ordered by kickoff. Stats
+    snapshot columns are shifted to the team's previous game, so rules see
+    only what was known before kickoff. Outcomes and per-unit returns are
+    precomputed per market; evaluating a rule is a masked reduction over
+    those arrays.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        frame = frame[frame['points_scored'].notna() & frame['points_allowed'].notna()]
+        frame = frame.sort_values(['season', 'week', 'game_date', 'game_id', 'is_home'], kind='mergesort')\
+            .reset_index(drop=True)
+        self.frame = self._pregame_features(self._with_opponent_odds(frame))
+        self.returns = {}
+        self.outcomes = {}
+        self.fair_prob = {}
+        for market in MARKETS:
+            self._prepare_market(market)
+
+    @classmethod
+    def from_snapshot(cls, snapshot_dir: str, seasons: Optional[List[int]] = None) -> 'Backtester':
+        """Backtester over an exported Arrow snapshot"""
+        return cls(SnapshotReader(snapshot_dir).read_frame(seasons))
+
+    @classmethod
+    def from_database(cls, db_path: str = "nfl_autonomous.db", seasons: Optional[List[int]] = None) -> 'Backtester':
+        """Backtester over the team-centric join read straight from SQLite"""
+        statement = snapshot_select()
+        if seasons:
+            statement = statement.where(Game.season.in_(seasons))
+        with get_database_manager(db_path).read_engine.connect() as conn:
+            result = conn.execute(statement)
+            frame = pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()))
+        return cls(frame)
+
+    # ==================== PREPARATION ====================
+
+    def _with_opponent_odds(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Attach the other side's spread and moneyline odds for no-vig probabilities"""
+        opponent = frame[['game_id', 'is_home', 'spread_odds', 'moneyline_odds']].rename(columns={
+            'spread_odds': 'opp_spread_odds', 'moneyline_odds': 'opp_moneyline_odds'})
+        opponent['is_home'] = ~opponent['is_home'].astype(bool)
+        return frame.merge(opponent, on=['game_id', 'is_home'], how='left')
+
+    def _pregame_features(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Replace stats snapshot columns with the values from each team's previous game"""
+        frame = frame.copy()
+        team = frame['team'].astype(str)
+        rolling = [c for c in STATS_FEATURES if c in frame.columns and c not in SEASON_COUNTERS]
+        counters = [c for c in SEASON_COUNTERS if c in frame.columns]
+
+        frame[rolling] = frame[rolling].groupby(team, sort=False).shift(1)
+        frame[counters] = frame[counters].groupby([team, frame['season']], sort=False).shift(1).fillna(0)
+        return frame
+
+    def _prepare_market(self, market: str):
+        """Outcome (+1 win, 0 push, -1 loss, NaN unbettable) and per-unit return for one market"""
+        frame = self.frame
+        points_for = frame['points_scored'].to_numpy(dtype=float)
+        points_against = frame['points_allowed'].to_numpy(dtype=float)
+
+        if market == 'spread':
+            # spread_line is the home team's expected margin
+            line = frame['spread_line'].to_numpy(dtype=float)
+            line = np.where(frame['is_home'].to_numpy(dtype=bool), line, -line)
+            outcome = np.sign(points_for - points_against - line)
+        elif market == 'moneyline':
+            outcome = np.sign(points_for - points_against)
+        else:
+            total = points_for + points_against - frame['total_line'].to_numpy(dtype=float)
+            outcome = np.sign(total) if market == 'over' else -np.sign(total)
+
+        taken, opposite = MARKET_ODDS[market]
+        decimal = american_to_decimal(frame[taken].to_numpy(dtype=float))
+        opposite_decimal = american_to_decimal(frame[opposite].to_numpy(dtype=float))
+
+        bettable = ~np.isnan(outcome) & ~np.isnan(decimal)
+        outcome = np.where(bettable, outcome, np.nan)
+
+        self.outcomes[market] = outcome
+        self.returns[market] = np.select([outcome > 0, outcome < 0], [decimal - 1, -1.0], 0.0)
+        self.returns[market][~bettable] = np.nan
+
+        # Closing no-vig probability of the side taken; NaN when the other side is missing
+        implied, opposite_implied = 1 / decimal, 1 / opposite_decimal
+        self.fair_prob[market] = implied / (implied + opposite_implied)
+
+    # ==================== EVALUATION ====================
+
+    def mask(self, rule: Union[np.ndarray, pd.Series, Callable], **params) -> np.ndarray:
+        """Boolean bet mask from an array, Series or ``rule(frame, **params)``"""
+        selected = rule(self.frame, **params) if callable(rule) else rule
+        return np.asarray(selected, dtype=bool)
+
+    def run(self, rule: Union[np.ndarray, pd.Series, Callable], market: str = 'spread',
+            stake: float = 1.0, bankroll: float = 100.0, fraction: Optional[float] = None,
+            taken_odds: Optional[np.ndarray] = None, **params) -> Dict:
+        """Bet-by-bet P&L, bankroll curve and summary for one rule
+
+        Flat ``stake`` units per bet by default; with ``fraction`` each bet
+        stakes that share of the running bankroll. ``taken_odds`` (American,
+        aligned with the frame) prices bets somewhere other than the close,
+        which is what the CLV figures compare against.
+        """
+        selected = self.mask(rule, **params) & ~np.isnan(self.returns[market])
+        index = np.flatnonzero(selected)
+
+        if taken_odds is None:
+            unit_returns = self.returns[market][index]
+            taken_decimal = american_to_decimal(self.frame[MARKET_ODDS[market][0]].to_numpy(dtype=float)[index])
+        else:
+            taken_decimal = american_to_decimal(np.asarray(taken_odds, dtype=float)[index])
+            outcome = self.outcomes[market][index]
+            unit_returns = np.select([outcome > 0, outcome < 0], [taken_decimal - 1, -1.0], 0.0)
+
+        if fraction is None:
+            stakes = np.full(len(index), float(stake))
+            pnl = stakes * unit_returns
+            curve = bankroll + np.cumsum(pnl)
+        else:
+            curve = bankroll * np.cumprod(1 + fraction * unit_returns)
+            previous = np.concatenate(([bankroll], curve[:-1]))
+            stakes = fraction * previous
+            pnl = stakes * unit_returns
+
+        return {
+            'index': index,
+            'stakes': stakes,
+            'pnl': pnl,
+            'bankroll': curve,
+            'summary': self._summarize(market, index, unit_returns, stakes, pnl, curve, bankroll, taken_decimal),
+        }
+
+    def evaluate(self, rule: Union[np.ndarray, pd.Series, Callable], market: str = 'spread', **kwargs) -> Dict:
+        """Summary statistics only"""
+        return self.run(rule, market, **kwargs)['summary']
+
+    def bets(self, rule: Union[np.ndarray, pd.Series, Callable], market: str = 'spread', **kwargs) -> pd.DataFrame:
+        """Bet-by-bet ledger with stake, P&L and bankroll after each bet"""
+        result = self.run(rule, market, **kwargs)
+        ledger = self.frame.iloc[result['index']][
+            ['season', 'week', 'game_id', 'team', 'opponent', MARKET_ODDS[market][0]]].copy()
+        ledger['outcome'] = self.outcomes[market][result['index']]
+        ledger['stake'] = result['stakes']
+        ledger['pnl'] = result['pnl']
+        ledger['bankroll'] = result['bankroll']
+        return ledger.reset_index(drop=True)
+
+    def _summarize(self, market: str, index: np.ndarray, unit_returns: np.ndarray, stakes: np.ndarray,
+                   pnl: np.ndarray, curve: np.ndarray, bankroll: float, taken_decimal: np.ndarray) -> Dict:
+        outcome = self.outcomes[market][index]
+        bets = len(index)
+        staked = float(stakes.sum())
+
+        peak = np.maximum.accumulate(np.concatenate(([bankroll], curve)))[1:] if bets else curve
+        drawdown = peak - curve
+
+        fair_prob = self.fair_prob[market][index]
+        priced = ~np.isnan(fair_prob)
+        # CLV: expected return of the price taken at the closing no-vig probability
+        clv = taken_decimal[priced] * fair_prob[priced] - 1
+
+        return {
+            'market': market,
+            'bets': bets,
+            'wins': int((outcome > 0).sum()),
+            'losses': int((outcome < 0).sum()),
+            'pushes': int((outcome == 0).sum()),
+            'hit_rate': float((outcome > 0).sum() / max((outcome != 0).sum(), 1)),
+            'staked': staked,
+            'profit': float(pnl.sum()),
+            'roi': float(pnl.sum() / staked) if staked else 0.0,
+            'final_bankroll': float(curve[-1]) if bets else bankroll,
+            'max_drawdown': float(drawdown.max()) if bets else 0.0,
+            'max_drawdown_pct': float((drawdown / peak).max()) if bets else 0.0,
+            'avg_decimal_odds': float(taken_decimal.mean()) if bets else None,
+            'avg_closing_fair_prob': float(fair_prob[priced].mean()) if priced.any() else None,
+            'avg_clv': float(clv.mean()) if priced.any() else None,
+            'beat_close_rate': float((clv > 0).mean()) if priced.any() else None,
+        }
+
+
+# ==================== GRID SEARCH ====================
+
+_worker_backtester: Optional[Backtester] = None
+
+
+def _init_worker(backtester: Backtester):
+    global _worker_backtester
+    _worker_backtester = backtester
+
+
+def _evaluate_chunk(rule: Callable, market: str, options: Dict, combinations: List[Dict]) -> List[Dict]:
+    """Summaries for a chunk of parameter combinations inside a worker"""
+    results = []
+    for params in combinations:
+        summary = _worker_backtester.evaluate(rule, market, **options, **params)
+        results.append({**params, **summary})
+    return results
+
+
+def grid_search(backtester: Backtester, rule: Callable, param_grid: Dict[str, List],
+                market: str = 'spread', workers: Optional[int] = None,
+                chunk_size: int = GRID_CHUNK_SIZE, **options) -> pd.DataFrame:
+    """Evaluate ``rule(frame, **params)`` for every combination in ``param_grid``
+
+    ``rule`` must be a module-level function so it can be pickled to the
+    worker processes; each worker receives the backtester once. Returns
+    one row per combination, best ROI first.
+    """
+    empty = [name for name, values in param_grid.items() if len(values) == 0]
+    if empty:
+        raise ValueError(f"param_grid has no values for {', '.join(empty)}")
+
+    names = list(param_grid)
+    combinations = [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+    chunks = [combinations[i:i + chunk_size] for i in range(0, len(combinations), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        _init_worker(backtester)
+        results = [row for chunk in chunks for row in _evaluate_chunk(rule, market, options, chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(backtester,)) as executor:
+            futures = [executor.submit(_evaluate_chunk, rule, market, options, chunk) for chunk in chunks]
+            results = [row for future in futures for row in future.result()]
+
+    return pd.DataFrame(results).sort_values('roi', ascending=False, kind='mergesort').reset_index(drop=True)
+
+
+def form_rule(frame: pd.DataFrame, min_diff: float = 0.0, window: int = 5,
+              max_spread: float = 14.0, home_only: bool = False) -> pd.Series:
+    """Example rule: back teams whose recent point differential beats their opponent's"""
+    diff = frame[f'point_diff_avg_{window}']
+    opponent_diff = frame.groupby('game_id')[f'point_diff_avg_{window}'].transform('sum') - diff
+    selected = (diff - opponent_diff >= min_diff) & (frame['spread_line'].abs() <= max_spread)
+    return selected & frame['is_home'] if home_only else selected
+
+
+def main():
+    """Sweep the example rule over a database or snapshot"""
+    parser = argparse.ArgumentParser(description="Grid-search a betting rule over historical lines")
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    parser.add_argument('--snapshot', help="Read an exported snapshot instead of the database")
+    parser.add_argument('--market', default='spread', choices=MARKETS)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    backtester = Backtester.from_snapshot(args.snapshot) if args.snapshot else Backtester.from_database(args.db)
+    grid = {
+        'min_diff': list(np.arange(0, 15, 0.5)),
+        'window': [3, 5, 10],
+        'max_spread': [3.0, 7.0, 10.0, 14.0],
+        'home_only': [False, True],
+    }
+    results = grid_search(backtester, form_rule, grid, args.market, args.workers)
+    print(results.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,580 @@
+"""
+NFL Pipeline Benchmarks
+Synthetic schedule data, timing comparisons and a baseline-tracked benchmark suite
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from database import Game, TeamStatsSnapshot
+from autonomous_pipeline import AutonomousNFLPipeline
+from etl_pipeline_db import DatabaseETL, ROLLING_WINDOWS
+from queries import NFLQueries
+
+TEAMS = [
+    'ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE',
+    'DAL', 'DEN', 'DET', 'GB', 'HOU', 'IND', 'JAX', 'KC',
+    'LA', 'LAC', 'LV', 'MIA', 'MIN', 'NE', 'NO', 'NYG',
+    'NYJ', 'PHI', 'PIT', 'SEA', 'SF', 'TB', 'TEN', 'WAS',
+]
+
+STADIUMS = [
+    ('ARI00', 'State Farm Stadium', 'closed', 'grass'),
+    ('ATL97', 'Mercedes-Benz Stadium', 'closed', 'fieldturf'),
+    ('BUF00', 'Highmark Stadium', 'outdoors', 'a_turf'),
+    ('GNB00', 'Lambeau Field', 'outdoors', 'grass'),
+    ('KAN00', 'GEHA Field at Arrowhead Stadium', 'outdoors', 'grass'),
+    ('HOU00', 'NRG Stadium', 'retractable', 'fieldturf'),
+]
+
+REFEREES = ['Bill Vinovich', 'Brad Allen', 'Carl Cheffers', 'Clete Blakeman', 'Shawn Hochuli']
+
+# Columns compared between load paths (timestamps and surrogate keys excluded)
+COMPARE_QUERIES = {
+    'games': "SELECT game_id, season, week, game_date, game_type, home_team, away_team, "
+             "home_score, away_score, overtime, is_divisional FROM games ORDER BY game_id",
+    'betting_lines': "SELECT game_id, spread_line, home_spread_odds, away_spread_odds, total_line, "
+                     "over_odds, under_odds, home_moneyline, away_moneyline "
+                     "FROM betting_lines ORDER BY game_id",
+    'game_conditions': "SELECT game_id, stadium_id, stadium_name, roof, surface, temperature, "
+                       "wind_speed, referee FROM game_conditions ORDER BY game_id",
+    'team_performances': "SELECT game_id, team, is_home, points_scored, points_allowed, covered_spread, "
+                         "total_went_over, moneyline_odds, spread_odds "
+                         "FROM team_performances ORDER BY game_id, team",
+    'line_history': "SELECT game_id, field, value FROM line_history ORDER BY game_id, field, observed_at",
+}
+
+# First synthetic season of the suite (team_stats_snapshot requires season >= 2000)
+SUITE_FIRST_SEASON = 2000
+
+# Completed weeks of the final season at bootstrap; maintenance then adds one week
+SUITE_BOOTSTRAP_WEEKS = 10
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# A metric regresses when it is slower than its baseline by more than its group's
+# ratio AND by more than MIN_REGRESSION_SECONDS (sub-millisecond noise is ignored)
+REGRESSION_RATIOS = {
+    'bootstrap': 1.20,
+    'maintenance': 1.25,
+    'team_stats': 1.25,
+    'query': 1.50,
+}
+MIN_REGRESSION_SECONDS = 0.005
+
+# NFLQueries methods timed by the suite, with arguments drawn from the suite context
+QUERY_BENCHMARKS = {
+    'get_games_by_week': lambda q, c: q.get_games_by_week(c['season'], c['week']),
+    'get_team_games': lambda q, c: q.get_team_games(c['team'], c['season']),
+    'get_games_by_weeks': lambda q, c: q.get_games_by_weeks(
+        [(c['season'], w) for w in range(1, c['week'] + 1)], True, True),
+    'get_games_for_teams': lambda q, c: q.get_games_for_teams(c['teams'][:4], c['season']),
+    'get_team_ats_performance': lambda q, c: q.get_team_ats_performance(c['team'], c['season']),
+    'get_over_under_trends': lambda q, c: q.get_over_under_trends(c['season']),
+    'get_league_over_under_trend': lambda q, c: q.get_league_over_under_trend(c['season']),
+    'get_team_current_stats': lambda q, c: q.get_team_current_stats(c['team'], c['season'], c['week']),
+    'get_power_rankings': lambda q, c: q.get_power_rankings(c['season'], c['week']),
+    'get_line_movements': lambda q, c: q.get_line_movements(c['game_id']),
+    'get_line_history': lambda q, c: q.get_line_history(c['game_id']),
+    'get_opening_lines': lambda q, c: q.get_opening_lines(c['game_ids']),
+    'get_closing_lines': lambda q, c: q.get_closing_lines(c['game_ids']),
+    'get_lines_at': lambda q, c: q.get_lines_at(c['game_ids'], c['observed_at']),
+    'get_head_to_head': lambda q, c: q.get_head_to_head(c['team'], c['opponent']),
+    'get_latest_week': lambda q, c: q.get_latest_week(),
+    'get_team_season_summary': lambda q, c: q.get_team_season_summary(c['team'], c['season']),
+    'get_season_summaries_for_teams': lambda q, c: q.get_season_summaries_for_teams(c['teams'], c['season']),
+    'get_ats_performance_for_teams': lambda q, c: q.get_ats_performance_for_teams(c['teams'], c['season']),
+    'get_current_stats_for_teams': lambda q, c: q.get_current_stats_for_teams(c['teams'], c['season'], c['week']),
+    'get_data_status': lambda q, c: q.get_data_status(),
+}
+
+# QUERY_BENCHMARKS the analytics index answers, timed again with it enabled
+INDEXED_QUERIES = (
+    'get_games_by_week', 'get_team_games', 'get_games_for_teams', 'get_team_current_stats',
+    'get_power_rankings', 'get_head_to_head', 'get_latest_week',
+)
+
+
+def team_codes(num_teams: int) -> List[str]:
+    """Real team codes, padded with synthetic ones past 32"""
+    return TEAMS[:num_teams] + [f"T{i:02d}" for i in range(len(TEAMS), num_teams)]
+
+
+def generate_schedule(season: int, num_teams: int = 32, completed_weeks: int = None,
+                      seed: int = None) -> pd.DataFrame:
+    """Generate one import_schedules-shaped season of games"""
+    rng = np.random.RandomState(seed if seed is not None else season)
+    teams = team_codes(num_teams)
+    reg_weeks = 17 if season < 2021 else 18
+    season_start = pd.Timestamp(year=season, month=9, day=7)
+
+    slots = [(week, 'REG', num_teams // 2) for week in range(1, reg_weeks + 1)]
+    for offset, (game_type, games) in enumerate([('WC', 6), ('DIV', 4), ('CON', 2), ('SB', 1)]):
+        slots.append((min(reg_weeks + 1 + offset, 22), game_type, games))
+
+    rows = []
+    for week, game_type, games in slots:
+        order = rng.permutation(teams)
+        for g in range(games):
+            home, away = order[2 * g], order[2 * g + 1]
+            spread = round(rng.normal(0, 6) * 2) / 2
+            total = round(rng.normal(45, 5) * 2) / 2
+            stadium_id, stadium, roof, surface = STADIUMS[rng.randint(len(STADIUMS))]
+            outdoors = roof == 'outdoors'
+            completed = completed_weeks is None or week <= completed_weeks
+
+            # Results are drawn for unplayed games too, so completed_weeks never shifts later games
+            home_score = int(rng.poisson(22 + spread / 2))
+            away_score = int(rng.poisson(22 - spread / 2))
+            overtime = float(rng.rand() < 0.05)
+            home_ml = int(-110 - 20 * spread) if spread > 0 else int(100 - 20 * spread)
+            away_ml = int(-110 + 20 * spread) if spread < 0 else int(100 + 20 * spread)
+
+            rows.append({
+                'game_id': f"{season}_{week:02d}_{away}_{home}",
+                'season': season,
+                'game_type': game_type,
+                'week': week,
+                'gameday': (season_start + pd.Timedelta(days=7 * (week - 1) + g % 3)).strftime('%Y-%m-%d'),
+                'gametime': ['13:00', '16:25', '20:20'][g % 3],
+                'away_team': away,
+                'away_score': away_score if completed else np.nan,
+                'home_team': home,
+                'home_score': home_score if completed else np.nan,
+                'overtime': overtime if completed else np.nan,
+                'away_rest': 7,
+                'home_rest': 7,
+                'away_moneyline': away_ml,
+                'home_moneyline': home_ml,
+                'spread_line': spread,
+                'away_spread_odds': -110,
+                'home_spread_odds': -110,
+                'total_line': total,
+                'under_odds': -110,
+                'over_odds': -110,
+                'div_game': int(rng.rand() < 0.35),
+                'roof': roof,
+                'surface': surface,
+                'temp': float(rng.randint(20, 90)) if outdoors else np.nan,
+                'wind': float(rng.randint(0, 20)) if outdoors else np.nan,
+                'referee': REFEREES[rng.randint(len(REFEREES))],
+                'stadium_id': stadium_id,
+                'stadium': stadium if rng.rand() > 0.02 else np.nan,
+            })
+
+    return pd.DataFrame(rows)
+
+
+def generate_schedules(seasons: List[int], num_teams: int = 32) -> Dict[int, pd.DataFrame]:
+    """Generate several synthetic seasons keyed by season"""
+    return {season: generate_schedule(season, num_teams) for season in seasons}
+
+
+def _load(db_path: str, schedules: Dict[int, pd.DataFrame], bulk: bool) -> float:
+    """Load every season through one ETL path and return elapsed seconds"""
+    etl = DatabaseETL(db_path)
+    start = time.perf_counter()
+    for data in schedules.values():
+        with etl.db_manager.get_session() as session:
+            if bulk:
+                etl.bulk_load(data, session)
+            else:
+                etl.process_games(data, session)
+                etl.process_betting_lines(data, session)
+                etl.process_game_conditions(data, session)
+                etl.process_team_performances(data, session)
+            session.commit()
+    elapsed = time.perf_counter() - start
+    etl.db_manager.dispose()
+    return elapsed
+
+
+def _table_contents(db_path: str) -> Dict[str, list]:
+    """Comparable contents of every entity table"""
+    etl = DatabaseETL(db_path)
+    with etl.db_manager.engine.connect() as conn:
+        contents = {name: [tuple(row) for row in conn.execute(text(sql))]
+                    for name, sql in COMPARE_QUERIES.items()}
+    etl.db_manager.dispose()
+    return contents
+
+
+def benchmark_load_paths(num_seasons: int = 6, num_teams: int = 32) -> Dict:
+    """Time the per-row merge path against bulk upserts and check they agree"""
+    schedules = generate_schedules(list(range(2020, 2020 + num_seasons)), num_teams)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        merge_db = os.path.join(tmp, 'merge.db')
+        bulk_db = os.path.join(tmp, 'bulk.db')
+
+        merge_seconds = _load(merge_db, schedules, bulk=False)
+        bulk_seconds = _load(bulk_db, schedules, bulk=True)
+        # A second bulk pass exercises the ON CONFLICT update branch
+        bulk_rerun_seconds = _load(bulk_db, schedules, bulk=True)
+
+        merge_rows = _table_contents(merge_db)
+        bulk_rows = _table_contents(bulk_db)
+
+    mismatched = [name for name in COMPARE_QUERIES if merge_rows[name] != bulk_rows[name]]
+
+    return {
+        'seasons': num_seasons,
+        'teams': num_teams,
+        'games': sum(len(df) for df in schedules.values()),
+        'merge_seconds': merge_seconds,
+        'bulk_seconds': bulk_seconds,
+        'bulk_rerun_seconds': bulk_rerun_seconds,
+        'speedup': merge_seconds / bulk_seconds if bulk_seconds else None,
+        'row_counts': {name: len(rows) for name, rows in bulk_rows.items()},
+        'identical': not mismatched,
+        'mismatched_tables': mismatched,
+    }
+
+
+def _snapshot_frame(etl: DatabaseETL, columns: List[str]) -> pd.DataFrame:
+    """Stored team_stats_snapshot rows as a frame ordered by team, season, week"""
+    with etl.db_manager.get_session() as session:
+        rows = session.query(*(getattr(TeamStatsSnapshot, c) for c in columns)).all()
+    return pd.DataFrame.from_records(rows, columns=columns)\
+        .sort_values(['team', 'season', 'week']).reset_index(drop=True)
+
+
+def _compare_columns(expected: pd.DataFrame, actual: pd.DataFrame, columns: List[str]) -> List[str]:
+    """Names of columns whose values differ between two aligned frames"""
+    if len(expected) != len(actual):
+        return list(columns)
+    return [c for c in columns
+            if not np.allclose(expected[c].astype(float), actual[c].astype(float), rtol=0, atol=1e-9)]
+
+
+def benchmark_stats_backends(num_seasons: int = 6, num_teams: int = 32) -> Dict:
+    """Time the stats loop against the vectorized and incremental backends
+
+    Every snapshot column is checked: columns the original loop produces
+    against the loop, and the 10-game window against the incremental engine.
+    """
+    schedules = generate_schedules(list(range(2020, 2020 + num_seasons)), num_teams)
+    key_columns = ['team', 'season', 'week']
+    loop_columns = [
+        'pts_for_avg_3', 'pts_against_avg_3', 'point_diff_avg_3',
+        'pts_for_avg_5', 'pts_against_avg_5', 'point_diff_avg_5',
+        'win_pct_5', 'ats_pct_5', 'over_pct_5',
+        'season_wins', 'season_losses', 'season_ats_wins', 'season_ats_losses',
+    ]
+    all_columns = loop_columns + [f'{stat}_{size}' for size in ROLLING_WINDOWS if size not in (3, 5)
+                                  for stat in ('pts_for_avg', 'pts_against_avg', 'point_diff_avg')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stats.db')
+        etl = DatabaseETL(db_path)
+        with etl.db_manager.get_session() as session:
+            for data in schedules.values():
+                etl.bulk_load(data, session)
+            session.commit()
+
+            start = time.perf_counter()
+            etl.calculate_team_stats(session)
+            session.commit()
+            loop_seconds = time.perf_counter() - start
+        loop_stats = _snapshot_frame(etl, key_columns + loop_columns)
+
+        with etl.db_manager.get_session() as session:
+            start = time.perf_counter()
+            frame = etl.load_performance_frame(session)
+            vectorized = etl.compute_team_stats_frame(frame)
+            vectorized_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            etl.update_team_stats(session, [gid for df in schedules.values() for gid in df['game_id']])
+            session.commit()
+            incremental_seconds = time.perf_counter() - start
+        incremental_stats = _snapshot_frame(etl, key_columns + all_columns)
+        etl.db_manager.dispose()
+
+    vectorized = vectorized.sort_values(key_columns).reset_index(drop=True)
+    keys_match = vectorized[key_columns].equals(loop_stats[key_columns].astype(vectorized[key_columns].dtypes))
+    mismatched = _compare_columns(loop_stats, vectorized, loop_columns)
+    mismatched += _compare_columns(incremental_stats, vectorized, all_columns)
+
+    return {
+        'snapshots': len(vectorized),
+        'loop_seconds': loop_seconds,
+        'vectorized_seconds': vectorized_seconds,
+        'incremental_seconds': incremental_seconds,
+        'identical': keys_match and not mismatched,
+        'mismatched_columns': sorted(set(mismatched)),
+    }
+
+
+# ==================== SUITE ====================
+
+def _best_seconds(func: Callable, repeat: int) -> float:
+    """Fastest wall time of ``repeat`` calls (least disturbed by other load, as timeit does)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibration_seconds(repeat: int = 5) -> float:
+    """Time of a fixed CPU workload, used to normalize results across machines and runs"""
+    def workload():
+        total = 0
+        for i in range(200000):
+            total += i * i
+        np.sort(np.random.RandomState(0).rand(200000))
+        return total
+    return _best_seconds(workload, repeat)
+
+
+def _write_fixtures(fixture_dir: str, schedules: Dict[int, pd.DataFrame]):
+    """Store seasons as the pipeline's offline schedules_<season>.parquet fixtures"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    for season, data in schedules.items():
+        data.to_parquet(os.path.join(fixture_dir, f"schedules_{season}.parquet"), index=False)
+
+
+def _close_pipeline(pipeline: AutonomousNFLPipeline):
+    """Release the log files and pooled connections a suite pipeline holds"""
+    for handler in pipeline.logger.handlers:
+        handler.close()
+    pipeline.logger.handlers.clear()
+    pipeline.db_manager.dispose()
+
+
+def run_suite(num_seasons: int = 50, num_teams: int = 32, repeat: int = 5) -> Dict:
+    """Time bootstrap, maintenance, team stats and every NFLQueries method on synthetic data
+
+    Bootstrap and maintenance are ``AutonomousNFLPipeline.run()`` against
+    offline fixtures, so they cost what a real run costs: migrations,
+    change detection, loads, stats, summaries, line history compaction and
+    prediction scoring. Datasets are seeded by season, so the same
+    arguments always produce the same games. The last season is
+    bootstrapped with SUITE_BOOTSTRAP_WEEKS completed weeks; the
+    maintenance run then scores the following week.
+    """
+    calibration = calibration_seconds()
+    seasons = list(range(SUITE_FIRST_SEASON, SUITE_FIRST_SEASON + num_seasons))
+    last = seasons[-1]
+    schedules = generate_schedules(seasons[:-1], num_teams)
+    schedules[last] = generate_schedule(last, num_teams, completed_weeks=SUITE_BOOTSTRAP_WEEKS)
+    updated_last = generate_schedule(last, num_teams, completed_weeks=SUITE_BOOTSTRAP_WEEKS + 1)
+    # The pipeline's clock sits in the last season's first unplayed week
+    today = date(last, 9, 7) + timedelta(weeks=SUITE_BOOTSTRAP_WEEKS)
+    metrics = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = os.path.join(tmp, 'fixtures')
+        _write_fixtures(fixture_dir, schedules)
+
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            # Bootstrap: schema creation and the first run into an empty database
+            start = time.perf_counter()
+            pipeline = AutonomousNFLPipeline(
+                os.path.join(tmp, 'suite.db'), cache_dir=os.path.join(tmp, 'cache'), fixture_dir=fixture_dir,
+                model_dir=os.path.join(tmp, 'models'), log_dir=os.path.join(tmp, 'logs'),
+                first_season=seasons[0], today=today)
+            pipeline.run()
+            metrics['bootstrap'] = time.perf_counter() - start
+
+            # A trained model, so maintenance runs include prediction scoring
+            pipeline.predictions.train()
+            pipeline.run()
+
+            # Maintenance: a run with nothing changed, then one with the next week's results
+            unchanged = pipeline.run()['games_updated']
+            metrics['maintenance.noop'] = _best_seconds(pipeline.run, repeat)
+
+            _write_fixtures(fixture_dir, {last: updated_last})
+            start = time.perf_counter()
+            pipeline.run()
+            metrics['maintenance.week'] = time.perf_counter() - start
+
+            etl = pipeline.etl
+            with etl.db_manager.get_session() as session:
+                # The original loop inserts every snapshot, so each timed call starts from an empty table
+                timings = []
+                for _ in range(repeat):
+                    session.query(TeamStatsSnapshot).delete()
+                    start = time.perf_counter()
+                    etl.calculate_team_stats(session)
+                    timings.append(time.perf_counter() - start)
+                    session.rollback()
+                metrics['team_stats.loop'] = min(timings)
+                metrics['team_stats.full'] = _best_seconds(
+                    lambda: etl.calculate_team_stats_vectorized(session), repeat)
+                session.rollback()
+                week_ids = updated_last.loc[updated_last['week'] == SUITE_BOOTSTRAP_WEEKS + 1, 'game_id'].tolist()
+                metrics['team_stats.incremental'] = _best_seconds(
+                    lambda: etl.update_team_stats(session, week_ids), repeat)
+                session.rollback()
+
+            with etl.db_manager.get_session() as session:
+                games = session.query(Game).count()
+
+        queries = NFLQueries(etl.db_manager.db_path, cache_size=0)
+        week = updated_last[updated_last['week'] == SUITE_BOOTSTRAP_WEEKS]
+        teams = team_codes(num_teams)
+        context = {
+            'season': last, 'week': SUITE_BOOTSTRAP_WEEKS,
+            'team': week['home_team'].iloc[0], 'opponent': week['away_team'].iloc[0],
+            'teams': teams, 'game_id': week['game_id'].iloc[0],
+            'game_ids': updated_last['game_id'].tolist(), 'observed_at': int(time.time()),
+        }
+        for name, call in QUERY_BENCHMARKS.items():
+            call(queries, context)  # Warm SQLite's page cache and the statement cache
+            metrics[f'query.{name}'] = _best_seconds(lambda: call(queries, context), repeat)
+
+        indexed = NFLQueries(etl.db_manager.db_path, cache_size=0, analytics_index=True)
+        metrics['query.index_load'] = _best_seconds(indexed.index.reload, repeat)
+        for name in INDEXED_QUERIES:
+            QUERY_BENCHMARKS[name](indexed, context)  # Load the index and serialize the rows once
+            metrics[f'query.indexed.{name}'] = _best_seconds(
+                lambda: QUERY_BENCHMARKS[name](indexed, context), repeat)
+
+        _close_pipeline(pipeline)
+
+    return {
+        'config': {'seasons': num_seasons, 'teams': num_teams},
+        'repeat': repeat,
+        'dataset': {'games': games, 'maintenance_noop_changes': unchanged},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'calibration_seconds': (calibration + calibration_seconds()) / 2,
+        'metrics': metrics,
+    }
+
+
+def best_of_runs(runs: List[Dict]) -> Dict:
+    """Combine repeated suite runs, keeping each metric's (and the calibration's) fastest time"""
+    best = dict(runs[-1])
+    best['runs'] = len(runs)
+    best['calibration_seconds'] = min(run['calibration_seconds'] for run in runs)
+    best['metrics'] = {name: min(run['metrics'][name] for run in runs) for name in runs[-1]['metrics']}
+    return best
+
+
+def compare_to_baseline(results: Dict, baseline: Dict) -> List[Dict]:
+    """Per-metric comparison; status is ok, regressed, improved or new
+
+    Baseline times are scaled by the change in calibration time, so a
+    uniformly slower or faster machine does not read as a regression.
+    """
+    recorded = baseline.get('calibration_seconds')
+    speed = results['calibration_seconds'] / recorded if recorded else 1.0
+    rows = []
+    for name, seconds in results['metrics'].items():
+        base = baseline['metrics'].get(name)
+        if base is None:
+            rows.append({'metric': name, 'baseline': None, 'current': seconds, 'ratio': None, 'status': 'new'})
+            continue
+
+        base *= speed
+        ratio = seconds / base if base else float('inf')
+        allowed = REGRESSION_RATIOS[name.split('.')[0]]
+        if ratio > allowed and seconds - base > MIN_REGRESSION_SECONDS:
+            status = 'regressed'
+        elif ratio < 1 / allowed and base - seconds > MIN_REGRESSION_SECONDS:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append({'metric': name, 'baseline': base, 'current': seconds, 'ratio': ratio, 'status': status})
+    return rows
+
+
+def _run_suite_cli(args) -> int:
+    """Run the suite, compare against (or save) the baseline; returns the exit code"""
+    results = best_of_runs([run_suite(args.seasons, args.teams, args.repeat) for _ in range(args.runs)])
+    print(f"\nSuite: {results['dataset']['games']} games, {args.seasons} seasons x {args.teams} teams")
+    print(f"  calibration: {results['calibration_seconds'] * 1000:.1f} ms")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['config'] != results['config']:
+            print(f"Baseline {args.baseline} was recorded with {baseline['config']}; not comparing")
+            baseline = None
+
+    if baseline is None:
+        for name, seconds in results['metrics'].items():
+            print(f"  {name:<40}{seconds * 1000:>12.2f} ms")
+    else:
+        rows = compare_to_baseline(results, baseline)
+        if baseline.get('calibration_seconds'):
+            print(f"  (baseline scaled by calibration: {baseline['calibration_seconds'] * 1000:.1f} ms recorded)")
+        print(f"  {'metric':<40}{'baseline ms':>12}{'current ms':>12}{'ratio':>8}  status")
+        for row in rows:
+            base = f"{row['baseline'] * 1000:.2f}" if row['baseline'] is not None else '-'
+            ratio = f"{row['ratio']:.2f}" if row['ratio'] is not None else '-'
+            print(f"  {row['metric']:<40}{base:>12}{row['current'] * 1000:>12.2f}{ratio:>8}  {row['status']}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    regressed = [row['metric'] for row in compare_to_baseline(results, baseline)
+                 if row['status'] == 'regressed'] if baseline else []
+    if regressed:
+        print(f"\nRegressed: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+def main():
+    """Run the benchmarks and print a summary"""
+    parser = argparse.ArgumentParser(description="NFL pipeline benchmarks")
+    parser.add_argument('--seasons', type=int, default=6, help="Synthetic seasons to load")
+    parser.add_argument('--teams', type=int, default=32, help="Teams per season")
+    parser.add_argument('--suite', action='store_true',
+                        help="Run the baseline-tracked suite instead of the path comparisons")
+    parser.add_argument('--repeat', type=int, default=5, help="Suite: timed repetitions per metric (fastest kept)")
+    parser.add_argument('--runs', type=int, default=1,
+                        help="Suite: whole-suite runs, fastest kept per metric (use 3+ for baselines)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Suite: baseline results file")
+    parser.add_argument('--save-baseline', action='store_true', help="Suite: record this run as the baseline")
+    args = parser.parse_args()
+
+    if args.suite:
+        sys.exit(_run_suite_cli(args))
+
+    result = benchmark_load_paths(args.seasons, args.teams)
+    stats = benchmark_stats_backends(args.seasons, args.teams)
+
+    print(f"\nLoad paths: {result['games']} games over {result['seasons']} seasons")
+    print(f"  merge:        {result['merge_seconds']:.2f}s")
+    print(f"  bulk:         {result['bulk_seconds']:.2f}s ({result['speedup']:.1f}x)")
+    print(f"  bulk re-run:  {result['bulk_rerun_seconds']:.2f}s")
+    print(f"  identical:    {result['identical']}"
+          + (f" (mismatch: {', '.join(result['mismatched_tables'])})" if not result['identical'] else ""))
+
+    print(f"\nTeam stats: {stats['snapshots']} snapshots")
+    print(f"  loop:         {stats['loop_seconds']:.2f}s")
+    print(f"  vectorized:   {stats['vectorized_seconds']:.2f}s")
+    print(f"  incremental:  {stats['incremental_seconds']:.2f}s")
+    print(f"  identical:    {stats['identical']}"
+          + (f" (mismatch: {', '.join(stats['mismatched_columns'])})" if not stats['identical'] else ""))
+
+    # A backend that disagrees with the original loop is a failure, not just a report line
+    sys.exit(0 if result['identical'] and stats['identical'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,10 @@ Normalized 3NF design following atomic principles and A+ storage practices
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Float, Boolean, Date, Text,
-    ForeignKey, UniqueConstraint, Index, CheckConstraint, DateTime
+    create_engine, event, inspect, text, Column, Integer, SmallInteger, String, Float, Boolean, Date, Text,
+    ForeignKey, UniqueConstraint, Index, CheckConstraint, DateTime, desc
 )
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
@@ -30,6 +30,7 @@ class Game(Base):
     away_score = Column(Integer)
     overtime = Column(Boolean, default=False)
     is_divisional = Column(Boolean, default=False)
+    content_hash = Column(String(16))  # Hash of stored game, line and condition fields
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -95,6 +96,29 @@ class GameConditions(Base):
     def __repr__(self):
         return f"<GameConditions({self.game_id}: {self.stadium_name})>"
 
+# BettingLine columns tracked in line_history; a row's field code is its index here
+LINE_FIELDS = (
+    'spread_line', 'total_line', 'home_moneyline', 'away_moneyline',
+    'home_spread_odds', 'away_spread_odds', 'over_odds', 'under_odds',
+)
+
+class LineHistory(Base):
+    """Append-only betting line changes - one row per field whose value moved"""
+    __tablename__ = 'line_history'
+
+    game_id = Column(String(20), ForeignKey('games.game_id'), primary_key=True)
+    observed_at = Column(Integer, primary_key=True)  # Unix seconds (UTC)
+    field = Column(SmallInteger, primary_key=True)  # Index into LINE_FIELDS
+    value = Column(Float)  # None when a line was taken off the board
+
+    __table_args__ = (
+        # Clustered on (game_id, observed_at, field): no rowid, no separate index
+        {'sqlite_with_rowid': False},
+    )
+
+    def __repr__(self):
+        return f"<LineHistory({self.game_id} {LINE_FIELDS[self.field]}={self.value} @ {self.observed_at})>"
+
 class TeamPerformance(Base):
     """Team performance per game - atomic unit of team stats"""
     __tablename__ = 'team_performances'
@@ -141,6 +165,11 @@ class TeamStatsSnapshot(Base):
     pts_against_avg_5 = Column(Float)
     point_diff_avg_5 = Column(Float)
 
+    # 10-game rolling averages
+    pts_for_avg_10 = Column(Float)
+    pts_against_avg_10 = Column(Float)
+    point_diff_avg_10 = Column(Float)
+
     # Performance percentages (5-game)
     win_pct_5 = Column(Float)
     ats_pct_5 = Column(Float)  # Against the spread
@@ -158,6 +187,8 @@ class TeamStatsSnapshot(Base):
     __table_args__ = (
         UniqueConstraint('team', 'season', 'week'),
         Index('idx_stats_team_week', 'team', 'season', 'week'),
+        # Week slices (power rankings, multi-week reads) already in ranking order, team tie-break included
+        Index('idx_stats_week_rank', 'season', 'week', desc('point_diff_avg_5'), 'team'),
         CheckConstraint('week BETWEEN 1 AND 22'),
         CheckConstraint('season >= 2000'),
     )
@@ -165,38 +196,249 @@ class TeamStatsSnapshot(Base):
     def __repr__(self):
         return f"<TeamStats({self.team} {self.season} W{self.week})>"
 
+class TeamSeasonSummary(Base):
+    """Materialized per-team season record - maintained incrementally by the ETL"""
+    __tablename__ = 'team_season_summaries'
+
+    team = Column(String(3), primary_key=True)
+    season = Column(Integer, primary_key=True)
+
+    games = Column(Integer, nullable=False)
+    wins = Column(Integer, nullable=False)  # Ties count as losses, matching the query layer
+    losses = Column(Integer, nullable=False)
+
+    # Against the spread (pushes include games without a line)
+    ats_wins = Column(Integer, nullable=False)
+    ats_losses = Column(Integer, nullable=False)
+    ats_pushes = Column(Integer, nullable=False)
+
+    # Over/under (ou_games excludes games without a total)
+    ou_games = Column(Integer, nullable=False)
+    overs = Column(Integer, nullable=False)
+    unders = Column(Integer, nullable=False)
+
+    points_for = Column(Integer, nullable=False)
+    points_against = Column(Integer, nullable=False)
+    avg_points_for = Column(Float)
+    avg_points_against = Column(Float)
+
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('idx_season_summaries_season', 'season', 'team'),
+    )
+
+    def __repr__(self):
+        return f"<TeamSeasonSummary({self.team} {self.season}: {self.wins}-{self.losses})>"
+
+class LeagueOverUnderTrend(Base):
+    """Materialized league-wide over/under rates per week"""
+    __tablename__ = 'league_ou_trends'
+
+    season = Column(Integer, primary_key=True)
+    week = Column(Integer, primary_key=True)
+
+    games = Column(Integer, nullable=False)  # Completed games with a total line
+    overs = Column(Integer, nullable=False)
+    over_rate = Column(Float)
+
+    # Season to date, through this week
+    season_games = Column(Integer, nullable=False)
+    season_overs = Column(Integer, nullable=False)
+    season_over_rate = Column(Float)
+
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<LeagueOverUnderTrend({self.season} W{self.week}: {self.over_rate})>"
+
+class Prediction(Base):
+    """Model output per game and model version - rewritten only when the game's inputs change"""
+    __tablename__ = 'predictions'
+
+    game_id = Column(String(20), ForeignKey('games.game_id'), primary_key=True)
+    model_version = Column(Integer, primary_key=True)
+    input_hash = Column(String(16), nullable=False)  # Hash of the feature row that was scored
+    data_version = Column(Integer, nullable=False)  # Data version the inputs were read at
+
+    home_win_prob = Column(Float, nullable=False)
+    predicted_margin = Column(Float, nullable=False)  # Home minus away
+    predicted_total = Column(Float, nullable=False)
+    home_cover_prob = Column(Float)  # None without a spread line
+    over_prob = Column(Float)  # None without a total line
+
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('idx_predictions_model', 'model_version', 'game_id'),
+    )
+
+    def __repr__(self):
+        return f"<Prediction({self.game_id} v{self.model_version}: {self.home_win_prob:.3f})>"
+
+class DataVersion(Base):
+    """Single-row counters: ``version`` moves on every successful pipeline commit,
+    ``predictions_version`` on every prediction write"""
+    __tablename__ = 'data_version'
+
+    id = Column(Integer, primary_key=True)  # Always 1
+    version = Column(Integer, nullable=False, default=0)
+    # Kept apart from version so scoring passes don't invalidate caches keyed on game data
+    predictions_version = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        CheckConstraint('id = 1'),
+    )
+
+    def __repr__(self):
+        return f"<DataVersion({self.version} at {self.updated_at})>"
+
+class SchemaVersion(Base):
+    """Applied schema migrations - one row per step, written by migrations.py"""
+    __tablename__ = 'schema_version'
+
+    version = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False)
+    backfilled_rows = Column(Integer, nullable=False, default=0)
+    seconds = Column(Float)
+    applied_at = Column(DateTime, default=func.now())
+
+    def __repr__(self):
+        return f"<SchemaVersion({self.version}: {self.name})>"
+
 # Database utilities
+
+# Pragmas applied to every new connection (None drops a pragma from the profile)
+PERFORMANCE_PRAGMAS = {
+    'journal_mode': 'WAL',         # Readers no longer block the pipeline writer
+    'synchronous': 'NORMAL',       # Safe with WAL, skips an fsync per commit
+    'cache_size': -64000,          # 64MB page cache (negative = KiB)
+    'mmap_size': 268435456,        # 256MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,          # Wait on locks instead of failing immediately
+}
+
 class DatabaseManager:
-    """Database connection and session management"""
+    """Database connection and session management
 
-    def __init__(self, db_path: str = "nfl_betting.db"):
+    The write engine serves the pipeline; the read engine is a separate pool
+    with ``query_only`` set for the query layer, so dashboard reads run
+    alongside scheduler writes under WAL.
+    """
+
+    def __init__(self, db_path: str = "nfl_betting.db", pragmas: Optional[Dict] = None,
+                 pool_size: int = 5, read_pool_size: int = 10):
         self.db_path = db_path
-        self.engine = create_engine(f"sqlite:///{db_path}", echo=False)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.pragmas = {
+            name: value for name, value in {**PERFORMANCE_PRAGMAS, **(pragmas or {})}.items()
+            if value is not None
+        }
 
-    def create_tables(self):
-        """Create all tables and indexes"""
+        self.engine = self._create_engine(pool_size, read_only=False)
+        self.read_engine = self._create_engine(read_pool_size, read_only=True)
+        self.SessionLocal = sessionmaker(bind=self.engine)
+        self.ReadSessionLocal = sessionmaker(bind=self.read_engine)
+
+    def _create_engine(self, pool_size: int, read_only: bool):
+        """Pooled SQLite engine with the performance pragmas applied on connect"""
+        engine = create_engine(
+            f"sqlite:///{self.db_path}",
+            echo=False,
+            pool_size=pool_size,
+            max_overflow=pool_size,
+            connect_args={'check_same_thread': False},
+        )
+
+        pragmas = dict(self.pragmas)
+        if read_only:
+            # Journal mode is persistent and can only be switched by a writer
+            pragmas.pop('journal_mode', None)
+            pragmas['query_only'] = 'ON'
+
+        @event.listens_for(engine, "connect")
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+        return engine
+
+    def create_tables(self) -> List[str]:
+        """Create missing tables, and columns and indexes missing from existing tables
+
+        ``create_all`` only touches tables it creates, so nullable columns and
+        indexes added to a model later are created here for databases built
+        before them (SQLite adds a column without rewriting the table). Their
+        values are backfilled by migrations.py. Other columns, and indexes
+        over columns the table does not have, are left to migrations.py.
+        Returns the names of the columns and indexes created on existing tables.
+        """
+        existing = set(inspect(self.engine).get_table_names())
         Base.metadata.create_all(bind=self.engine)
 
+        created = []
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing:
+                    continue
+                columns = {column['name'] for column in inspect(conn).get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in columns and column.nullable and not column.primary_key:
+                        conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                                             f"{column.type.compile(dialect=conn.dialect)}")
+                        columns.add(column.name)
+                        created.append(f"{table.name}.{column.name}")
+
+                present = {index['name'] for index in inspect(conn).get_indexes(table.name)}
+                for index in table.indexes:
+                    if index.name not in present and {c.name for c in index.columns} <= columns:
+                        index.create(bind=conn)
+                        created.append(index.name)
+        return created
+
     def get_session(self):
         """Get database session with automatic cleanup"""
         return self.SessionLocal()
 
+    def get_read_session(self):
+        """Get read-only session from the query pool"""
+        return self.ReadSessionLocal()
+
     def execute_raw_sql(self, sql: str):
         """Execute raw SQL for custom operations"""
-        with self.engine.connect() as conn:
-            return conn.execute(sql)
+        with self.engine.begin() as conn:
+            result = conn.execute(text(sql))
+            return result.fetchall() if result.returns_rows else result.rowcount
 
     def vacuum(self):
         """Optimize database size and performance"""
         with self.engine.connect() as conn:
-            conn.execute("VACUUM")
-            conn.execute("ANALYZE")
+            conn.execute(text("VACUUM"))
+            conn.execute(text("ANALYZE"))
+            conn.commit()
+
+    def dispose(self):
+        """Close every pooled connection"""
+        self.engine.dispose()
+        self.read_engine.dispose()
+
+# Shared managers so the pipeline, ETL and query layer reuse one set of pools
+_managers: Dict[str, DatabaseManager] = {}
 
 # Initialize database instance
-def get_database_manager(db_path: str = "nfl_betting.db") -> DatabaseManager:
-    """Get configured database manager instance"""
-    return DatabaseManager(db_path)
+def get_database_manager(db_path: str = "nfl_betting.db", **profile) -> DatabaseManager:
+    """Get configured database manager instance
+
+    Managers with the default profile are shared per database path; passing
+    profile overrides (pragmas, pool sizes) always builds a new one.
+    """
+    if profile:
+        return DatabaseManager(db_path, **profile)
+    if db_path not in _managers:
+        _managers[db_path] = DatabaseManager(db_path)
+    return _managers[db_path]
 
 if __name__ == "__main__":
     # Create database and tables for testing
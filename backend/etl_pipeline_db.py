@@ -3,14 +3,259 @@ Refactored ETL Pipeline - Database Version
 Processes NFL data into normalized SQLite database following 3NF principles
 """
 
+import time
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from collections import deque
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import (
+    Table, and_, bindparam, case, delete, desc, exists, func, literal, or_, select, true, union_all, update
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from database import (
     get_database_manager, Game, BettingLine, GameConditions,
-    TeamPerformance, TeamStatsSnapshot
+    TeamPerformance, TeamStatsSnapshot, TeamSeasonSummary, LeagueOverUnderTrend, DataVersion,
+    LineHistory, LINE_FIELDS
+)
+
+# Rows per INSERT ... ON CONFLICT batch in bulk load mode
+BULK_BATCH_SIZE = 500
+
+# Timestamp columns refreshed when an upsert hits an existing row
+REFRESHED_TIMESTAMPS = ('updated_at', 'computed_at')
+
+# Bulk load target tables and their upsert conflict columns, in write order
+BULK_TABLES = {
+    'games': (Game.__table__, ['game_id']),
+    'betting_lines': (BettingLine.__table__, ['game_id']),
+    'game_conditions': (GameConditions.__table__, ['game_id']),
+    'team_performances': (TeamPerformance.__table__, ['game_id', 'team']),
+}
+
+# team_performances columns written by the SQL rebuild, in SELECT order
+PERFORMANCE_COLUMNS = (
+    'game_id', 'team', 'is_home', 'points_scored', 'points_allowed',
+    'covered_spread', 'total_went_over', 'moneyline_odds', 'spread_odds',
+)
+
+# Seconds per bucket when thinning the line history of settled games
+LINE_HISTORY_RESOLUTION = 60 * 60
+
+# Normalized source columns covered by a game's content hash
+HASHED_COLUMNS = (
+    'season', 'week', 'game_date', 'game_type', 'home_team', 'away_team',
+    'home_score', 'away_score', 'overtime', 'is_divisional',
+    'spread_line', 'home_spread_odds', 'away_spread_odds', 'total_line',
+    'over_odds', 'under_odds', 'home_moneyline', 'away_moneyline',
+    'stadium_id', 'stadium', 'roof', 'surface', 'temp', 'wind', 'referee',
+)
+
+# Rolling window sizes (games) for the point averages in team_stats_snapshot
+ROLLING_WINDOWS = (3, 5, 10)
+
+# Columns needed to roll team statistics forward
+STATS_COLUMNS = (
+    TeamPerformance.points_scored, TeamPerformance.points_allowed,
+    TeamPerformance.covered_spread, TeamPerformance.total_went_over,
+    Game.season, Game.week,
 )
 
+
+def _int_values(series: pd.Series) -> np.ndarray:
+    """Column as object array of Python ints, None where missing"""
+    values = pd.to_numeric(series, errors='coerce')
+    mask = values.notna().to_numpy()
+    out = np.full(len(values), None, dtype=object)
+    out[mask] = values.to_numpy()[mask].astype(np.int64).tolist()
+    return out
+
+
+def _float_values(series: pd.Series) -> np.ndarray:
+    """Column as object array of Python floats, None where missing"""
+    values = pd.to_numeric(series, errors='coerce')
+    mask = values.notna().to_numpy()
+    out = np.full(len(values), None, dtype=object)
+    out[mask] = values.to_numpy()[mask].astype(np.float64).tolist()
+    return out
+
+
+def _flag_values(series: pd.Series) -> np.ndarray:
+    """Column as array of Python bools, False where missing"""
+    values = pd.to_numeric(series, errors='coerce')
+    return np.array([bool(v) for v in values.fillna(0).to_numpy()], dtype=object)
+
+
+def _text_values(raw_df: pd.DataFrame, column: str) -> np.ndarray:
+    """Optional text column as object array, None where missing or absent"""
+    if column not in raw_df.columns:
+        return np.full(len(raw_df), None, dtype=object)
+    series = raw_df[column].astype(object)
+    return series.where(series.notna(), None).to_numpy()
+
+
+def _compare_values(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Element-wise left > right as Python bools, None where right is missing"""
+    out = np.full(len(left), None, dtype=object)
+    mask = np.array([r is not None for r in right], dtype=bool)
+    if mask.any():
+        out[mask] = (left[mask].astype(np.float64) > right[mask].astype(np.float64)).tolist()
+    return out
+
+
+def _extract_columns(raw_df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Convert the raw schedule frame into typed column arrays"""
+    missing = pd.Series(np.nan, index=raw_df.index)
+    columns = {
+        'game_id': raw_df['game_id'].astype(str).to_numpy(dtype=object),
+        'season': _int_values(raw_df['season']),
+        'week': _int_values(raw_df['week']),
+        'game_date': np.array(pd.to_datetime(raw_df['gameday']).dt.date.tolist(), dtype=object),
+        'game_type': raw_df['game_type'].to_numpy(dtype=object),
+        'home_team': raw_df['home_team'].to_numpy(dtype=object),
+        'away_team': raw_df['away_team'].to_numpy(dtype=object),
+        'home_score': _int_values(raw_df['home_score']),
+        'away_score': _int_values(raw_df['away_score']),
+        'overtime': _flag_values(raw_df['overtime']),
+        'is_divisional': _flag_values(raw_df['div_game']),
+        'spread_line': _float_values(raw_df['spread_line']),
+        'home_spread_odds': _int_values(raw_df['home_spread_odds']),
+        'away_spread_odds': _int_values(raw_df['away_spread_odds']),
+        'total_line': _float_values(raw_df['total_line']),
+        'over_odds': _int_values(raw_df['over_odds']),
+        'under_odds': _int_values(raw_df['under_odds']),
+        'home_moneyline': _int_values(raw_df['home_moneyline']),
+        'away_moneyline': _int_values(raw_df['away_moneyline']),
+        'stadium_id': _text_values(raw_df, 'stadium_id'),
+        'stadium': _text_values(raw_df, 'stadium'),
+        'roof': _text_values(raw_df, 'roof'),
+        'surface': _text_values(raw_df, 'surface'),
+        'temp': _float_values(raw_df.get('temp', missing)),
+        'wind': _float_values(raw_df.get('wind', missing)),
+        'referee': _text_values(raw_df, 'referee'),
+    }
+
+    # Hash the normalized values so equal content always hashes equally
+    normalized = pd.DataFrame({name: [str(v) for v in columns[name]] for name in HASHED_COLUMNS})
+    hashes = pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+    columns['content_hash'] = np.array([f"{h:016x}" for h in hashes], dtype=object)
+    return columns
+
+
+def _game_rows(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """Row dicts for the games table"""
+    keys = ['game_id', 'season', 'week', 'game_date', 'game_type', 'home_team',
+            'away_team', 'home_score', 'away_score', 'overtime', 'is_divisional', 'content_hash']
+    return [dict(zip(keys, values)) for values in zip(*(columns[k] for k in keys))]
+
+
+def _betting_line_rows(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """Row dicts for the betting_lines table"""
+    keys = ['game_id', 'spread_line', 'home_spread_odds', 'away_spread_odds', 'total_line',
+            'over_odds', 'under_odds', 'home_moneyline', 'away_moneyline']
+    return [dict(zip(keys, values)) for values in zip(*(columns[k] for k in keys))]
+
+
+def _condition_rows(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """Row dicts for the game_conditions table (skips games without a stadium)"""
+    has_stadium = np.array([s is not None for s in columns['stadium']], dtype=bool)
+    source = ['game_id', 'stadium_id', 'stadium', 'roof', 'surface', 'temp', 'wind', 'referee']
+    keys = ['game_id', 'stadium_id', 'stadium_name', 'roof', 'surface', 'temperature',
+            'wind_speed', 'referee']
+    return [dict(zip(keys, values))
+            for values in zip(*(columns[k][has_stadium] for k in source))]
+
+
+def _performance_rows(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """Row dicts for the team_performances table (2 per completed game)"""
+    scored = np.array([h is not None and a is not None
+                       for h, a in zip(columns['home_score'], columns['away_score'])], dtype=bool)
+    if not scored.any():
+        return []
+
+    game_ids = columns['game_id'][scored]
+    home_score = columns['home_score'][scored].astype(np.int64)
+    away_score = columns['away_score'][scored].astype(np.int64)
+    spread_line = columns['spread_line'][scored]
+    total_line = columns['total_line'][scored]
+
+    negated_spread = np.array([None if s is None else -s for s in spread_line], dtype=object)
+    total_over = _compare_values(home_score + away_score, total_line)
+    home_cover = _compare_values(home_score - away_score, spread_line)
+    away_cover = _compare_values(away_score - home_score, negated_spread)
+
+    sides = [
+        (columns['home_team'][scored], True, home_score, away_score, home_cover,
+         columns['home_moneyline'][scored], columns['home_spread_odds'][scored]),
+        (columns['away_team'][scored], False, away_score, home_score, away_cover,
+         columns['away_moneyline'][scored], columns['away_spread_odds'][scored]),
+    ]
+
+    # Interleave home/away per game to match the row-by-row insert order
+    rows = []
+    for i in range(len(game_ids)):
+        for team, is_home, points_for, points_against, covered, moneyline, spread_odds in sides:
+            rows.append({
+                'game_id': game_ids[i],
+                'team': team[i],
+                'is_home': is_home,
+                'points_scored': int(points_for[i]),
+                'points_allowed': int(points_against[i]),
+                'covered_spread': covered[i],
+                'total_went_over': total_over[i],
+                'moneyline_odds': moneyline[i],
+                'spread_odds': spread_odds[i],
+            })
+    return rows
+
+
+def build_bulk_rows(raw_df: pd.DataFrame) -> Dict[str, List[Dict]]:
+    """Transform a season DataFrame into upsert-ready rows per table
+
+    Pure CPU work with no database access, so it can run in a worker process.
+    """
+    columns = _extract_columns(raw_df)
+    return {
+        'games': _game_rows(columns),
+        'betting_lines': _betting_line_rows(columns),
+        'game_conditions': _condition_rows(columns),
+        'team_performances': _performance_rows(columns),
+    }
+
+
+class _RollingWindow:
+    """Fixed-size window over recent games with running sums"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.games = deque()
+        self.points_for = 0
+        self.points_against = 0
+        self.wins = 0
+        self.ats_wins = 0
+        self.overs = 0
+
+    def add(self, points_for: int, points_against: int, covered: Optional[bool], over: Optional[bool]):
+        """Push a game into the window, dropping the oldest when full"""
+        game = (points_for, points_against, 1 if points_for > points_against else 0,
+                1 if covered else 0, 1 if over else 0)
+        self.games.append(game)
+        self._apply(game, 1)
+        if len(self.games) > self.size:
+            self._apply(self.games.popleft(), -1)
+
+    def _apply(self, game: Tuple[int, ...], sign: int):
+        self.points_for += sign * game[0]
+        self.points_against += sign * game[1]
+        self.wins += sign * game[2]
+        self.ats_wins += sign * game[3]
+        self.overs += sign * game[4]
+
+    def __len__(self):
+        return len(self.games)
+
+
 class DatabaseETL:
     """ETL Pipeline that writes to normalized SQLite database"""
 
@@ -23,8 +268,9 @@ class DatabaseETL:
         """Process and insert game records"""
         print("Processing games...")
         games_inserted = 0
+        content_hashes = self.content_hashes(raw_df)
 
-        for _, row in raw_df.iterrows():
+        for index, row in raw_df.iterrows():
             game = Game(
                 game_id=row['game_id'],
                 season=int(row['season']),
@@ -36,7 +282,8 @@ class DatabaseETL:
                 home_score=int(row['home_score']) if pd.notna(row['home_score']) else None,
                 away_score=int(row['away_score']) if pd.notna(row['away_score']) else None,
                 overtime=bool(row['overtime']) if pd.notna(row['overtime']) else False,
-                is_divisional=bool(row['div_game']) if pd.notna(row['div_game']) else False
+                is_divisional=bool(row['div_game']) if pd.notna(row['div_game']) else False,
+                content_hash=content_hashes[index]
             )
 
             try:
@@ -73,6 +320,8 @@ class DatabaseETL:
             except Exception as e:
                 print(f"Error inserting betting line {row['game_id']}: {e}")
 
+        self.record_line_history(session, _betting_line_rows(_extract_columns(raw_df)))
+
         print(f"Processed {lines_inserted} betting lines")
         return lines_inserted
 
@@ -159,6 +408,134 @@ class DatabaseETL:
         print(f"Processed {performances_inserted} team performances")
         return performances_inserted
 
+    # ==================== BULK LOAD MODE ====================
+
+    def bulk_load(self, raw_df: pd.DataFrame, session: Session) -> Dict[str, int]:
+        """Upsert a season DataFrame with batched INSERT ... ON CONFLICT statements
+
+        Produces the same rows as process_games, process_betting_lines,
+        process_game_conditions and process_team_performances, but converts
+        the frame to column arrays once instead of merging row by row.
+        """
+        print("Bulk loading season data...")
+        counts = self.write_bulk_rows(session, build_bulk_rows(raw_df))
+
+        print(f"Bulk loaded {counts['games']} games, {counts['betting_lines']} betting lines, "
+              f"{counts['game_conditions']} game conditions, {counts['team_performances']} team performances")
+        return counts
+
+    def write_bulk_rows(self, session: Session, rows: Dict[str, List[Dict]]) -> Dict[str, int]:
+        """Upsert rows produced by build_bulk_rows"""
+        counts = {
+            name: self._bulk_upsert(session, table, rows[name], conflict_columns)
+            for name, (table, conflict_columns) in BULK_TABLES.items()
+        }
+        counts['line_history'] = self.record_line_history(session, rows['betting_lines'])
+        return counts
+
+    def content_hashes(self, raw_df: pd.DataFrame) -> pd.Series:
+        """Per-game hash of every stored field, indexed like ``raw_df``"""
+        columns = _extract_columns(raw_df)
+        return pd.Series(columns['content_hash'], index=raw_df.index)
+
+    def set_content_hashes(self, session: Session, hashes: Dict[str, Optional[str]]) -> int:
+        """Store game content hashes by game_id; None clears a hash so change detection selects the game again"""
+        if not hashes:
+            return 0
+
+        games = Game.__table__
+        stmt = update(games).where(games.c.game_id == bindparam('b_game_id'))\
+            .values(content_hash=bindparam('b_hash'))
+        rows = [{'b_game_id': game_id, 'b_hash': content_hash} for game_id, content_hash in hashes.items()]
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            session.execute(stmt, rows[start:start + BULK_BATCH_SIZE])
+        return len(rows)
+
+    def _bulk_upsert(self, session: Session, table: Table, rows: List[Dict],
+                     conflict_columns: List[str]) -> int:
+        """Write rows in batches with INSERT ... ON CONFLICT DO UPDATE"""
+        if not rows:
+            return 0
+
+        stmt = sqlite_insert(table)
+        update_columns = {
+            name: stmt.excluded[name] for name in rows[0]
+            if name not in conflict_columns
+        }
+        for name in REFRESHED_TIMESTAMPS:
+            if name in table.c:
+                update_columns[name] = func.now()
+        stmt = stmt.on_conflict_do_update(index_elements=conflict_columns, set_=update_columns)
+
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            session.execute(stmt, rows[start:start + BULK_BATCH_SIZE])
+
+        return len(rows)
+
+    # ==================== SQL REBUILD ====================
+
+    def rebuild_team_performances(self, session: Session, seasons: Optional[List[int]] = None,
+                                  game_ids: Optional[List[str]] = None) -> int:
+        """Regenerate team_performances from games and betting_lines inside SQLite
+
+        Each completed game is projected twice (home and away) against its
+        line and upserted with one INSERT ... SELECT; rows whose game lost
+        its score or changed teams are deleted. Scoped to ``game_ids`` (in
+        batches) or ``seasons``; without either the whole table is rebuilt
+        in a single statement. Returns the number of rows written.
+        """
+        if game_ids is not None:
+            scopes = [Game.game_id.in_(game_ids[start:start + BULK_BATCH_SIZE])
+                      for start in range(0, len(game_ids), BULK_BATCH_SIZE)]
+        elif seasons is not None:
+            scopes = [Game.season.in_(seasons)]
+        else:
+            scopes = [None]
+
+        written = 0
+        for scope in scopes:
+            written += session.execute(self._performance_upsert(scope)).rowcount
+            session.execute(self._stale_performance_delete(scope))
+        return written
+
+    def _performance_upsert(self, scope):
+        """INSERT ... SELECT of the home and away projections of completed games in ``scope``"""
+        completed = and_(Game.home_score.isnot(None), Game.away_score.isnot(None),
+                         true() if scope is None else scope)
+
+        def projection(is_home: bool):
+            side, other = ('home', 'away') if is_home else ('away', 'home')
+            points_for = getattr(Game, f'{side}_score')
+            points_against = getattr(Game, f'{other}_score')
+            # spread_line is from the home side's perspective (positive = home favored)
+            spread = BettingLine.spread_line if is_home else -BettingLine.spread_line
+            return select(
+                Game.game_id, getattr(Game, f'{side}_team'), literal(is_home),
+                points_for, points_against,
+                points_for - points_against > spread,
+                Game.home_score + Game.away_score > BettingLine.total_line,
+                getattr(BettingLine, f'{side}_moneyline'), getattr(BettingLine, f'{side}_spread_odds'),
+            ).outerjoin(BettingLine, BettingLine.game_id == Game.game_id).where(completed)
+
+        projections = union_all(projection(True), projection(False)).subquery()
+        # WHERE true keeps SQLite from reading ON CONFLICT as part of the SELECT's join
+        stmt = sqlite_insert(TeamPerformance.__table__).from_select(
+            list(PERFORMANCE_COLUMNS), select(projections).where(true()))
+        return stmt.on_conflict_do_update(
+            index_elements=['game_id', 'team'],
+            set_={name: stmt.excluded[name] for name in PERFORMANCE_COLUMNS[2:]})
+
+    def _stale_performance_delete(self, scope):
+        """DELETE of rows in ``scope`` (default: all) without a completed game that has their team"""
+        current = exists().where(
+            Game.game_id == TeamPerformance.game_id,
+            Game.home_score.isnot(None), Game.away_score.isnot(None),
+            TeamPerformance.team.in_([Game.home_team, Game.away_team]))
+        stmt = delete(TeamPerformance).where(~current)
+        if scope is not None:
+            stmt = stmt.where(TeamPerformance.game_id.in_(select(Game.game_id).where(scope)))
+        return stmt.execution_options(synchronize_session=False)
+
     def _calculate_spread_cover(self, point_diff: int, spread_line: float, is_home: bool) -> bool:
         """Calculate if team covered the spread"""
         if spread_line is None:
@@ -250,3 +627,434 @@ class DatabaseETL:
         print(f"Calculated {stats_inserted} team stat snapshots")
         return stats_inserted
 
+
+
+    # ==================== INCREMENTAL STATS ====================
+
+    def update_team_stats(self, session: Session, game_ids: Optional[List[str]] = None) -> int:
+        """Recompute rolling statistics from the earliest changed game onwards
+
+        Only teams that played in ``game_ids`` are touched, and only their
+        snapshots at or after the earliest changed week. Window sums and
+        season counters are seeded from the games before that point and
+        carried forward. Without ``game_ids`` every team is rebuilt with the
+        vectorized backend.
+        """
+        if game_ids is None:
+            return self.calculate_team_stats_vectorized(session)
+
+        print("Updating team statistics...")
+        start_points = self._stats_start_points(session, game_ids)
+
+        rows = []
+        for team, start in start_points.items():
+            rows.extend(self._roll_team_stats(session, team, start))
+
+        stats_updated = self._bulk_upsert(
+            session, TeamStatsSnapshot.__table__, rows, ['team', 'season', 'week'])
+
+        print(f"Updated {stats_updated} team stat snapshots for {len(start_points)} teams")
+        return stats_updated
+
+    def _stats_start_points(self, session: Session, game_ids: List[str]) -> Dict[str, Tuple[int, int]]:
+        """Earliest (season, week) each affected team needs recomputing from"""
+        starts = {}
+        game_ids = list(game_ids)
+        for i in range(0, len(game_ids), BULK_BATCH_SIZE):
+            games = session.query(Game.home_team, Game.away_team, Game.season, Game.week)\
+                .filter(Game.game_id.in_(game_ids[i:i + BULK_BATCH_SIZE]))\
+                .all()
+
+            for home_team, away_team, season, week in games:
+                for team in (home_team, away_team):
+                    starts[team] = min(starts.get(team, (season, week)), (season, week))
+
+        return starts
+
+    def _roll_team_stats(self, session: Session, team: str, start: Tuple[int, int]) -> List[Dict]:
+        """Snapshot rows for one team from ``start`` to its latest game"""
+        season, week = start
+        before_start = or_(Game.season < season, and_(Game.season == season, Game.week < week))
+
+        # Seed windows with the games preceding the start point
+        history = session.query(*STATS_COLUMNS)\
+            .join(Game)\
+            .filter(TeamPerformance.team == team, before_start)\
+            .order_by(desc(Game.season), desc(Game.week))\
+            .limit(max(ROLLING_WINDOWS) - 1)\
+            .all()
+
+        windows = {size: _RollingWindow(size) for size in ROLLING_WINDOWS}
+        for perf in reversed(history):
+            for window in windows.values():
+                window.add(perf.points_scored, perf.points_allowed, perf.covered_spread, perf.total_went_over)
+
+        current_season = history[0].season if history else None
+        season_games, season_wins, season_ats_wins = self._season_counters(session, team, history)
+
+        performances = session.query(*STATS_COLUMNS)\
+            .join(Game)\
+            .filter(TeamPerformance.team == team, ~before_start)\
+            .order_by(Game.season, Game.week)\
+            .all()
+
+        rows = []
+        for perf in performances:
+            if perf.season != current_season:
+                current_season = perf.season
+                season_games = season_wins = season_ats_wins = 0
+
+            for window in windows.values():
+                window.add(perf.points_scored, perf.points_allowed, perf.covered_spread, perf.total_went_over)
+            season_games += 1
+            season_wins += 1 if perf.points_scored > perf.points_allowed else 0
+            season_ats_wins += 1 if perf.covered_spread else 0
+
+            row = {'team': team, 'season': perf.season, 'week': perf.week}
+            for size, window in windows.items():
+                pts_for = window.points_for / len(window)
+                pts_against = window.points_against / len(window)
+                row[f'pts_for_avg_{size}'] = pts_for
+                row[f'pts_against_avg_{size}'] = pts_against
+                row[f'point_diff_avg_{size}'] = pts_for - pts_against
+
+            window_5 = windows[5]
+            row.update({
+                'win_pct_5': window_5.wins / len(window_5),
+                'ats_pct_5': window_5.ats_wins / len(window_5),
+                'over_pct_5': window_5.overs / len(window_5),
+                'season_wins': season_wins,
+                'season_losses': season_games - season_wins,
+                'season_ats_wins': season_ats_wins,
+                'season_ats_losses': season_games - season_ats_wins,
+            })
+            rows.append(row)
+
+        return rows
+
+    def _season_counters(self, session: Session, team: str, history: List) -> Tuple[int, int, int]:
+        """Season (games, wins, ATS wins) as of the last game before the start point"""
+        if not history:
+            return 0, 0, 0
+
+        last = history[0]
+        snapshot = session.query(TeamStatsSnapshot)\
+            .filter(
+                TeamStatsSnapshot.team == team,
+                TeamStatsSnapshot.season == last.season,
+                TeamStatsSnapshot.week == last.week
+            ).first()
+
+        if snapshot and snapshot.season_wins is not None and snapshot.season_ats_wins is not None:
+            return (snapshot.season_wins + snapshot.season_losses,
+                    snapshot.season_wins, snapshot.season_ats_wins)
+
+        # No usable snapshot to carry forward - aggregate the season prefix instead
+        games, wins, ats_wins = session.query(
+            func.count(),
+            func.sum(TeamPerformance.points_scored > TeamPerformance.points_allowed),
+            func.sum(TeamPerformance.covered_spread))\
+            .join(Game)\
+            .filter(
+                TeamPerformance.team == team,
+                Game.season == last.season,
+                Game.week <= last.week
+            ).one()
+        return games, wins or 0, ats_wins or 0
+
+    # ==================== VECTORIZED STATS ====================
+
+    def load_performance_frame(self, session: Session) -> pd.DataFrame:
+        """All team performances joined with their game week, one row per team-game"""
+        rows = session.query(TeamPerformance.team, *STATS_COLUMNS)\
+            .join(Game)\
+            .order_by(TeamPerformance.team, Game.season, Game.week)\
+            .all()
+        columns = ['team', 'points_scored', 'points_allowed', 'covered_spread',
+                   'total_went_over', 'season', 'week']
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def compute_team_stats_frame(self, performances: pd.DataFrame) -> pd.DataFrame:
+        """Compute every TeamStatsSnapshot column with grouped rolling/cumsum operations
+
+        ``performances`` is the frame from load_performance_frame. Windows run
+        across season boundaries; season counters reset each season.
+        """
+        df = performances.sort_values(['team', 'season', 'week'], kind='mergesort')\
+            .reset_index(drop=True)
+
+        counts = pd.DataFrame({
+            'points_for': df['points_scored'].astype(float),
+            'points_against': df['points_allowed'].astype(float),
+            'wins': (df['points_scored'] > df['points_allowed']).astype(float),
+            'ats_wins': df['covered_spread'].fillna(False).astype(bool).astype(float),
+            'overs': df['total_went_over'].fillna(False).astype(bool).astype(float),
+        })
+        by_team = counts.groupby(df['team'], sort=False)
+
+        stats = df[['team', 'season', 'week']].copy()
+        for size in ROLLING_WINDOWS:
+            # Sum / count rather than mean keeps results identical to the loop's sum() / len()
+            rolling = by_team.rolling(size, min_periods=1)
+            sums = rolling.sum().reset_index(level=0, drop=True).sort_index()
+            games = rolling['wins'].count().reset_index(level=0, drop=True).sort_index()
+
+            stats[f'pts_for_avg_{size}'] = sums['points_for'] / games
+            stats[f'pts_against_avg_{size}'] = sums['points_against'] / games
+            stats[f'point_diff_avg_{size}'] = stats[f'pts_for_avg_{size}'] - stats[f'pts_against_avg_{size}']
+
+            if size == 5:
+                stats['win_pct_5'] = sums['wins'] / games
+                stats['ats_pct_5'] = sums['ats_wins'] / games
+                stats['over_pct_5'] = sums['overs'] / games
+
+        by_season = counts[['wins', 'ats_wins']].groupby([df['team'], df['season']], sort=False)
+        season_totals = by_season.cumsum().astype(int)
+        season_games = by_season.cumcount() + 1
+
+        stats['season_wins'] = season_totals['wins']
+        stats['season_losses'] = season_games - season_totals['wins']
+        stats['season_ats_wins'] = season_totals['ats_wins']
+        stats['season_ats_losses'] = season_games - season_totals['ats_wins']
+
+        return stats
+
+    def calculate_team_stats_vectorized(self, session: Session) -> int:
+        """Rebuild every team stat snapshot from one joined frame"""
+        print("Calculating team statistics (vectorized)...")
+        stats = self.compute_team_stats_frame(self.load_performance_frame(session))
+
+        stats_inserted = self._bulk_upsert(
+            session, TeamStatsSnapshot.__table__, stats.to_dict('records'), ['team', 'season', 'week'])
+
+        print(f"Calculated {stats_inserted} team stat snapshots")
+        return stats_inserted
+
+    # ==================== MATERIALIZED SUMMARIES ====================
+
+    def update_summaries(self, session: Session, game_ids: Optional[List[str]] = None) -> int:
+        """Refresh team season summaries and league O/U trends touched by ``game_ids``
+
+        Only the (team, season) pairs and seasons of the changed games are
+        re-aggregated. Without ``game_ids`` every summary is rebuilt.
+        """
+        print("Updating summary tables...")
+        team_seasons, seasons = self._affected_summaries(session, game_ids)
+
+        summaries = self._refresh_team_season_summaries(session, team_seasons)
+        trends = self._refresh_league_ou_trends(session, seasons)
+
+        print(f"Updated {summaries} team season summaries and {trends} league O/U trend rows")
+        return summaries + trends
+
+    def _affected_summaries(self, session: Session, game_ids: Optional[List[str]]):
+        """(team, season) pairs and seasons covering the changed games, None for all"""
+        if game_ids is None:
+            return None, None
+
+        team_seasons = set()
+        game_ids = list(game_ids)
+        for i in range(0, len(game_ids), BULK_BATCH_SIZE):
+            games = session.query(Game.home_team, Game.away_team, Game.season)\
+                .filter(Game.game_id.in_(game_ids[i:i + BULK_BATCH_SIZE]))\
+                .all()
+            for home_team, away_team, season in games:
+                team_seasons.add((home_team, season))
+                team_seasons.add((away_team, season))
+
+        return team_seasons, {season for _, season in team_seasons}
+
+    def _refresh_team_season_summaries(self, session: Session, team_seasons) -> int:
+        """Re-aggregate team_season_summaries rows from team_performances"""
+        if team_seasons is not None and not team_seasons:
+            return 0
+
+        win = case((TeamPerformance.points_scored > TeamPerformance.points_allowed, 1), else_=0)
+        ats_win = case((TeamPerformance.covered_spread == True, 1), else_=0)
+        ats_loss = case((TeamPerformance.covered_spread == False, 1), else_=0)
+        over = case((TeamPerformance.total_went_over == True, 1), else_=0)
+
+        query = session.query(
+            TeamPerformance.team, Game.season,
+            func.count().label('games'),
+            func.sum(win).label('wins'),
+            func.sum(ats_win).label('ats_wins'),
+            func.sum(ats_loss).label('ats_losses'),
+            func.count(TeamPerformance.total_went_over).label('ou_games'),
+            func.sum(over).label('overs'),
+            func.sum(TeamPerformance.points_scored).label('points_for'),
+            func.sum(TeamPerformance.points_allowed).label('points_against'))\
+            .join(Game)
+
+        if team_seasons is not None:
+            teams_by_season = {}
+            for team, season in team_seasons:
+                teams_by_season.setdefault(season, set()).add(team)
+            query = query.filter(or_(*(
+                and_(Game.season == season, TeamPerformance.team.in_(sorted(teams)))
+                for season, teams in teams_by_season.items()
+            )))
+
+        rows = []
+        for agg in query.group_by(TeamPerformance.team, Game.season).all():
+            rows.append({
+                'team': agg.team,
+                'season': agg.season,
+                'games': agg.games,
+                'wins': agg.wins,
+                'losses': agg.games - agg.wins,
+                'ats_wins': agg.ats_wins,
+                'ats_losses': agg.ats_losses,
+                'ats_pushes': agg.games - agg.ats_wins - agg.ats_losses,
+                'ou_games': agg.ou_games,
+                'overs': agg.overs,
+                'unders': agg.ou_games - agg.overs,
+                'points_for': agg.points_for,
+                'points_against': agg.points_against,
+                'avg_points_for': agg.points_for / agg.games,
+                'avg_points_against': agg.points_against / agg.games,
+            })
+
+        return self._bulk_upsert(session, TeamSeasonSummary.__table__, rows, ['team', 'season'])
+
+    def _refresh_league_ou_trends(self, session: Session, seasons) -> int:
+        """Rebuild league_ou_trends rows for whole seasons (cumulative columns need every week)"""
+        if seasons is not None and not seasons:
+            return 0
+
+        over = case((TeamPerformance.total_went_over == True, 1), else_=0)
+        query = session.query(
+            Game.season, Game.week,
+            func.count().label('games'),
+            func.sum(over).label('overs'))\
+            .join(Game)\
+            .filter(TeamPerformance.is_home == True, TeamPerformance.total_went_over.isnot(None))
+
+        if seasons is not None:
+            query = query.filter(Game.season.in_(sorted(seasons)))
+
+        rows = []
+        season_games = season_overs = 0
+        current_season = None
+        for agg in query.group_by(Game.season, Game.week).order_by(Game.season, Game.week).all():
+            if agg.season != current_season:
+                current_season = agg.season
+                season_games = season_overs = 0
+
+            season_games += agg.games
+            season_overs += agg.overs
+            rows.append({
+                'season': agg.season,
+                'week': agg.week,
+                'games': agg.games,
+                'overs': agg.overs,
+                'over_rate': agg.overs / agg.games,
+                'season_games': season_games,
+                'season_overs': season_overs,
+                'season_over_rate': season_overs / season_games,
+            })
+
+        return self._bulk_upsert(session, LeagueOverUnderTrend.__table__, rows, ['season', 'week'])
+
+    # ==================== LINE HISTORY ====================
+
+    def record_line_history(self, session: Session, line_rows: List[Dict],
+                            observed_at: Optional[int] = None) -> int:
+        """Append a line_history row for every tracked field whose value changed
+
+        ``line_rows`` are betting_lines row dicts. A field is recorded the
+        first time it has a value and then only when it differs from the last
+        recorded value, so polling unchanged lines writes nothing.
+        """
+        if not line_rows:
+            return 0
+
+        observed_at = int(time.time()) if observed_at is None else observed_at
+        latest = self._latest_line_values(session, [row['game_id'] for row in line_rows])
+
+        changes = []
+        for row in line_rows:
+            for code, field in enumerate(LINE_FIELDS):
+                value = row.get(field)
+                value = None if value is None or pd.isna(value) else float(value)
+                key = (row['game_id'], code)
+                if (latest[key] != value) if key in latest else value is not None:
+                    changes.append({'game_id': row['game_id'], 'observed_at': observed_at,
+                                    'field': code, 'value': value})
+
+        return self._bulk_upsert(session, LineHistory.__table__, changes, ['game_id', 'observed_at', 'field'])
+
+    def _latest_line_values(self, session: Session, game_ids: List[str]) -> Dict[Tuple[str, int], float]:
+        """Last recorded value per (game_id, field code)"""
+        latest = {}
+        for start in range(0, len(game_ids), BULK_BATCH_SIZE):
+            # SQLite takes bare columns from the row that supplied MAX(observed_at)
+            rows = session.query(LineHistory.game_id, LineHistory.field, LineHistory.value,
+                                 func.max(LineHistory.observed_at))\
+                .filter(LineHistory.game_id.in_(game_ids[start:start + BULK_BATCH_SIZE]))\
+                .group_by(LineHistory.game_id, LineHistory.field)\
+                .all()
+            latest.update({(game_id, field): value for game_id, field, value, _ in rows})
+        return latest
+
+    def compact_line_history(self, session: Session, settled_before: date, settled_after: Optional[date] = None,
+                             resolution: int = LINE_HISTORY_RESOLUTION) -> int:
+        """Thin the history of games played before ``settled_before``
+
+        Keeps each field's opening value and its last change in every
+        ``resolution``-second bucket (which includes the closing value), so a
+        settled game's history is bounded however often lines were polled.
+        ``settled_after`` limits the scan to games played on or after it, so
+        repeated runs skip history earlier runs already thinned.
+        """
+        query = session.query(LineHistory.game_id, LineHistory.observed_at, LineHistory.field)\
+            .join(Game, Game.game_id == LineHistory.game_id)\
+            .filter(Game.game_date < settled_before)
+        if settled_after is not None:
+            query = query.filter(Game.game_date >= settled_after)
+        rows = query.all()
+        if not rows:
+            return 0
+
+        history = pd.DataFrame.from_records(rows, columns=['game_id', 'observed_at', 'field'])\
+            .sort_values(['game_id', 'field', 'observed_at'], kind='mergesort')
+        history['bucket'] = history['observed_at'] // resolution
+
+        opening = ~history.duplicated(['game_id', 'field'], keep='first')
+        bucket_last = ~history.duplicated(['game_id', 'field', 'bucket'], keep='last')
+        removed = history.loc[~(opening | bucket_last), ['game_id', 'observed_at', 'field']]
+        if removed.empty:
+            return 0
+
+        table = LineHistory.__table__
+        stmt = table.delete().where(and_(
+            table.c.game_id == bindparam('b_game_id'),
+            table.c.observed_at == bindparam('b_observed_at'),
+            table.c.field == bindparam('b_field'),
+        ))
+        params = [{'b_game_id': g, 'b_observed_at': int(o), 'b_field': int(f)}
+                  for g, o, f in removed.itertuples(index=False)]
+        for start in range(0, len(params), BULK_BATCH_SIZE):
+            session.execute(stmt, params[start:start + BULK_BATCH_SIZE])
+        return len(params)
+
+    # ==================== DATA VERSION ====================
+
+    def bump_data_version(self, session: Session) -> int:
+        """Increment the data version so query caches drop stale results"""
+        stmt = sqlite_insert(DataVersion.__table__).values(id=1, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['id'],
+            set_={'version': DataVersion.__table__.c.version + 1, 'updated_at': func.now()})
+        session.execute(stmt)
+        return session.query(DataVersion.version).filter(DataVersion.id == 1).scalar()
+
+    def bump_predictions_version(self, session: Session) -> int:
+        """Increment the predictions version; game data caches keyed on the data version stay valid"""
+        column = DataVersion.__table__.c.predictions_version
+        stmt = sqlite_insert(DataVersion.__table__).values(id=1, version=0, predictions_version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['id'],
+            set_={'predictions_version': func.coalesce(column, 0) + 1, 'updated_at': func.now()})
+        session.execute(stmt)
+        return session.query(DataVersion.predictions_version).filter(DataVersion.id == 1).scalar()
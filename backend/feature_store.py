@@ -0,0 +1,354 @@
+"""
+NFL Feature Store
+Game-level training matrices built with as-of joins and cached on disk per feature group
+"""
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.exc import OperationalError
+
+from backtest import SEASON_COUNTERS
+from database import get_database_manager, Game, BettingLine, GameConditions, TeamStatsSnapshot, DataVersion
+from snapshot_export import STATS_FEATURES
+
+# Bump when a group's computation changes, so cached matrices from older code are not reused
+FEATURE_CODE_VERSION = 1
+
+# Feature groups in matrix column order
+FEATURE_GROUPS = ('team_form', 'lines', 'conditions', 'rest', 'splits')
+
+DEFAULT_PARAMS = {
+    'stats': STATS_FEATURES,  # TeamStatsSnapshot columns taken as of the previous week
+    'short_rest_days': 5,     # At most this many days since the last game is short rest
+    'long_rest_days': 9,      # At least this many days (or a season opener) is long rest
+    'split_window': 16,       # Most recent games per split bucket averaged into split features
+}
+
+# Parameters each group depends on; only these enter the group's cache key
+GROUP_PARAMS = {
+    'team_form': ('stats',),
+    'lines': (),
+    'conditions': (),
+    'rest': ('short_rest_days', 'long_rest_days'),
+    'splits': ('short_rest_days', 'long_rest_days', 'split_window'),
+}
+
+# Game columns loaded once and shared by every group
+GAME_COLUMNS = {
+    'game_id': Game.game_id, 'season': Game.season, 'week': Game.week,
+    'game_date': Game.game_date, 'game_type': Game.game_type,
+    'home_team': Game.home_team, 'away_team': Game.away_team,
+    'home_score': Game.home_score, 'away_score': Game.away_score,
+    'is_divisional': Game.is_divisional,
+    'spread_line': BettingLine.spread_line, 'total_line': BettingLine.total_line,
+    'home_moneyline': BettingLine.home_moneyline, 'away_moneyline': BettingLine.away_moneyline,
+    'roof': GameConditions.roof, 'surface': GameConditions.surface,
+    'temperature': GameConditions.temperature, 'wind_speed': GameConditions.wind_speed,
+}
+
+# Leading matrix columns that identify a game or hold its outcome (NaN until played)
+IDENTIFIER_COLUMNS = ('game_id', 'season', 'week', 'game_date', 'game_type', 'home_team', 'away_team',
+                      'home_score', 'away_score', 'margin', 'total', 'home_win', 'home_covered', 'went_over')
+
+# Roof types played indoors
+INDOOR_ROOFS = ('dome', 'closed')
+
+# Weeks per season slot in the packed (season, week) as-of key
+WEEK_SLOTS = 32
+
+SIDES = ('home', 'away')
+
+
+def _implied_probability(moneyline: pd.Series) -> pd.Series:
+    """Win probability implied by American odds (vig included)"""
+    odds = moneyline.astype(float)
+    return pd.Series(np.where(odds < 0, -odds / (100 - odds), 100 / (odds + 100)), index=moneyline.index)
+
+
+class FeatureSet:
+    """A named choice of feature groups and their parameters
+
+    Each group is cached under a hash of its own parameters, so changing
+    one parameter only recomputes the groups that use it.
+    """
+
+    def __init__(self, name: str = "default", groups: Tuple[str, ...] = FEATURE_GROUPS, **params):
+        unknown = set(groups) - set(FEATURE_GROUPS) or set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown feature groups or parameters: {sorted(unknown)}")
+        self.name = name
+        self.groups = tuple(groups)
+        self.params = {**DEFAULT_PARAMS, **params}
+
+    def definition(self, group: str) -> Dict:
+        """Everything a group's output depends on besides the data"""
+        return {
+            'group': group,
+            'code_version': FEATURE_CODE_VERSION,
+            'params': {name: self.params[name] for name in GROUP_PARAMS[group]},
+        }
+
+    def group_hash(self, group: str) -> str:
+        """Short stable hash of a group's definition"""
+        encoded = json.dumps(self.definition(group), sort_keys=True, default=list).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()[:12]
+
+    def definition_hash(self) -> str:
+        """Hash of the whole set (every group's definition, in order)"""
+        encoded = json.dumps([self.definition(group) for group in self.groups], sort_keys=True, default=list)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()[:12]
+
+
+class FeatureStore:
+    """Builds game-level feature matrices and caches each group as Parquet
+
+    A matrix has one row per game: identifiers, targets (NaN for unplayed
+    games) and the ``home_``/``away_`` prefixed features of every group in
+    the feature set. Team features are taken strictly before the game, so
+    a row never sees its own result. Cached groups live at
+    ``<cache_dir>/<group>-<definition hash>-v<data version>.parquet``; a
+    build reuses every group whose definition and data version match, and
+    files from older data versions are removed as new ones are written.
+    """
+
+    def __init__(self, db_path: str = "nfl_autonomous.db", cache_dir: str = "cache/features"):
+        self.db_manager = get_database_manager(db_path)
+        self.cache_dir = Path(cache_dir)
+        self.stats = {'hits': 0, 'computed': 0}
+        self._games = None
+
+    def data_version(self) -> int:
+        """Current pipeline data version"""
+        with self.db_manager.get_read_session() as session:
+            try:
+                version = session.query(DataVersion.version).filter(DataVersion.id == 1).scalar()
+            except OperationalError:
+                return 0
+            return version or 0
+
+    def build(self, feature_set: Optional[FeatureSet] = None, seasons: Optional[List[int]] = None) -> pd.DataFrame:
+        """Feature matrix for ``feature_set`` (default: every group), optionally limited to ``seasons``"""
+        feature_set = feature_set or FeatureSet()
+        version = self.data_version()
+        self._games = None
+
+        parts = [self._targets()]
+        for group in feature_set.groups:
+            parts.append(self._group(feature_set, group, version))
+        matrix = pd.concat(parts, axis=1)
+
+        if seasons:
+            matrix = matrix[matrix['season'].isin(seasons)]
+        return matrix.reset_index()
+
+    def feature_columns(self, matrix: pd.DataFrame) -> List[str]:
+        """Columns of a built matrix that are features rather than identifiers or targets"""
+        return [column for column in matrix.columns if column not in IDENTIFIER_COLUMNS]
+
+    # ==================== CACHE ====================
+
+    def _group(self, feature_set: FeatureSet, group: str, version: int) -> pd.DataFrame:
+        """One group's features, from the cache when its key matches"""
+        path = self.cache_dir / f"{group}-{feature_set.group_hash(group)}-v{version}.parquet"
+        if path.exists():
+            self.stats['hits'] += 1
+            return pd.read_parquet(path)
+
+        frame = getattr(self, f'_{group}_features')(self._load_games(), feature_set.params)
+        self.stats['computed'] += 1
+        self._store(path, frame, group, version)
+        return frame
+
+    def _targets(self) -> pd.DataFrame:
+        """Identifiers and outcomes; not cached since they are a plain read"""
+        games = self._load_games()
+        margin = games['home_score'] - games['away_score']
+        total = games['home_score'] + games['away_score']
+        scored = margin.notna()
+        return pd.DataFrame({
+            'season': games['season'], 'week': games['week'], 'game_date': games['game_date'],
+            'game_type': games['game_type'], 'home_team': games['home_team'], 'away_team': games['away_team'],
+            'home_score': games['home_score'], 'away_score': games['away_score'],
+            'margin': margin, 'total': total,
+            'home_win': (margin > 0).astype(float).where(scored),
+            'home_covered': (margin > games['spread_line']).astype(float).where(scored & games['spread_line'].notna()),
+            'went_over': (total > games['total_line']).astype(float).where(scored & games['total_line'].notna()),
+        }, index=games.index)
+
+    def _store(self, path: Path, frame: pd.DataFrame, group: str, version: int):
+        """Write a group atomically and drop its files from older data versions"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        frame.to_parquet(tmp)
+        tmp.replace(path)
+        for old in path.parent.glob(f"{group}-*-v*.parquet"):
+            if int(old.stem.rsplit('-v', 1)[1]) < version:
+                old.unlink(missing_ok=True)
+
+    # ==================== SOURCE DATA ====================
+
+    def _load_games(self) -> pd.DataFrame:
+        """Every stored game with its line and conditions, indexed by game_id in kickoff order"""
+        if self._games is None:
+            with self.db_manager.get_read_session() as session:
+                rows = session.query(*GAME_COLUMNS.values())\
+                    .outerjoin(BettingLine, BettingLine.game_id == Game.game_id)\
+                    .outerjoin(GameConditions, GameConditions.game_id == Game.game_id)\
+                    .all()
+            games = pd.DataFrame.from_records(rows, columns=list(GAME_COLUMNS))
+            games['game_date'] = pd.to_datetime(games['game_date'])
+            for column in ('home_score', 'away_score', 'spread_line', 'total_line',
+                           'home_moneyline', 'away_moneyline', 'temperature', 'wind_speed'):
+                games[column] = games[column].astype(float)
+            games['is_divisional'] = games['is_divisional'].fillna(False).astype(bool)
+            self._games = games.sort_values(['game_date', 'game_id'], kind='mergesort').set_index('game_id')
+        return self._games
+
+    def _team_games(self, games: pd.DataFrame, params: Dict) -> pd.DataFrame:
+        """One row per team per game in kickoff order, with rest and outcome columns"""
+        sides = []
+        for side, other in (SIDES, SIDES[::-1]):
+            spread = games['spread_line'] if side == 'home' else -games['spread_line']
+            diff = games[f'{side}_score'] - games[f'{other}_score']
+            sides.append(pd.DataFrame({
+                'game_id': games.index, 'side': side, 'team': games[f'{side}_team'].to_numpy(),
+                'season': games['season'].to_numpy(), 'game_date': games['game_date'].to_numpy(),
+                'is_home': side == 'home', 'is_divisional': games['is_divisional'].to_numpy(),
+                'point_diff': diff.to_numpy(),
+                'won': (diff > 0).where(diff.notna()).astype(float).to_numpy(),
+                'covered': (diff > spread).where(diff.notna() & spread.notna()).astype(float).to_numpy(),
+            }))
+        team_games = pd.concat(sides, ignore_index=True)\
+            .sort_values(['team', 'game_date', 'game_id'], kind='mergesort').reset_index(drop=True)
+
+        previous = team_games.groupby('team')[['game_date', 'season']].shift()
+        rest = (team_games['game_date'] - previous['game_date']).dt.days
+        team_games['rest_days'] = rest.where(previous['season'] == team_games['season'])
+        team_games['rest_bucket'] = np.select(
+            [team_games['rest_days'] <= params['short_rest_days'],
+             team_games['rest_days'].isna() | (team_games['rest_days'] >= params['long_rest_days'])],
+            ['short', 'long'], 'normal')
+        return team_games
+
+    def _by_side(self, games: pd.DataFrame, team_games: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        """Pivot team-game columns back to ``home_<column>``/``away_<column>`` per game"""
+        wide = team_games.pivot(index='game_id', columns='side', values=columns)
+        wide.columns = [f'{side}_{column}' for column, side in wide.columns]
+        return wide.reindex(index=games.index,
+                            columns=[f'{side}_{column}' for side in SIDES for column in columns])
+
+    # ==================== FEATURE GROUPS ====================
+
+    def _team_form_features(self, games: pd.DataFrame, params: Dict) -> pd.DataFrame:
+        """Each side's TeamStatsSnapshot as of the week before the game"""
+        stats = list(params['stats'])
+        with self.db_manager.get_read_session() as session:
+            rows = session.query(TeamStatsSnapshot.team, TeamStatsSnapshot.season, TeamStatsSnapshot.week,
+                                 *(getattr(TeamStatsSnapshot, name) for name in stats)).all()
+        snapshots = pd.DataFrame.from_records(rows, columns=['team', 'snapshot_season', 'week'] + stats)
+        snapshots['key'] = snapshots['snapshot_season'] * WEEK_SLOTS + snapshots['week']
+        snapshots = snapshots.drop(columns='week').sort_values('key', kind='mergesort')
+
+        keys = (games['season'] * WEEK_SLOTS + games['week']).rename('key')
+        features = {}
+        for side in SIDES:
+            left = pd.DataFrame({'game_id': games.index, 'team': games[f'{side}_team'].to_numpy(),
+                                 'season': games['season'].to_numpy(), 'key': keys.to_numpy()})\
+                .sort_values('key', kind='mergesort')
+            # Strictly earlier (season, week): the game's own week is never visible
+            joined = pd.merge_asof(left, snapshots, on='key', by='team', allow_exact_matches=False)\
+                .set_index('game_id').reindex(games.index)
+
+            new_season = joined['snapshot_season'] != joined['season']
+            for name in stats:
+                values = joined[name].astype(float)
+                if name in SEASON_COUNTERS:
+                    values = values.mask(new_season, 0.0)
+                features[f'{side}_{name}'] = values
+        frame = pd.DataFrame(features, index=games.index)
+
+        for name in stats:
+            if name.startswith(('pts_', 'point_diff', 'win_pct', 'ats_pct')):
+                frame[f'diff_{name}'] = frame[f'home_{name}'] - frame[f'away_{name}']
+        return frame
+
+    def _lines_features(self, games: pd.DataFrame, params: Dict) -> pd.DataFrame:
+        """Closing spread and total plus no-vig moneyline win probability"""
+        home = _implied_probability(games['home_moneyline'])
+        away = _implied_probability(games['away_moneyline'])
+        return pd.DataFrame({
+            'spread_line': games['spread_line'],
+            'total_line': games['total_line'],
+            'home_implied_prob': home / (home + away),
+            'moneyline_hold': home + away - 1,
+        }, index=games.index)
+
+    def _conditions_features(self, games: pd.DataFrame, params: Dict) -> pd.DataFrame:
+        """Roof and surface as categoricals, weather as numbers (indoor games have no wind)"""
+        indoor = games['roof'].isin(INDOOR_ROOFS)
+        return pd.DataFrame({
+            'roof': games['roof'].astype('category'),
+            'surface': games['surface'].astype('category'),
+            'indoor': indoor.astype(float).where(games['roof'].notna()),
+            'temperature': games['temperature'],
+            'wind_speed': games['wind_speed'].mask(indoor, 0.0),
+        }, index=games.index)
+
+    def _rest_features(self, games: pd.DataFrame, params: Dict) -> pd.DataFrame:
+        """Days since each side's previous game this season, and short/long rest flags"""
+        team_games = self._team_games(games, params)
+        team_games['short_rest'] = (team_games['rest_bucket'] == 'short').astype(float)
+        team_games['long_rest'] = (team_games['rest_bucket'] == 'long').astype(float)
+
+        frame = self._by_side(games, team_games, ['rest_days', 'short_rest', 'long_rest'])
+        frame['rest_advantage'] = frame['home_rest_days'] - frame['away_rest_days']
+        return frame
+
+    def _splits_features(self, games: pd.DataFrame, params: Dict) -> pd.DataFrame:
+        """Each side's recent record in the same venue, divisional and rest situation as this game
+
+        For every split, the last ``split_window`` earlier games a team played
+        in the same bucket (home or away; divisional or not; short, normal or
+        long rest) are averaged into win rate, cover rate and point differential.
+        """
+        team_games = self._team_games(games, params)
+        window = params['split_window']
+        columns = []
+        for split in ('is_home', 'is_divisional', 'rest_bucket'):
+            name = {'is_home': 'venue', 'is_divisional': 'divisional', 'rest_bucket': 'rest'}[split]
+            grouped = team_games.groupby(['team', split], sort=False)
+            for outcome, label in (('won', 'win_pct'), ('covered', 'ats_pct'), ('point_diff', 'point_diff')):
+                # Shift first so a game never sees its own outcome
+                team_games[f'{name}_{label}'] = grouped[outcome].transform(
+                    lambda values: values.shift().rolling(window, min_periods=1).mean())
+                columns.append(f'{name}_{label}')
+
+        frame = self._by_side(games, team_games, columns)
+        frame['is_divisional'] = games['is_divisional'].astype(float)
+        return frame
+
+
+def main():
+    """Build a feature matrix and write it to Parquet"""
+    parser = argparse.ArgumentParser(description="Build the game-level feature matrix")
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    parser.add_argument('--cache-dir', default="cache/features", help="Feature group cache directory")
+    parser.add_argument('--seasons', type=int, nargs='*', help="Seasons to include (default: all)")
+    parser.add_argument('--out', default="features.parquet", help="Output Parquet file")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.db, args.cache_dir)
+    matrix = store.build(seasons=args.seasons)
+    matrix.to_parquet(args.out, index=False)
+    print(f"{len(matrix)} games x {len(store.feature_columns(matrix))} features -> {args.out} "
+          f"({store.stats['hits']} groups cached, {store.stats['computed']} computed)")
+
+
+if __name__ == "__main__":
+    main()
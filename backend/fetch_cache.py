@@ -0,0 +1,197 @@
+"""
+NFL Schedule Fetch Cache
+On-disk, per-season Parquet cache for schedule data with conditional revalidation
+"""
+
+import hashlib
+import io
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import pandas as pd
+
+# Source nfl_data_py.import_schedules reads; one CSV covering every season
+SCHEDULES_URL = "http://www.habitatring.com/games.csv"
+
+# Seconds a cached season stays fresh before it is revalidated
+PHASE_TTL = {
+    'live': 2 * 60,  # Game-day windows, so final scores land within minutes
+    'regular_season': 60 * 60,
+    'playoffs': 60 * 60,
+    'offseason': 24 * 60 * 60,
+    'historical': 7 * 24 * 60 * 60,
+}
+
+REQUEST_TIMEOUT = 30
+
+# Source columns the pipeline reads; an empty season still carries them so column lookups work
+SCHEDULE_COLUMNS = (
+    'game_id', 'season', 'game_type', 'week', 'gameday', 'gametime', 'away_team', 'away_score',
+    'home_team', 'home_score', 'overtime', 'div_game', 'spread_line', 'home_spread_odds',
+    'away_spread_odds', 'total_line', 'over_odds', 'under_odds', 'home_moneyline', 'away_moneyline',
+    'stadium_id', 'stadium', 'roof', 'surface', 'temp', 'wind', 'referee',
+)
+
+
+def empty_schedule() -> pd.DataFrame:
+    """Schedule frame with no games but every source column"""
+    return pd.DataFrame(columns=list(SCHEDULE_COLUMNS))
+
+
+class ScheduleCache:
+    """Season-keyed schedule cache backed by Parquet files and a JSON manifest
+
+    Fresh seasons are served from disk. Stale ones trigger a conditional GET
+    (ETag / Last-Modified); a 304 or an unchanged content hash just renews
+    the TTL. A season the source lacks is cached as empty (no content hash)
+    for the same TTL, so probing a future season costs no extra requests.
+    With ``fixture_dir`` set, schedules are read from
+    ``schedules_<season>.parquet`` or ``.csv`` files and the network is
+    never touched.
+    """
+
+    def __init__(self, cache_dir: str = "cache", fixture_dir: Optional[str] = None,
+                 url: str = SCHEDULES_URL):
+        self.cache_dir = Path(cache_dir)
+        self.fixture_dir = Path(fixture_dir) if fixture_dir else None
+        self.url = url
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self.logger = logging.getLogger('nfl_autonomous')
+        self.stats = {'hits': 0, 'revalidated': 0, 'downloads': 0, 'stale_served': 0}
+
+    def get_schedules(self, season: int, phase: str = 'historical') -> pd.DataFrame:
+        """Schedule frame for one season, fetched only when the cache is stale"""
+        if self.fixture_dir is not None:
+            return self._read_fixture(season)
+
+        manifest = self._load_manifest()
+        entry = manifest['seasons'].get(str(season))
+        season_file = self._season_file(season)
+
+        if entry and time.time() - entry['validated_at'] < PHASE_TTL.get(phase, 0):
+            if entry['content_hash'] is None:
+                self.stats['hits'] += 1
+                return empty_schedule()
+            if season_file.exists():
+                self.stats['hits'] += 1
+                return pd.read_parquet(season_file)
+
+        try:
+            self._revalidate(manifest)
+        except (urllib.error.URLError, OSError) as e:
+            if season_file.exists():
+                self.logger.warning(f"Schedule fetch failed, serving cached {season}: {e}")
+                self.stats['stale_served'] += 1
+                return pd.read_parquet(season_file)
+            raise
+
+        if not season_file.exists():
+            manifest['seasons'][str(season)] = {'content_hash': None, 'validated_at': time.time()}
+            self._save_manifest(manifest)
+            return empty_schedule()
+        return pd.read_parquet(season_file)
+
+    def invalidate(self, season: Optional[int] = None):
+        """Force a re-download for one season, or all seasons
+
+        Every season comes from one source file, so the file's validators and
+        hash are dropped too: the next fetch is an unconditional GET, and the
+        invalidated season is rewritten even if its content is unchanged.
+        """
+        manifest = self._load_manifest()
+        if season is None:
+            manifest['seasons'] = {}
+        else:
+            manifest['seasons'].pop(str(season), None)
+        for key in ('etag', 'last_modified', 'content_hash'):
+            manifest.pop(key, None)
+        self._save_manifest(manifest)
+
+    def _revalidate(self, manifest: Dict):
+        """Conditional GET of the schedule source, rewriting only changed seasons"""
+        request = urllib.request.Request(self.url)
+        if manifest.get('etag'):
+            request.add_header('If-None-Match', manifest['etag'])
+        if manifest.get('last_modified'):
+            request.add_header('If-Modified-Since', manifest['last_modified'])
+
+        now = time.time()
+        try:
+            with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                body = response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+            self.stats['revalidated'] += 1
+            self._touch_all(manifest, now)
+            return
+
+        content_hash = hashlib.sha256(body).hexdigest()
+        manifest['etag'] = headers.get('ETag')
+        manifest['last_modified'] = headers.get('Last-Modified')
+
+        if content_hash == manifest.get('content_hash'):
+            self.stats['revalidated'] += 1
+            self._touch_all(manifest, now)
+            return
+
+        self.stats['downloads'] += 1
+        schedules = pd.read_csv(io.BytesIO(body))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        written = 0
+        for season, frame in schedules.groupby('season'):
+            frame = frame.reset_index(drop=True)
+            season_hash = hashlib.sha256(
+                pd.util.hash_pandas_object(frame, index=False).values.tobytes()).hexdigest()
+
+            entry = manifest['seasons'].get(str(season))
+            if not entry or entry['content_hash'] != season_hash or not self._season_file(season).exists():
+                frame.to_parquet(self._season_file(season), index=False)
+                written += 1
+            manifest['seasons'][str(season)] = {'content_hash': season_hash, 'validated_at': now}
+
+        manifest['content_hash'] = content_hash
+        manifest['fetched_at'] = datetime.now().isoformat()
+        self._save_manifest(manifest)
+        self.logger.info(f"Schedule cache refreshed: {written} of {len(manifest['seasons'])} seasons changed")
+
+    def _touch_all(self, manifest: Dict, now: float):
+        """Renew the TTL of every cached season after a successful revalidation"""
+        for entry in manifest['seasons'].values():
+            entry['validated_at'] = now
+        self._save_manifest(manifest)
+
+    def _read_fixture(self, season: int) -> pd.DataFrame:
+        """Schedule frame from the offline fixture directory"""
+        parquet_file = self.fixture_dir / f"schedules_{season}.parquet"
+        csv_file = self.fixture_dir / f"schedules_{season}.csv"
+
+        if parquet_file.exists():
+            return pd.read_parquet(parquet_file)
+        if csv_file.exists():
+            return pd.read_csv(csv_file)
+        return empty_schedule()
+
+    def _season_file(self, season: int) -> Path:
+        return self.cache_dir / f"schedules_{season}.parquet"
+
+    def _load_manifest(self) -> Dict:
+        if not self.manifest_path.exists():
+            return {'seasons': {}}
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: Dict):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        tmp_path.replace(self.manifest_path)
@@ -0,0 +1,408 @@
+"""
+NFL Live Ingestion
+Streams in-game score and odds updates into the database as coalesced micro-batches
+"""
+
+import argparse
+import json
+import logging
+import selectors
+import socket
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database import Game, BettingLine, TeamPerformance, LINE_FIELDS
+from etl_pipeline_db import (
+    BULK_BATCH_SIZE, DatabaseETL, build_bulk_rows, _performance_rows
+)
+
+# Seconds of feed updates coalesced into one write transaction
+DEFAULT_BATCH_INTERVAL = 5.0
+
+# Seconds between checks of a followed file for appended lines
+FILE_POLL_INTERVAL = 0.05
+
+# games columns a feed update may change, with their Python types
+LIVE_GAME_COLUMNS = {'home_score': int, 'away_score': int, 'overtime': bool}
+
+# betting_lines columns a feed update may change (None takes a line off the board)
+LIVE_LINE_COLUMNS = {
+    field: float if field.endswith('_line') else int for field in LINE_FIELDS
+}
+
+# Stored game columns kept in memory to diff updates against
+STATE_COLUMNS = ('game_id', 'home_team', 'away_team', 'home_score', 'away_score', 'overtime')
+
+
+def _split_lines(buffer: bytes) -> Tuple[List[Dict], bytes]:
+    """Decode complete JSON lines from ``buffer``; returns (updates, unfinished tail)"""
+    *lines, rest = buffer.split(b'\n')
+    updates = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            update_ = json.loads(line)
+        except ValueError:
+            logging.getLogger('nfl_autonomous').warning(f"Live feed: skipping malformed line {line[:80]!r}")
+            continue
+        if isinstance(update_, dict) and update_.get('game_id'):
+            updates.append(update_)
+    return updates, rest
+
+
+def coalesce_updates(updates: List[Dict]) -> Dict[str, Dict]:
+    """Merge updates per game in arrival order; later values win and ``final`` sticks"""
+    merged = {}
+    for update_ in updates:
+        game = merged.setdefault(update_['game_id'], {})
+        final = game.get('final', False) or bool(update_.get('final'))
+        for column, cast in {**LIVE_GAME_COLUMNS, **LIVE_LINE_COLUMNS}.items():
+            if column in update_:
+                value = update_[column]
+                game[column] = None if value is None else cast(value)
+        game['final'] = final
+    return merged
+
+
+class FileFeed:
+    """Follows a JSON-lines file, returning updates appended since the last poll
+
+    A stand-in for a vendor push feed: any process can append one JSON
+    object per line. A truncated or replaced file is read from the start.
+    """
+
+    def __init__(self, path: str, from_start: bool = True):
+        self.path = Path(path)
+        self._position = 0 if from_start else None
+        self._buffer = b''
+
+    def poll(self, timeout: float) -> List[Dict]:
+        """Updates available now, waiting up to ``timeout`` seconds for the first"""
+        deadline = time.monotonic() + timeout
+        while True:
+            updates = self._read()
+            remaining = deadline - time.monotonic()
+            if updates or remaining <= 0:
+                return updates
+            time.sleep(min(FILE_POLL_INTERVAL, remaining))
+
+    def close(self):
+        pass
+
+    def _read(self) -> List[Dict]:
+        if not self.path.exists():
+            return []
+        size = self.path.stat().st_size
+        if self._position is None:
+            self._position = size
+        if size < self._position:
+            self._position, self._buffer = 0, b''
+        if size == self._position:
+            return []
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._position)
+            chunk = f.read()
+        self._position += len(chunk)
+        updates, self._buffer = _split_lines(self._buffer + chunk)
+        return updates
+
+
+class SocketFeed:
+    """TCP listener taking newline-delimited JSON updates from any number of senders"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.server = socket.create_server((host, port))
+        self.server.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.server, selectors.EVENT_READ)
+        self._buffers = {}
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """(host, port) the feed listens on"""
+        return self.server.getsockname()[:2]
+
+    def poll(self, timeout: float) -> List[Dict]:
+        """Updates available now, waiting up to ``timeout`` seconds for the first"""
+        deadline = time.monotonic() + timeout
+        updates = []
+        while not updates:
+            remaining = deadline - time.monotonic()
+            events = self.selector.select(max(0.0, remaining))
+            for key, _ in events:
+                if key.fileobj is self.server:
+                    connection, _ = self.server.accept()
+                    connection.setblocking(False)
+                    self.selector.register(connection, selectors.EVENT_READ)
+                    self._buffers[connection] = b''
+                else:
+                    updates.extend(self._receive(key.fileobj))
+            if remaining <= 0:
+                break
+        return updates
+
+    def close(self):
+        for connection in list(self._buffers):
+            self._drop(connection)
+        self.selector.unregister(self.server)
+        self.server.close()
+        self.selector.close()
+
+    def _receive(self, connection: socket.socket) -> List[Dict]:
+        try:
+            data = connection.recv(65536)
+        except ConnectionError:
+            data = b''
+        if not data:
+            # Sender closed; a final line without a newline still counts
+            updates, _ = _split_lines(self._buffers[connection] + b'\n')
+            self._drop(connection)
+            return updates
+        updates, self._buffers[connection] = _split_lines(self._buffers[connection] + data)
+        return updates
+
+    def _drop(self, connection: socket.socket):
+        self.selector.unregister(connection)
+        self._buffers.pop(connection, None)
+        connection.close()
+
+
+class LiveIngestor:
+    """Applies coalesced feed updates with changed-column upserts
+
+    Each micro-batch writes, in one transaction, only the games and
+    betting_lines columns whose values moved, the line_history entries for
+    moved lines, and both team_performances rows of every scored game it
+    touched. Rolling stats and summaries are rolled forward only for the
+    teams of games the feed marks final, so a full slate never rebuilds
+    the stats tables. Games not yet stored (scheduled after the last
+    pipeline run) are inserted from ``schedule``.
+    Live-written games get a NULL content hash, so the next pipeline run
+    re-upserts them from the official schedule source.
+    """
+
+    def __init__(self, db_path: str = "nfl_autonomous.db", schedule: Optional[pd.DataFrame] = None):
+        self.etl = DatabaseETL(db_path)
+        self.db_manager = self.etl.db_manager
+        self.schedule = schedule.set_index('game_id', drop=False) if schedule is not None else None
+        self.logger = logging.getLogger('nfl_autonomous')
+
+        # Last written values per game, so repeated feed values cost no SQL
+        self._state: Dict[str, Dict] = {}
+        self._finalized = set()
+        self._unknown = set()
+        self.stats = {'batches': 0, 'updates': 0, 'games': 0, 'lines': 0,
+                      'line_history': 0, 'team_performances': 0, 'finals': 0, 'unknown': 0}
+
+    def apply_batch(self, updates: List[Dict], observed_at: Optional[int] = None) -> Dict[str, int]:
+        """Write one micro-batch of raw feed updates and return per-table counts"""
+        batch = coalesce_updates(updates)
+        counts = {'games': 0, 'lines': 0, 'line_history': 0, 'team_performances': 0, 'finals': 0}
+        self.stats['batches'] += 1
+        self.stats['updates'] += len(updates)
+        if not batch:
+            return counts
+
+        with self.db_manager.get_session() as session:
+            try:
+                known = self._load_state(session, list(batch))
+                game_changes, line_changes, finals = self._diff(batch, known)
+
+                # Line-only changes still clear the game's content hash
+                self._write_games(session, {**{g: {} for g in line_changes}, **game_changes}, known)
+                counts['games'] = len(game_changes)
+                counts['lines'] = self._write_lines(session, line_changes, known)
+                if line_changes:
+                    counts['line_history'] = self.etl.record_line_history(
+                        session, [self._line_row(known[game_id]) for game_id in line_changes], observed_at)
+
+                scored = [game_id for game_id in {**game_changes, **line_changes}
+                          if known[game_id]['home_score'] is not None and known[game_id]['away_score'] is not None]
+                counts['team_performances'] = self._write_performances(session, [known[g] for g in scored])
+
+                if finals:
+                    # Incremental: only the two teams of each finished game are rolled forward
+                    self.etl.update_team_stats(session, finals)
+                    self.etl.update_summaries(session, finals)
+                    counts['finals'] = len(finals)
+
+                if any(counts.values()):
+                    self.etl.bump_data_version(session)
+                session.commit()
+            except Exception:
+                session.rollback()
+                # The cached state may now be ahead of the database
+                for game_id in batch:
+                    self._state.pop(game_id, None)
+                raise
+
+        self._state.update(known)
+        self._finalized.update(finals)
+        for name, count in counts.items():
+            self.stats[name] += count
+        return counts
+
+    def run(self, feed, interval: float = DEFAULT_BATCH_INTERVAL, max_batches: Optional[int] = None):
+        """Collect updates for ``interval`` seconds, write them, repeat"""
+        self.logger.info(f"Live ingestion started ({interval:g}s batches)")
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            deadline = time.monotonic() + interval
+            updates = []
+            while time.monotonic() < deadline:
+                updates.extend(feed.poll(deadline - time.monotonic()))
+            batches += 1
+            if not updates:
+                continue
+
+            start = time.perf_counter()
+            try:
+                counts = self.apply_batch(updates)
+            except Exception as e:
+                self.logger.error(f"Live batch failed ({len(updates)} updates): {e}")
+                continue
+            self.logger.info(f"Live batch: {len(updates)} updates -> {counts['games']} games, "
+                             f"{counts['lines']} lines, {counts['team_performances']} performances, "
+                             f"{counts['finals']} finals in {time.perf_counter() - start:.3f}s")
+
+    def _load_state(self, session: Session, game_ids: List[str]) -> Dict[str, Dict]:
+        """Current values for every game in the batch, inserting scheduled games not yet stored"""
+        known = {game_id: dict(self._state[game_id]) for game_id in game_ids if game_id in self._state}
+        missing = [game_id for game_id in game_ids if game_id not in known]
+
+        for start in range(0, len(missing), BULK_BATCH_SIZE):
+            chunk = missing[start:start + BULK_BATCH_SIZE]
+            rows = session.query(*(getattr(Game, c) for c in STATE_COLUMNS),
+                                 *(getattr(BettingLine, f) for f in LINE_FIELDS))\
+                .outerjoin(BettingLine, BettingLine.game_id == Game.game_id)\
+                .filter(Game.game_id.in_(chunk))\
+                .all()
+            for row in rows:
+                state = dict(zip(STATE_COLUMNS + LINE_FIELDS, row))
+                known[state['game_id']] = state
+
+        unstored = [game_id for game_id in missing if game_id not in known]
+        scheduled = [game_id for game_id in unstored
+                     if self.schedule is not None and game_id in self.schedule.index]
+        if scheduled:
+            # Identity, conditions and pre-game lines come from the schedule source
+            self.etl.write_bulk_rows(session, build_bulk_rows(self.schedule.loc[scheduled]))
+            known.update(self._load_state(session, scheduled))
+
+        for game_id in set(unstored) - set(scheduled) - self._unknown:
+            self.logger.warning(f"Live feed: {game_id} is neither stored nor scheduled; ignoring")
+            self._unknown.add(game_id)
+            self.stats['unknown'] += 1
+        return known
+
+    def _diff(self, batch: Dict[str, Dict], known: Dict[str, Dict]) -> Tuple[Dict, Dict, List[str]]:
+        """Changed game columns and line columns per game, and newly final games"""
+        game_changes, line_changes, finals = {}, {}, []
+        for game_id, values in batch.items():
+            state = known.get(game_id)
+            if state is None:
+                continue
+
+            changed = {c: v for c, v in values.items() if c in LIVE_GAME_COLUMNS and state[c] != v}
+            if changed:
+                game_changes[game_id] = changed
+            changed = {c: v for c, v in values.items() if c in LIVE_LINE_COLUMNS and state[c] != v}
+            if changed:
+                line_changes[game_id] = changed
+            state.update({c: v for c, v in values.items() if c != 'final'})
+
+            scored = state['home_score'] is not None and state['away_score'] is not None
+            if values['final'] and scored and (game_id not in self._finalized or game_id in game_changes):
+                finals.append(game_id)
+        return game_changes, line_changes, finals
+
+    def _write_games(self, session: Session, changes: Dict[str, Dict], known: Dict[str, Dict]):
+        """UPDATE only the changed columns, one executemany per distinct column set"""
+        table = Game.__table__
+        for columns, game_ids in self._group_by_columns(changes).items():
+            stmt = update(table)\
+                .where(table.c.game_id == bindparam('b_game_id'))\
+                .values({**{c: bindparam(f'b_{c}') for c in columns}, 'content_hash': None, 'updated_at': func.now()})
+            params = [{'b_game_id': g, **{f'b_{c}': known[g][c] for c in columns}} for g in game_ids]
+            for start in range(0, len(params), BULK_BATCH_SIZE):
+                session.execute(stmt, params[start:start + BULK_BATCH_SIZE])
+
+    def _write_lines(self, session: Session, changes: Dict[str, Dict], known: Dict[str, Dict]) -> int:
+        """Upsert betting_lines, updating only the changed columns of existing rows"""
+        table = BettingLine.__table__
+        for columns, game_ids in self._group_by_columns(changes).items():
+            stmt = sqlite_insert(table)
+            set_ = {c: stmt.excluded[c] for c in columns}
+            set_['updated_at'] = func.now()
+            stmt = stmt.on_conflict_do_update(index_elements=['game_id'], set_=set_)
+            rows = [self._line_row(known[g]) for g in game_ids]
+            for start in range(0, len(rows), BULK_BATCH_SIZE):
+                session.execute(stmt, rows[start:start + BULK_BATCH_SIZE])
+        return len(changes)
+
+    def _write_performances(self, session: Session, states: List[Dict]) -> int:
+        """Upsert both team_performances rows of each scored game"""
+        if not states:
+            return 0
+        keys = ('game_id', 'home_team', 'away_team', 'home_score', 'away_score') + LINE_FIELDS
+        columns = {key: np.array([state[key] for state in states], dtype=object) for key in keys}
+        rows = _performance_rows(columns)
+        return self.etl._bulk_upsert(session, TeamPerformance.__table__, rows, ['game_id', 'team'])
+
+    @staticmethod
+    def _group_by_columns(changes: Dict[str, Dict]) -> Dict[Tuple[str, ...], List[str]]:
+        groups = {}
+        for game_id, changed in changes.items():
+            groups.setdefault(tuple(sorted(changed)), []).append(game_id)
+        return groups
+
+    @staticmethod
+    def _line_row(state: Dict) -> Dict:
+        return {'game_id': state['game_id'], **{field: state[field] for field in LINE_FIELDS}}
+
+
+def main():
+    """Ingest a live feed until interrupted"""
+    parser = argparse.ArgumentParser(description="Stream live scores and odds into the database")
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--file', help="Follow a JSON-lines file of updates")
+    source.add_argument('--listen', metavar='HOST:PORT', help="Accept JSON-lines updates over TCP")
+    parser.add_argument('--interval', type=float, default=DEFAULT_BATCH_INTERVAL,
+                        help="Seconds of updates per write batch")
+    args = parser.parse_args()
+
+    from autonomous_pipeline import AutonomousNFLPipeline
+    pipeline = AutonomousNFLPipeline(db_path=args.db)
+    pipeline.live = True
+    schedule = pipeline.fetch_schedules(pipeline.get_current_nfl_context()['current_season'])
+
+    if args.file:
+        feed = FileFeed(args.file, from_start=False)
+    else:
+        host, _, port = args.listen.rpartition(':')
+        feed = SocketFeed(host or "127.0.0.1", int(port))
+        pipeline.logger.info(f"Listening for live updates on {feed.address[0]}:{feed.address[1]}")
+
+    ingestor = LiveIngestor(args.db, schedule)
+    try:
+        ingestor.run(feed, args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        feed.close()
+        print(f"Live ingestion: {ingestor.stats}")
+
+
+if __name__ == "__main__":
+    main()
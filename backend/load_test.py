@@ -0,0 +1,136 @@
+"""
+NFL API Load Test
+Drives api_server against a locally generated database and reports latency and throughput
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from api_server import NFLApiServer
+from benchmark import generate_schedules
+from etl_pipeline_db import DatabaseETL
+
+
+def build_database(db_path: str, num_seasons: int = 6) -> List[tuple]:
+    """Populate a database from synthetic seasons and return its (season, week) keys"""
+    schedules = generate_schedules(list(range(2020, 2020 + num_seasons)))
+    etl = DatabaseETL(db_path)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        with etl.db_manager.get_session() as session:
+            for data in schedules.values():
+                etl.bulk_load(data, session)
+            session.commit()
+            etl.update_team_stats(session)
+            etl.update_summaries(session)
+            etl.bump_data_version(session)
+            session.commit()
+
+    return sorted({(season, int(week)) for season, data in schedules.items() for week in data['week']})
+
+
+async def _client(host: str, port: int, targets: List[str], etags: Dict[str, str],
+                  revalidate: bool, deadline: float, latencies: List[float], statuses: Dict[int, int]):
+    """One keep-alive connection issuing requests until the deadline"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = random.choice(targets)
+            conditional = f"If-None-Match: {etags[target]}\r\n" if revalidate and target in etags else ""
+            request = f"GET {target} HTTP/1.1\r\nHost: {host}\r\n{conditional}\r\n"
+
+            start = time.perf_counter()
+            writer.write(request.encode('latin-1'))
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            await reader.readexactly(int(headers.get('content-length', 0)))
+            latencies.append(time.perf_counter() - start)
+
+            statuses[status] = statuses.get(status, 0) + 1
+            if 'etag' in headers:
+                etags[target] = headers['etag']
+    finally:
+        writer.close()
+
+
+async def run_load(host: str, port: int, targets: List[str], concurrency: int,
+                   duration: float, revalidate: bool, etags: Dict[str, str]) -> Dict:
+    """Run ``concurrency`` clients for ``duration`` seconds and summarize latency"""
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, targets, etags, revalidate, deadline, latencies, statuses)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    samples = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(samples, 50)) if len(samples) else None,
+        'p99_ms': float(np.percentile(samples, 99)) if len(samples) else None,
+        'statuses': statuses,
+    }
+
+
+def main():
+    """Generate a database, start the server and report p50/p99 and requests per second"""
+    parser = argparse.ArgumentParser(description="Load test the NFL API server")
+    parser.add_argument('--seasons', type=int, default=6, help="Synthetic seasons in the database")
+    parser.add_argument('--concurrency', type=int, default=32, help="Concurrent keep-alive clients")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per scenario")
+    parser.add_argument('--workers', type=int, default=8, help="Server threads for SQLite work")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'load_test.db')
+        weeks = build_database(db_path, args.seasons)
+        targets = [f"{endpoint}?season={season}&week={week}"
+                   for season, week in weeks
+                   for endpoint in ('/api/betting-data', '/api/games', '/api/odds')]
+
+        server = NFLApiServer(db_path, port=0, max_workers=args.workers)
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(server.start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        etags = {}
+        try:
+            for name, revalidate in (('full responses', False), ('SWR revalidation', True)):
+                result = asyncio.run(run_load(server.host, server.port, targets, args.concurrency,
+                                              args.duration, revalidate, etags))
+                print(f"\n{name}: {result['requests']} requests, {args.concurrency} clients")
+                print(f"  throughput: {result['rps']:.0f} req/s")
+                print(f"  p50:        {result['p50_ms']:.2f} ms")
+                print(f"  p99:        {result['p99_ms']:.2f} ms")
+                print(f"  statuses:   {result['statuses']}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            server.close()
+            server.queries.db_manager.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+NFL Schema Migrations
+Ordered in-place upgrades of existing databases: new tables, columns and indexes plus chunked backfills
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import bindparam, exists, func, inspect, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from database import (
+    get_database_manager, Base, Game, BettingLine, GameConditions, LineHistory, LINE_FIELDS,
+    TeamStatsSnapshot, SchemaVersion
+)
+from etl_pipeline_db import DatabaseETL
+
+# Rows written per backfill transaction; each chunk commits on its own so writers wait at most one chunk
+BACKFILL_CHUNK_SIZE = 2000
+
+# Stored fields under their raw schedule names, so backfilled hashes equal those of a fresh load
+SCHEDULE_COLUMNS = (
+    Game.game_id, Game.season, Game.week, Game.game_date.label('gameday'), Game.game_type,
+    Game.home_team, Game.away_team, Game.home_score, Game.away_score, Game.overtime,
+    Game.is_divisional.label('div_game'),
+    BettingLine.spread_line, BettingLine.home_spread_odds, BettingLine.away_spread_odds,
+    BettingLine.total_line, BettingLine.over_odds, BettingLine.under_odds,
+    BettingLine.home_moneyline, BettingLine.away_moneyline,
+    GameConditions.stadium_id, GameConditions.stadium_name.label('stadium'), GameConditions.roof,
+    GameConditions.surface, GameConditions.temperature.label('temp'),
+    GameConditions.wind_speed.label('wind'), GameConditions.referee,
+)
+
+ROLLING_10_COLUMNS = ('pts_for_avg_10', 'pts_against_avg_10', 'point_diff_avg_10')
+
+
+class Migration:
+    """One ordered schema step
+
+    ``tables`` are created when missing, ``columns`` (table -> column names)
+    are added with ALTER TABLE from their model definitions and ``indexes``
+    are created when missing or dropped and recreated when their stored
+    definition differs from the model. ``backfill(migrator, chunk_size)`` then fills
+    derived values, yielding the rows written by each committed chunk, and
+    ``pending(migrator)`` counts the rows it would write. Every part skips
+    what is already in place, so an interrupted step simply runs again.
+    """
+
+    def __init__(self, version: int, name: str, tables: Tuple[str, ...] = (),
+                 columns: Optional[Dict[str, Tuple[str, ...]]] = None, indexes: Tuple[str, ...] = (),
+                 backfill: Optional[Callable] = None, pending: Optional[Callable] = None):
+        self.version = version
+        self.name = name
+        self.tables = tables
+        self.columns = columns or {}
+        self.indexes = indexes
+        self.backfill = backfill
+        self.pending = pending
+
+
+# ==================== BACKFILLS ====================
+
+def _null_count(migrator: 'SchemaMigrator', table: str, column: str) -> int:
+    """Rows of ``table`` whose ``column`` is NULL (all rows before the column exists)"""
+    model = Base.metadata.tables[table]
+    query = select(func.count()).select_from(model)
+    if column in migrator.columns(table):
+        query = query.where(model.c[column].is_(None))
+    with migrator.db_manager.get_read_session() as session:
+        return session.execute(query).scalar()
+
+
+def _backfill_content_hashes(migrator: 'SchemaMigrator', chunk_size: int) -> Iterator[int]:
+    """Hash the stored fields of games loaded before change detection
+
+    Conditions of games without a stadium are not stored, so those games
+    hash differently from the source and are re-upserted once by the next run.
+    """
+    games = Game.__table__
+    stmt = update(games).where(games.c.game_id == bindparam('b_game_id'))\
+        .values(content_hash=bindparam('b_hash'), updated_at=games.c.updated_at)
+
+    last_id = ''
+    while True:
+        with migrator.db_manager.get_session() as session:
+            result = session.execute(
+                select(*SCHEDULE_COLUMNS)
+                .outerjoin(BettingLine, BettingLine.game_id == Game.game_id)
+                .outerjoin(GameConditions, GameConditions.game_id == Game.game_id)
+                .where(Game.content_hash.is_(None), Game.game_id > last_id)
+                .order_by(Game.game_id)
+                .limit(chunk_size))
+            raw_df = pd.DataFrame(result.all(), columns=list(result.keys()))
+            if raw_df.empty:
+                return
+
+            hashes = migrator.etl.content_hashes(raw_df)
+            session.execute(stmt, [{'b_game_id': game_id, 'b_hash': content_hash}
+                                   for game_id, content_hash in zip(raw_df['game_id'], hashes)])
+            session.commit()
+
+        last_id = raw_df['game_id'].iloc[-1]
+        yield len(raw_df)
+
+
+def _backfill_rolling_10(migrator: 'SchemaMigrator', chunk_size: int) -> Iterator[int]:
+    """Fill the 10-game windows of snapshots computed before they existed"""
+    snapshots = TeamStatsSnapshot.__table__
+    with migrator.db_manager.get_session() as session:
+        missing = pd.DataFrame(
+            session.execute(select(snapshots.c.team, snapshots.c.season, snapshots.c.week)
+                            .where(snapshots.c.pts_for_avg_10.is_(None))).all(),
+            columns=['team', 'season', 'week'])
+        if missing.empty:
+            return
+        stats = migrator.etl.compute_team_stats_frame(migrator.etl.load_performance_frame(session))
+
+    rows = missing.merge(stats[['team', 'season', 'week', *ROLLING_10_COLUMNS]], on=['team', 'season', 'week'])
+    rows = rows.rename(columns=lambda name: f'b_{name}').to_dict('records')
+    stmt = update(snapshots)\
+        .where(snapshots.c.team == bindparam('b_team'), snapshots.c.season == bindparam('b_season'),
+               snapshots.c.week == bindparam('b_week'))\
+        .values({name: bindparam(f'b_{name}') for name in ROLLING_10_COLUMNS})
+
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        with migrator.db_manager.get_session() as session:
+            session.execute(stmt, chunk)
+            session.commit()
+        yield len(chunk)
+
+
+def _unseeded_line_values(migrator: 'SchemaMigrator') -> int:
+    """Line values of games without any line history (one history row each)"""
+    query = select(*[func.count(getattr(BettingLine, field)) for field in LINE_FIELDS])
+    if LineHistory.__tablename__ in migrator.tables():
+        query = query.where(~exists().where(LineHistory.game_id == BettingLine.game_id))
+    with migrator.db_manager.get_read_session() as session:
+        return sum(session.execute(query).one())
+
+
+def _seed_line_history(migrator: 'SchemaMigrator', chunk_size: int) -> Iterator[int]:
+    """Record each stored line as its game's first observation, stamped with the line's last update"""
+    stmt = sqlite_insert(LineHistory.__table__).on_conflict_do_nothing()
+    fields = [getattr(BettingLine, field) for field in LINE_FIELDS]
+
+    last_id = ''
+    while True:
+        with migrator.db_manager.get_session() as session:
+            lines = session.execute(
+                select(BettingLine.game_id, BettingLine.updated_at, *fields)
+                .where(~exists().where(LineHistory.game_id == BettingLine.game_id),
+                       BettingLine.game_id > last_id)
+                .order_by(BettingLine.game_id)
+                .limit(chunk_size)).all()
+            if not lines:
+                return
+
+            rows = []
+            for line in lines:
+                updated_at = line.updated_at.replace(tzinfo=timezone.utc) if line.updated_at \
+                    else datetime.now(timezone.utc)
+                observed_at = int(updated_at.timestamp())
+                for code, field in enumerate(LINE_FIELDS):
+                    value = getattr(line, field)
+                    if value is not None:
+                        rows.append({'game_id': line.game_id, 'observed_at': observed_at,
+                                     'field': code, 'value': float(value)})
+            if rows:
+                session.execute(stmt, rows)
+            session.commit()
+
+        last_id = lines[-1].game_id
+        yield len(rows)
+
+
+# ==================== MIGRATIONS ====================
+
+# Every schema change since the original tables, oldest first; versions are never renumbered
+MIGRATIONS = [
+    Migration(1, "10-game rolling windows on team stat snapshots",
+              columns={'team_stats_snapshot': ROLLING_10_COLUMNS},
+              backfill=_backfill_rolling_10,
+              pending=lambda m: _null_count(m, 'team_stats_snapshot', 'pts_for_avg_10')),
+    Migration(2, "Content hashes for change detection",
+              columns={'games': ('content_hash',)},
+              backfill=_backfill_content_hashes,
+              pending=lambda m: _null_count(m, 'games', 'content_hash')),
+    Migration(3, "Materialized team-season and league O/U summaries",
+              tables=('team_season_summaries', 'league_ou_trends')),
+    Migration(4, "Data version counter", tables=('data_version',)),
+    Migration(5, "Append-only line history seeded from current lines",
+              tables=('line_history',),
+              backfill=_seed_line_history,
+              pending=_unseeded_line_values),
+    Migration(6, "Versioned model predictions", tables=('predictions',)),
+    Migration(7, "Team stats week ranking index", indexes=('idx_stats_week_rank',)),
+    Migration(8, "Predictions version counter", columns={'data_version': ('predictions_version',)}),
+    Migration(9, "Team tie-break on the week ranking index", indexes=('idx_stats_week_rank',)),
+]
+
+
+class SchemaMigrator:
+    """Brings a database up to the current models one recorded step at a time
+
+    Applied steps are recorded in schema_version. Tables and columns are
+    added in place (SQLite's ADD COLUMN does not rewrite the table) and
+    backfills commit every ``chunk_size`` rows, so WAL readers keep working
+    throughout and pipeline writes wait at most one chunk. A database
+    without a games table is new: it gets the current schema and every
+    step is recorded as applied.
+    """
+
+    def __init__(self, db_manager, chunk_size: int = BACKFILL_CHUNK_SIZE,
+                 migrations: Optional[List[Migration]] = None):
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+        self.migrations = migrations or MIGRATIONS
+        self._etl = None
+
+    @property
+    def etl(self) -> DatabaseETL:
+        """ETL helpers for backfills, created on first use (its constructor creates tables)"""
+        if self._etl is None:
+            self._etl = DatabaseETL(self.db_manager.db_path)
+        return self._etl
+
+    def tables(self) -> set:
+        """Names of the tables the database has now"""
+        return set(inspect(self.db_manager.engine).get_table_names())
+
+    def columns(self, table: str) -> set:
+        """Names of the columns ``table`` has now"""
+        return {column['name'] for column in inspect(self.db_manager.engine).get_columns(table)}
+
+    def index_sql(self, name: str) -> Optional[str]:
+        """CREATE INDEX statement SQLite stored for index ``name``, or None if it does not exist"""
+        with self.db_manager.engine.connect() as conn:
+            return conn.exec_driver_sql(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)).scalar()
+
+    def applied(self) -> Dict[int, SchemaVersion]:
+        """Recorded steps by version"""
+        if SchemaVersion.__tablename__ not in self.tables():
+            return {}
+        with self.db_manager.get_read_session() as session:
+            return {row.version: row for row in session.query(SchemaVersion)}
+
+    def pending(self) -> List[Migration]:
+        """Steps not yet recorded, in version order"""
+        applied = self.applied()
+        return sorted((m for m in self.migrations if m.version not in applied), key=lambda m: m.version)
+
+    def statements(self, migration: Migration) -> List[str]:
+        """DDL the step still needs against the database as it stands"""
+        dialect = self.db_manager.engine.dialect
+        tables = self.tables()
+        statements = []
+
+        for name in migration.tables:
+            if name not in tables:
+                table = Base.metadata.tables[name]
+                statements.append(str(CreateTable(table).compile(dialect=dialect)).strip())
+                statements += [str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes]
+
+        for name, column_names in migration.columns.items():
+            if name not in tables:
+                # Created with every column by an earlier step of the same upgrade
+                continue
+            present = self.columns(name)
+            for column_name in column_names:
+                if column_name not in present:
+                    column = Base.metadata.tables[name].c[column_name]
+                    statements.append(
+                        f"ALTER TABLE {name} ADD COLUMN {column_name} {column.type.compile(dialect=dialect)}")
+
+        indexes = {index.name: index for table in Base.metadata.sorted_tables for index in table.indexes}
+        for name in migration.indexes:
+            index = indexes[name]
+            if index.table.name not in tables:
+                continue
+            create = str(CreateIndex(index).compile(dialect=dialect))
+            stored = self.index_sql(name)
+            if stored is None:
+                statements.append(create)
+            elif stored.split() != create.split():
+                # Reflection does not report sort order, so compare the stored DDL
+                statements += [f"DROP INDEX {name}", create]
+
+        return statements
+
+    def plan(self) -> List[Dict]:
+        """What upgrade() would do, without writing anything"""
+        if Game.__tablename__ not in self.tables():
+            return [{'version': max(m.version for m in self.migrations), 'name': "Create current schema",
+                     'statements': [f"CREATE TABLE {table.name}" for table in Base.metadata.sorted_tables],
+                     'backfill_rows': 0}]
+
+        return [{
+            'version': migration.version,
+            'name': migration.name,
+            'statements': self.statements(migration),
+            'backfill_rows': migration.pending(self) if migration.pending else 0,
+        } for migration in self.pending()]
+
+    def upgrade(self, dry_run: bool = False) -> List[Dict]:
+        """Apply pending steps in order; the applied (or, with ``dry_run``, planned) steps"""
+        if dry_run:
+            return self.plan()
+
+        if Game.__tablename__ not in self.tables():
+            # New database: the models already are the latest schema
+            self.db_manager.create_tables()
+            self._record([(migration, 0, 0.0) for migration in self.migrations])
+            return []
+
+        SchemaVersion.__table__.create(bind=self.db_manager.engine, checkfirst=True)
+        results = []
+        for migration in self.pending():
+            start = time.perf_counter()
+            statements = self.statements(migration)
+            self._execute(statements)
+
+            rows = sum(migration.backfill(self, self.chunk_size)) if migration.backfill else 0
+            seconds = time.perf_counter() - start
+            self._record([(migration, rows, seconds)])
+            results.append({'version': migration.version, 'name': migration.name,
+                            'statements': statements, 'backfill_rows': rows, 'seconds': seconds})
+
+        if results:
+            # New columns and backfilled rows change what cached queries would return
+            with self.db_manager.get_session() as session:
+                self.etl.bump_data_version(session)
+                session.commit()
+        return results
+
+    def _execute(self, statements: List[str]):
+        """Run one step's DDL in a single transaction"""
+        with self.db_manager.engine.begin() as conn:
+            for statement in statements:
+                try:
+                    conn.exec_driver_sql(statement)
+                except OperationalError as e:
+                    # Another process applied the same change first
+                    if 'duplicate column' not in str(e) and 'already exists' not in str(e):
+                        raise
+
+    def _record(self, steps: List[Tuple[Migration, int, float]]):
+        with self.db_manager.get_session() as session:
+            for migration, rows, seconds in steps:
+                session.merge(SchemaVersion(version=migration.version, name=migration.name,
+                                            backfilled_rows=rows, seconds=seconds))
+            session.commit()
+
+
+def main():
+    """Upgrade a database in place; --dry-run prints the plan without writing"""
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations")
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Print pending steps, their SQL and backfill row counts without writing")
+    parser.add_argument('--status', action='store_true', help="List applied and pending steps")
+    parser.add_argument('--chunk-size', type=int, default=BACKFILL_CHUNK_SIZE,
+                        help="Rows per backfill transaction")
+    args = parser.parse_args()
+
+    migrator = SchemaMigrator(get_database_manager(args.db), args.chunk_size)
+
+    if args.status:
+        applied = migrator.applied()
+        for migration in migrator.migrations:
+            row = applied.get(migration.version)
+            state = f"applied {row.applied_at:%Y-%m-%d %H:%M}" if row else "pending"
+            print(f"{migration.version:>3}  {state:<26}{migration.name}")
+        return
+
+    steps = migrator.upgrade(dry_run=args.dry_run)
+    for step in steps:
+        print(f"v{step['version']}: {step['name']}")
+        for statement in step['statements']:
+            print(f"    {statement}")
+        if step['backfill_rows']:
+            print(f"    backfill: {step['backfill_rows']} rows")
+        if 'seconds' in step:
+            print(f"    done in {step['seconds']:.2f}s")
+
+    if not steps:
+        print("Schema is current")
+    elif args.dry_run:
+        print(f"{len(steps)} pending step(s); nothing written")
+
+
+if __name__ == "__main__":
+    main()
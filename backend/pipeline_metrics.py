@@ -0,0 +1,177 @@
+"""
+NFL Pipeline Metrics
+Per-stage timings, row counts, SQL statistics and optional cProfile capture for pipeline runs
+"""
+
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is reported as None there
+    resource = None
+
+UNSTAGED = '(unstaged)'
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class PipelineMetrics:
+    """Collects stage timings and SQL statistics for one pipeline run at a time
+
+    Stages nest; a stage's seconds include its children, while SQL
+    statements are charged to the innermost open stage only. Repeated
+    stages (one fetch per season) accumulate under one name. Each run is
+    appended as a JSON line to ``pipeline_metrics_YYYYMM.jsonl`` in the
+    log directory.
+    """
+
+    def __init__(self, engines: List, log_dir: Path):
+        self.engines = engines
+        self.log_dir = Path(log_dir)
+        self.stages = {}
+        self.profiler = None
+        self.profile_path = None
+
+        self._stack = []
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._start = None
+        # Bound once so the same objects can be passed to event.remove
+        self._before_execute = self._on_before_execute
+        self._after_execute = self._on_after_execute
+
+    def start(self, profile: bool = False):
+        """Reset counters, hook SQL events and optionally start cProfile"""
+        self.stages = {}
+        self._stack = []
+        self._started_at = datetime.now()
+        self._start = time.perf_counter()
+
+        for engine in self.engines:
+            event.listen(engine, 'before_cursor_execute', self._before_execute)
+            event.listen(engine, 'after_cursor_execute', self._after_execute)
+
+        self.profiler = cProfile.Profile() if profile else None
+        self.profile_path = None
+        if self.profiler:
+            self.profiler.enable()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as ``name``; SQL issued inside it is charged to this stage"""
+        record = self._record(name)
+        self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] += time.perf_counter() - start
+            record['calls'] += 1
+            self._stack.pop()
+
+    def add_rows(self, rows: int, name: Optional[str] = None):
+        """Add to the row count of ``name`` (default: the innermost open stage)"""
+        self._record(name or (self._stack[-1] if self._stack else UNSTAGED))['rows'] += int(rows)
+
+    def finish(self, **summary) -> Dict:
+        """Unhook SQL events, stop profiling and append the run record"""
+        for engine in self.engines:
+            if event.contains(engine, 'before_cursor_execute', self._before_execute):
+                event.remove(engine, 'before_cursor_execute', self._before_execute)
+                event.remove(engine, 'after_cursor_execute', self._after_execute)
+
+        if self.profiler:
+            self.profiler.disable()
+            profile_dir = self.log_dir / "profiles"
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            self.profile_path = profile_dir / f"pipeline_{self._started_at.strftime('%Y%m%d_%H%M%S')}.prof"
+            self.profiler.dump_stats(str(self.profile_path))
+
+        stages = [
+            {**record, 'seconds': round(record['seconds'], 4), 'sql_seconds': round(record['sql_seconds'], 4)}
+            for record in self.stages.values()
+        ]
+        record = {
+            'started_at': self._started_at.isoformat(timespec='seconds'),
+            'duration': round(time.perf_counter() - self._start, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'sql_statements': sum(stage['sql_statements'] for stage in stages),
+            'sql_seconds': round(sum(stage['sql_seconds'] for stage in stages), 4),
+            'stages': stages,
+            'profile': str(self.profile_path) if self.profile_path else None,
+            **summary,
+        }
+
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        metrics_file = self.log_dir / f"pipeline_metrics_{self._started_at.strftime('%Y%m')}.jsonl"
+        with open(metrics_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, default=str) + "\n")
+        return record
+
+    def hot_spots(self, limit: int = 20) -> List[Dict]:
+        """Functions ranked by time spent in their own code (requires a profiled run)"""
+        if not self.profiler:
+            return []
+        stats = pstats.Stats(self.profiler).stats
+        ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        return [{
+            'function': f"{Path(filename).name}:{line}({name})" if line else name,
+            'calls': calls,
+            'own_seconds': own,
+            'cumulative_seconds': cumulative,
+        } for (filename, line, name), (_, calls, own, cumulative, _) in ranked]
+
+    def report(self, limit: int = 20) -> str:
+        """Stage table plus, for profiled runs, the ranked hot-spot table"""
+        lines = [f"{'stage':<28}{'calls':>7}{'seconds':>10}{'rows':>9}{'sql':>8}{'sql s':>9}"]
+        for record in self.stages.values():
+            lines.append(f"{record['name']:<28}{record['calls']:>7}{record['seconds']:>10.3f}"
+                         f"{record['rows']:>9}{record['sql_statements']:>8}{record['sql_seconds']:>9.3f}")
+
+        spots = self.hot_spots(limit)
+        if spots:
+            lines += ["", f"{'#':>3}  {'own s':>8}{'cum s':>9}{'calls':>9}  function"]
+            for rank, spot in enumerate(spots, 1):
+                lines.append(f"{rank:>3}  {spot['own_seconds']:>8.3f}{spot['cumulative_seconds']:>9.3f}"
+                             f"{spot['calls']:>9}  {spot['function']}")
+            lines.append(f"\nFull profile: {self.profile_path}")
+        return "\n".join(lines)
+
+    def _record(self, name: str) -> Dict:
+        if name not in self.stages:
+            self.stages[name] = {'name': name, 'calls': 0, 'seconds': 0.0, 'rows': 0,
+                                 'sql_statements': 0, 'sql_seconds': 0.0}
+        return self.stages[name]
+
+    def _on_before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _on_after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_query_start')
+        if not starts:
+            # Statement began before the listeners were attached
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        with self._lock:
+            record = self._record(self._stack[-1] if self._stack else UNSTAGED)
+            record['sql_statements'] += 1
+            record['sql_seconds'] += elapsed
@@ -0,0 +1,333 @@
+"""
+NFL Prediction Service
+Versioned NumPy win/margin/total models scored in batches and stored per game
+"""
+
+import argparse
+import json
+import logging
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.sql import func
+
+from database import get_database_manager, Prediction
+from etl_pipeline_db import DatabaseETL, BULK_BATCH_SIZE
+from feature_store import FeatureStore, FeatureSet
+
+# Model inputs: team form as of the previous week plus the betting line
+FEATURES = (
+    'diff_point_diff_avg_3', 'diff_point_diff_avg_5', 'diff_point_diff_avg_10',
+    'diff_win_pct_5', 'diff_ats_pct_5',
+    'home_pts_for_avg_5', 'home_pts_against_avg_5', 'away_pts_for_avg_5', 'away_pts_against_avg_5',
+    'spread_line', 'total_line', 'home_implied_prob',
+)
+
+# Feature groups the inputs come from
+PREDICTION_FEATURES = FeatureSet('predictions', groups=('team_form', 'lines'))
+
+# L2 penalties on the standardized coefficients (intercepts are not penalized)
+LOGISTIC_L2 = 1.0
+RIDGE_ALPHA = 10.0
+
+# Newton steps for the logistic fit and the coefficient change that ends it early
+LOGISTIC_MAX_ITER = 25
+LOGISTIC_TOLERANCE = 1e-8
+
+# Fewer completed games than this is not enough to train on
+MIN_TRAINING_GAMES = 100
+
+# Logistic approximation of the standard normal CDF (max error ~0.01)
+NORMAL_CDF_SCALE = 1.702
+
+ARTIFACT_PATTERN = re.compile(r'^model_v(\d+)\.npz$')
+
+
+def _normal_cdf(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-NORMAL_CDF_SCALE * z))
+
+
+def _design(frame: pd.DataFrame, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Standardized features with a leading intercept column; missing values become the mean"""
+    x = (frame[list(FEATURES)].to_numpy(dtype=float) - mean) / scale
+    x = np.nan_to_num(x, nan=0.0)
+    return np.hstack([np.ones((len(x), 1)), x])
+
+
+def _fit_ridge(x: np.ndarray, y: np.ndarray, alpha: float) -> np.ndarray:
+    penalty = alpha * np.eye(x.shape[1])
+    penalty[0, 0] = 0.0
+    return np.linalg.solve(x.T @ x + penalty, x.T @ y)
+
+
+def _fit_logistic(x: np.ndarray, y: np.ndarray, l2: float) -> np.ndarray:
+    """L2-regularized logistic regression by Newton's method"""
+    penalty = l2 * np.eye(x.shape[1])
+    penalty[0, 0] = 0.0
+    coef = np.zeros(x.shape[1])
+    for _ in range(LOGISTIC_MAX_ITER):
+        p = 1.0 / (1.0 + np.exp(-(x @ coef)))
+        gradient = x.T @ (p - y) + penalty @ coef
+        hessian = (x * (p * (1 - p))[:, None]).T @ x + penalty
+        step = np.linalg.solve(hessian, gradient)
+        coef -= step
+        if np.abs(step).max() < LOGISTIC_TOLERANCE:
+            break
+    return coef
+
+
+class GameModel:
+    """Logistic home-win model plus ridge margin and total models on shared inputs
+
+    Cover and over probabilities come from the predicted margin/total and the
+    residual spread of each ridge model, assuming normal errors.
+    """
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, win_coef: np.ndarray,
+                 margin_coef: np.ndarray, total_coef: np.ndarray,
+                 margin_sigma: float, total_sigma: float, metadata: Optional[Dict] = None):
+        self.mean = mean
+        self.scale = scale
+        self.win_coef = win_coef
+        self.margin_coef = margin_coef
+        self.total_coef = total_coef
+        self.margin_sigma = margin_sigma
+        self.total_sigma = total_sigma
+        self.metadata = metadata or {}
+        self.version = None
+
+    @classmethod
+    def fit(cls, games: pd.DataFrame) -> 'GameModel':
+        """Fit on completed games of a feature matrix (needs margin, total and home_win)"""
+        mean = np.nanmean(games[list(FEATURES)].to_numpy(dtype=float), axis=0)
+        scale = np.nanstd(games[list(FEATURES)].to_numpy(dtype=float), axis=0)
+        mean, scale = np.nan_to_num(mean), np.where(np.nan_to_num(scale) > 0, np.nan_to_num(scale), 1.0)
+
+        x = _design(games, mean, scale)
+        margin_coef = _fit_ridge(x, games['margin'].to_numpy(dtype=float), RIDGE_ALPHA)
+        total_coef = _fit_ridge(x, games['total'].to_numpy(dtype=float), RIDGE_ALPHA)
+        win_coef = _fit_logistic(x, games['home_win'].to_numpy(dtype=float), LOGISTIC_L2)
+
+        margin_sigma = float(np.std(games['margin'].to_numpy(dtype=float) - x @ margin_coef))
+        total_sigma = float(np.std(games['total'].to_numpy(dtype=float) - x @ total_coef))
+        return cls(mean, scale, win_coef, margin_coef, total_coef, margin_sigma, total_sigma)
+
+    def predict(self, games: pd.DataFrame) -> pd.DataFrame:
+        """Predictions for every row of a feature matrix in one batch"""
+        x = _design(games, self.mean, self.scale)
+        margin = x @ self.margin_coef
+        total = x @ self.total_coef
+        spread = games['spread_line'].to_numpy(dtype=float)
+        total_line = games['total_line'].to_numpy(dtype=float)
+        return pd.DataFrame({
+            'home_win_prob': 1.0 / (1.0 + np.exp(-(x @ self.win_coef))),
+            'predicted_margin': margin,
+            'predicted_total': total,
+            'home_cover_prob': _normal_cdf((margin - spread) / self.margin_sigma),
+            'over_prob': _normal_cdf((total - total_line) / self.total_sigma),
+        }, index=games.index)
+
+    def evaluate(self, games: pd.DataFrame) -> Dict:
+        """Accuracy, log loss and absolute errors on completed games"""
+        predicted = self.predict(games)
+        p = predicted['home_win_prob'].clip(1e-6, 1 - 1e-6)
+        won = games['home_win'].astype(float)
+        return {
+            'games': len(games),
+            'accuracy': round(float(((p > 0.5) == (won > 0.5)).mean()), 4),
+            'log_loss': round(float(-(won * np.log(p) + (1 - won) * np.log(1 - p)).mean()), 4),
+            'margin_mae': round(float((predicted['predicted_margin'] - games['margin']).abs().mean()), 3),
+            'total_mae': round(float((predicted['predicted_total'] - games['total']).abs().mean()), 3),
+        }
+
+    def save(self, path: Path):
+        """Write the coefficients and metadata as one .npz (no pickled objects)"""
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(f, features=np.array(FEATURES), mean=self.mean, scale=self.scale,
+                     win_coef=self.win_coef, margin_coef=self.margin_coef, total_coef=self.total_coef,
+                     sigmas=np.array([self.margin_sigma, self.total_sigma]),
+                     metadata=np.array(json.dumps(self.metadata)))
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'GameModel':
+        with np.load(path, allow_pickle=False) as artifact:
+            if tuple(artifact['features']) != FEATURES:
+                raise ValueError(f"{path.name} was trained on different features")
+            model = cls(artifact['mean'], artifact['scale'], artifact['win_coef'],
+                        artifact['margin_coef'], artifact['total_coef'],
+                        float(artifact['sigmas'][0]), float(artifact['sigmas'][1]),
+                        json.loads(str(artifact['metadata'])))
+        return model
+
+
+class ModelStore:
+    """Numbered model artifacts (``model_v<N>.npz``); the highest number is current"""
+
+    def __init__(self, model_dir: str = "models"):
+        self.model_dir = Path(model_dir)
+
+    def versions(self) -> List[int]:
+        if not self.model_dir.exists():
+            return []
+        return sorted(int(match.group(1)) for match in
+                      (ARTIFACT_PATTERN.match(path.name) for path in self.model_dir.iterdir()) if match)
+
+    def latest_version(self) -> Optional[int]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def save(self, model: GameModel) -> int:
+        """Store ``model`` as the next version and return that version"""
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+        model.version = (self.latest_version() or 0) + 1
+        model.save(self.model_dir / f"model_v{model.version}.npz")
+        return model.version
+
+    def load(self, version: Optional[int] = None) -> Optional[GameModel]:
+        """A stored model (default: the latest), or None if there is none"""
+        version = version or self.latest_version()
+        if version is None:
+            return None
+        model = GameModel.load(self.model_dir / f"model_v{version}.npz")
+        model.version = version
+        return model
+
+
+class PredictionService:
+    """Trains models and keeps the predictions table current for the latest one
+
+    ``score_changed`` rebuilds the feature matrix, hashes each game's model
+    inputs and scores only games whose hash differs from the stored
+    prediction for the current model version, all in one batch. Scheduled
+    games are stored by the pipeline with NULL scores, so the upcoming slate
+    is scored from the last completed week's stats and its posted lines.
+    Rows carry the data version their inputs were read at. A write bumps
+    the predictions version only, so the feature store, query cache and
+    analytics index (keyed on the data version) stay warm; readers never
+    run the model themselves.
+    """
+
+    def __init__(self, db_path: str = "nfl_autonomous.db", model_dir: str = "models",
+                 feature_cache_dir: str = "cache/features"):
+        self.db_manager = get_database_manager(db_path)
+        self.etl = DatabaseETL(db_path)
+        self.features = FeatureStore(db_path, feature_cache_dir)
+        self.models = ModelStore(model_dir)
+        self.logger = logging.getLogger('nfl_autonomous')
+
+        self._model: Optional[GameModel] = None
+        # (model version, data version) of the last scoring pass that left nothing to do
+        self._scored: Optional[Tuple[int, int]] = None
+
+    def train(self, seasons: Optional[List[int]] = None) -> GameModel:
+        """Fit on completed games, record hold-out metrics and store a new version
+
+        When more than one season is available, the latest one is held out
+        for the recorded metrics before the final fit on every season.
+        """
+        games = self.features.build(PREDICTION_FEATURES, seasons)
+        games = games[games['margin'].notna()]
+        if len(games) < MIN_TRAINING_GAMES:
+            raise ValueError(f"Only {len(games)} completed games to train on (need {MIN_TRAINING_GAMES})")
+
+        holdout_season = int(games['season'].max())
+        history = games[games['season'] < holdout_season]
+        holdout = None
+        if len(history) >= MIN_TRAINING_GAMES:
+            holdout = GameModel.fit(history).evaluate(games[games['season'] == holdout_season])
+            holdout['season'] = holdout_season
+
+        model = GameModel.fit(games)
+        model.metadata = {
+            'trained_at': datetime.now().isoformat(timespec='seconds'),
+            'data_version': self.features.data_version(),
+            'seasons': sorted(int(season) for season in games['season'].unique()),
+            'feature_set': PREDICTION_FEATURES.definition_hash(),
+            'training': model.evaluate(games),
+            'holdout': holdout,
+        }
+        self.models.save(model)
+        self._model = model
+        self.logger.info(f"Trained model v{model.version} on {len(games)} games")
+        return model
+
+    def current_model(self) -> Optional[GameModel]:
+        """The latest stored model, reloaded when a newer version appears"""
+        version = self.models.latest_version()
+        if version is not None and (self._model is None or self._model.version != version):
+            self._model = self.models.load(version)
+        return self._model if version is not None else None
+
+    def score_changed(self) -> int:
+        """Score games whose inputs changed since they were last scored; returns games written"""
+        model = self.current_model()
+        if model is None:
+            return 0
+        data_version = self.features.data_version()
+        if self._scored == (model.version, data_version):
+            return 0
+
+        games = self.features.build(PREDICTION_FEATURES).set_index('game_id')
+        hashes = pd.util.hash_pandas_object(games[list(FEATURES)], index=False)\
+            .map(lambda value: f"{value:016x}")
+
+        with self.db_manager.get_session() as session:
+            stored = dict(session.query(Prediction.game_id, Prediction.input_hash)
+                          .filter(Prediction.model_version == model.version).all())
+            changed = hashes[hashes != hashes.index.map(stored)]
+            if len(changed) == 0:
+                self._scored = (model.version, data_version)
+                return 0
+
+            predicted = model.predict(games.loc[changed.index])
+            predicted = predicted.astype(object).where(predicted.notna(), None)
+            rows = [{
+                'game_id': game_id, 'model_version': model.version, 'input_hash': input_hash,
+                'data_version': data_version, **values,
+            } for (game_id, input_hash), values in zip(changed.items(), predicted.to_dict('records'))]
+            self._upsert(session, rows)
+            self.etl.bump_predictions_version(session)
+            session.commit()
+
+        self._scored = (model.version, data_version)
+        self.logger.info(f"Predictions: scored {len(rows)} games with model v{model.version}")
+        return len(rows)
+
+    def _upsert(self, session, rows: List[Dict]):
+        stmt = sqlite_insert(Prediction.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['game_id', 'model_version'],
+            set_={**{name: stmt.excluded[name] for name in rows[0]
+                     if name not in ('game_id', 'model_version')},
+                  'updated_at': func.now()})
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            session.execute(stmt, rows[start:start + BULK_BATCH_SIZE])
+
+
+def main():
+    """Train a new model version or score changed games"""
+    parser = argparse.ArgumentParser(description="NFL prediction models")
+    parser.add_argument('command', choices=['train', 'score'])
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    parser.add_argument('--model-dir', default="models", help="Model artifact directory")
+    parser.add_argument('--seasons', type=int, nargs='*', help="Training seasons (default: all)")
+    args = parser.parse_args()
+
+    service = PredictionService(args.db, args.model_dir)
+    if args.command == 'train':
+        model = service.train(args.seasons)
+        print(f"Model v{model.version}: {json.dumps(model.metadata, indent=2)}")
+        print(f"Scored {service.score_changed()} games")
+    else:
+        print(f"Scored {service.score_changed()} games")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,99 +3,202 @@ NFL Betting Database Query Layer
 Provides high-level interface for common betting analysis queries
 """
 
-from typing import List, Dict, Optional
-from sqlalchemy import func, and_, or_, desc, Float
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Tuple, Union
+from sqlalchemy import func, and_, or_, desc, select, tuple_, Float
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, aliased
 from database import (
     get_database_manager, Game, BettingLine, GameConditions,
-    TeamPerformance, TeamStatsSnapshot
+    TeamPerformance, TeamStatsSnapshot, TeamSeasonSummary, LeagueOverUnderTrend, DataVersion,
+    LineHistory, LINE_FIELDS, Prediction
 )
+from query_cache import QueryCache, cached_query
+from analytics_index import AnalyticsIndex
 import pandas as pd
 
+# Game ids per IN (...) clause, under SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 500
+
+# Played games; history queries skip the scheduled games the pipeline stores with NULL scores
+COMPLETED = and_(Game.home_score.isnot(None), Game.away_score.isnot(None))
+
+
+def _epoch(value: Union[datetime, int]) -> int:
+    """Unix seconds for a datetime (naive values are UTC) or an int passed through"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
 class NFLQueries:
     """High-level query interface for NFL betting analysis"""
 
-    def __init__(self, db_path: str = "nfl_betting.db"):
+    def __init__(self, db_path: str = "nfl_betting.db", cache_size: int = 1024, cache_ttl: float = 300,
+                 analytics_index: bool = False):
         self.db_manager = get_database_manager(db_path)
+        # cache_size=0 disables result caching
+        self.cache = QueryCache(cache_size, cache_ttl) if cache_size > 0 else None
+        # Predictions move with their own version; a scoring pass leaves self.cache warm
+        self.predictions_cache = QueryCache(cache_size, cache_ttl) if cache_size > 0 else None
+        # Team/season/week lookups answered from in-memory arrays instead of SQL
+        self.index = AnalyticsIndex(self.db_manager, self._row_to_game_dict, self._stats_to_dict) \
+            if analytics_index else None
 
     def get_session(self):
-        """Get database session"""
-        return self.db_manager.get_session()
+        """Get read-only database session"""
+        return self.db_manager.get_read_session()
+
+    def get_data_version(self) -> int:
+        """Current pipeline data version (0 before the first commit)"""
+        with self.get_session() as session:
+            try:
+                version = session.query(DataVersion.version).filter(DataVersion.id == 1).scalar()
+            except OperationalError:
+                # Database written before the version table existed
+                return 0
+            return version or 0
+
+    def get_predictions_versions(self) -> Tuple[int, int]:
+        """(data version, predictions version); stored predictions depend on both"""
+        status = self.get_data_status()
+        return status['version'], status['predictions_version']
+
+    def get_data_status(self) -> Dict:
+        """Data and predictions versions and the time either last moved (None before the first commit)"""
+        with self.get_session() as session:
+            try:
+                row = session.query(DataVersion.version, DataVersion.predictions_version, DataVersion.updated_at)\
+                    .filter(DataVersion.id == 1).first()
+            except OperationalError:
+                row = None
+            return {
+                'version': row.version if row else 0,
+                'predictions_version': (row.predictions_version or 0) if row else 0,
+                'updated_at': row.updated_at if row else None
+            }
+
+    def cache_stats(self) -> Optional[Dict]:
+        """Result cache hit/miss/eviction counters"""
+        return self.cache.stats() if self.cache else None
 
     # ==================== GAME QUERIES ====================
 
+    @cached_query
     def get_games_by_week(self, season: int, week: int) -> List[Dict]:
         """Get all games for a specific week"""
-        with self.get_session() as session:
-            games = session.query(Game)\
-                .filter(Game.season == season, Game.week == week)\
-                .order_by(Game.game_date)\
-                .all()
+        if self.index:
+            return self.index.week_games(season, week)
 
-            return [self._game_to_dict(game, session) for game in games]
+        with self.get_session() as session:
+            # game_id breaks same-day ties, matching the analytics index order
+            return self._fetch_games(session, [Game.season == season, Game.week == week],
+                                     order_by=[Game.game_date, Game.game_id])
 
+    @cached_query
     def get_team_games(self, team: str, season: int = None, limit: int = None) -> List[Dict]:
-        """Get games for a specific team"""
+        """Get completed games for a specific team, newest first"""
+        if self.index:
+            return self.index.team_games(team, season, limit)
+
         with self.get_session() as session:
-            query = session.query(Game)\
-                .filter(or_(Game.home_team == team, Game.away_team == team))
+            filters = [or_(Game.home_team == team, Game.away_team == team), COMPLETED]
 
             if season:
-                query = query.filter(Game.season == season)
+                filters.append(Game.season == season)
 
-            query = query.order_by(desc(Game.game_date))
+            return self._fetch_games(session, filters, order_by=[desc(Game.game_date)], limit=limit)
 
-            if limit:
-                query = query.limit(limit)
+    @cached_query
+    def get_games_by_weeks(self, weeks: List[Tuple[int, int]], include_conditions: bool = False,
+                           include_performances: bool = False) -> Dict[Tuple[int, int], List[Dict]]:
+        """Get games for many (season, week) keys in one query"""
+        results = {(season, week): [] for season, week in weeks}
+        if not results:
+            return results
 
-            games = query.all()
-            return [self._game_to_dict(game, session) for game in games]
+        if self.index and not (include_conditions or include_performances):
+            return self.index.weeks_games(list(results))
 
-    # ==================== BETTING ANALYSIS ====================
+        with self.get_session() as session:
+            # SQLite cannot search an index with a row-value IN; the season IN gives it a prefix
+            games = self._fetch_games(
+                session, [Game.season.in_(sorted({season for season, _ in results})),
+                          tuple_(Game.season, Game.week).in_(list(results))],
+                order_by=[Game.game_date, Game.game_id],
+                include_conditions=include_conditions,
+                include_performances=include_performances)
+
+        for game in games:
+            results[(game['season'], game['week'])].append(game)
+        return results
+
+    @cached_query
+    def get_games_for_teams(self, teams: List[str], season: int = None,
+                            include_conditions: bool = False,
+                            include_performances: bool = False) -> Dict[str, List[Dict]]:
+        """Get completed games for many teams in one query (a game appears under both of its teams)"""
+        results = {team: [] for team in teams}
+        if not results:
+            return results
+
+        if self.index and not (include_conditions or include_performances):
+            return self.index.teams_games(list(results), season)
 
-    def get_team_ats_performance(self, team: str, season: int = None) -> Dict:
-        """Get team's against-the-spread performance"""
         with self.get_session() as session:
-            query = session.query(TeamPerformance)\
-                .join(Game)\
-                .filter(TeamPerformance.team == team)
+            filters = [or_(Game.home_team.in_(teams), Game.away_team.in_(teams)), COMPLETED]
 
             if season:
-                query = query.filter(Game.season == season)
+                filters.append(Game.season == season)
 
-            performances = query.all()
+            games = self._fetch_games(
+                session, filters, order_by=[desc(Game.game_date)],
+                include_conditions=include_conditions,
+                include_performances=include_performances)
 
-            total_games = len(performances)
-            ats_wins = sum(1 for p in performances if p.covered_spread)
-            ats_losses = sum(1 for p in performances if p.covered_spread == False)
+        for game in games:
+            for team in (game['home_team'], game['away_team']):
+                if team in results:
+                    results[team].append(game)
+        return results
 
-            return {
-                'team': team,
-                'season': season,
-                'total_games': total_games,
-                'ats_wins': ats_wins,
-                'ats_losses': ats_losses,
-                'ats_pushes': total_games - ats_wins - ats_losses,
-                'ats_win_rate': ats_wins / total_games if total_games > 0 else 0,
-                'performances': [self._performance_to_dict(p) for p in performances]
-            }
+    # ==================== BETTING ANALYSIS ====================
+
+    @cached_query
+    def get_team_ats_performance(self, team: str, season: int = None,
+                                 include_performances: bool = True) -> Dict:
+        """Get team's against-the-spread performance"""
+        with self.get_session() as session:
+            return self._ats_performance(session, [team], season, include_performances)[team]
+
+    @cached_query
+    def get_ats_performance_for_teams(self, teams: List[str], season: int = None,
+                                      include_performances: bool = True) -> Dict[str, Dict]:
+        """get_team_ats_performance for many teams: one grouped query (plus one for performances)"""
+        with self.get_session() as session:
+            return self._ats_performance(session, teams, season, include_performances)
 
+    @cached_query
     def get_over_under_trends(self, season: int = None, min_games: int = 5) -> List[Dict]:
         """Get over/under trends for all teams"""
         with self.get_session() as session:
-            query = session.query(TeamPerformance.team,
-                                func.count().label('total_games'),
-                                func.sum(TeamPerformance.total_went_over).label('overs'),
-                                func.avg(TeamPerformance.total_went_over.cast(Float)).label('over_rate'))\
-                .join(Game)\
-                .filter(TeamPerformance.total_went_over.isnot(None))
+            total_games = func.sum(TeamSeasonSummary.ou_games)
+            overs = func.sum(TeamSeasonSummary.overs)
+            over_rate = (overs.cast(Float) / total_games).label('over_rate')
+
+            query = session.query(TeamSeasonSummary.team,
+                                  total_games.label('total_games'),
+                                  overs.label('overs'),
+                                  over_rate)
 
             if season:
-                query = query.filter(Game.season == season)
+                query = query.filter(TeamSeasonSummary.season == season)
 
-            trends = query.group_by(TeamPerformance.team)\
-                .having(func.count() >= min_games)\
-                .order_by(desc('over_rate'))\
+            trends = query.group_by(TeamSeasonSummary.team)\
+                .having(and_(total_games > 0, total_games >= min_games))\
+                .order_by(desc('over_rate'), TeamSeasonSummary.team)\
                 .all()
 
             return [{
@@ -106,10 +209,35 @@ class NFLQueries:
                 'over_rate': round(trend.over_rate, 3)
             } for trend in trends]
 
+    @cached_query
+    def get_league_over_under_trend(self, season: int) -> List[Dict]:
+        """Get league-wide over/under rates by week, with season-to-date totals"""
+        with self.get_session() as session:
+            trends = session.query(LeagueOverUnderTrend)\
+                .filter(LeagueOverUnderTrend.season == season)\
+                .order_by(LeagueOverUnderTrend.week)\
+                .all()
+
+            return [{
+                'season': trend.season,
+                'week': trend.week,
+                'games': trend.games,
+                'overs': trend.overs,
+                'unders': trend.games - trend.overs,
+                'over_rate': round(trend.over_rate, 3),
+                'season_games': trend.season_games,
+                'season_overs': trend.season_overs,
+                'season_over_rate': round(trend.season_over_rate, 3)
+            } for trend in trends]
+
     # ==================== TEAM STATISTICS ====================
 
+    @cached_query
     def get_team_current_stats(self, team: str, season: int, week: int) -> Optional[Dict]:
         """Get team's current rolling statistics"""
+        if self.index:
+            return self.index.team_stats(team, season, week)
+
         with self.get_session() as session:
             stats = session.query(TeamStatsSnapshot)\
                 .filter(
@@ -120,64 +248,202 @@ class NFLQueries:
 
             return self._stats_to_dict(stats) if stats else None
 
+    @cached_query
+    def get_current_stats_for_teams(self, teams: List[str], season: int, week: int) -> Dict[str, Optional[Dict]]:
+        """get_team_current_stats for many teams in one query (None where a team has no snapshot)"""
+        results = {team: None for team in teams}
+        for team, by_week in self.get_stats_by_weeks([(season, week)], teams).items():
+            results[team] = by_week.get((season, week))
+        return results
+
+    @cached_query
+    def get_stats_by_weeks(self, weeks: List[Tuple[int, int]],
+                           teams: List[str] = None) -> Dict[str, Dict[Tuple[int, int], Dict]]:
+        """Rolling statistics for many (season, week) keys, optionally limited to ``teams``, in one query
+
+        Keyed by team, then (season, week); requested teams are always present.
+        """
+        results = {team: {} for team in teams or []}
+        if not weeks or teams == []:
+            return results
+
+        with self.get_session() as session:
+            query = session.query(TeamStatsSnapshot)\
+                .filter(TeamStatsSnapshot.season.in_(sorted({season for season, _ in weeks})),
+                        tuple_(TeamStatsSnapshot.season, TeamStatsSnapshot.week).in_(list(weeks)))
+            if teams:
+                query = query.filter(TeamStatsSnapshot.team.in_(teams))
+
+            for stats in query.order_by(TeamStatsSnapshot.team, TeamStatsSnapshot.season, TeamStatsSnapshot.week):
+                results.setdefault(stats.team, {})[(stats.season, stats.week)] = self._stats_to_dict(stats)
+        return results
+
+    @cached_query
     def get_power_rankings(self, season: int, week: int) -> List[Dict]:
         """Get teams ranked by point differential"""
+        if self.index:
+            return self.index.power_rankings(season, week)
+
         with self.get_session() as session:
             rankings = session.query(TeamStatsSnapshot)\
                 .filter(
                     TeamStatsSnapshot.season == season,
                     TeamStatsSnapshot.week == week
                 )\
-                .order_by(desc(TeamStatsSnapshot.point_diff_avg_5))\
+                .order_by(desc(TeamStatsSnapshot.point_diff_avg_5), TeamStatsSnapshot.team)\
                 .all()
 
             return [self._stats_to_dict(stats) for stats in rankings]
 
     # ==================== BETTING LINES ====================
 
+    @cached_query
     def get_line_movements(self, game_id: str) -> Dict:
         """Get betting line information for a game"""
         with self.get_session() as session:
-            game = session.query(Game).filter(Game.game_id == game_id).first()
-            betting_line = session.query(BettingLine).filter(BettingLine.game_id == game_id).first()
+            row = session.execute(
+                self._games_select().where(Game.game_id == game_id)
+            ).first()
 
-            if not game or not betting_line:
+            if not row or not row.has_betting_line:
                 return None
 
             return {
                 'game_id': game_id,
-                'game': self._game_to_dict(game, session),
-                'spread_line': betting_line.spread_line,
-                'total_line': betting_line.total_line,
-                'home_moneyline': betting_line.home_moneyline,
-                'away_moneyline': betting_line.away_moneyline,
+                'game': self._row_to_game_dict(row),
+                'spread_line': row.spread_line,
+                'total_line': row.total_line,
+                'home_moneyline': row.home_moneyline,
+                'away_moneyline': row.away_moneyline,
                 'spread_odds': {
-                    'home': betting_line.home_spread_odds,
-                    'away': betting_line.away_spread_odds
+                    'home': row.home_spread_odds,
+                    'away': row.away_spread_odds
                 },
                 'total_odds': {
-                    'over': betting_line.over_odds,
-                    'under': betting_line.under_odds
-                }
+                    'over': row.over_odds,
+                    'under': row.under_odds
+                },
+                'opening': self._lines_at(session, [game_id], func.min).get(game_id, {}),
+                'history': self.get_line_history(game_id)
             }
 
+    @cached_query
+    def get_line_history(self, game_id: str, start: Union[datetime, int] = None,
+                         end: Union[datetime, int] = None) -> List[Dict]:
+        """Recorded line changes for a game, optionally limited to [start, end]"""
+        with self.get_session() as session:
+            query = session.query(LineHistory).filter(LineHistory.game_id == game_id)
+            if start is not None:
+                query = query.filter(LineHistory.observed_at >= _epoch(start))
+            if end is not None:
+                query = query.filter(LineHistory.observed_at <= _epoch(end))
+
+            return [{
+                'observed_at': datetime.fromtimestamp(change.observed_at, timezone.utc),
+                'field': LINE_FIELDS[change.field],
+                'value': change.value
+            } for change in query.order_by(LineHistory.observed_at, LineHistory.field)]
+
+    @cached_query
+    def get_opening_lines(self, game_ids: List[str]) -> Dict[str, Dict]:
+        """First recorded value of each line field, keyed by game_id"""
+        with self.get_session() as session:
+            return self._lines_at(session, game_ids, func.min)
+
+    @cached_query
+    def get_closing_lines(self, game_ids: List[str]) -> Dict[str, Dict]:
+        """Last recorded value of each line field, keyed by game_id"""
+        with self.get_session() as session:
+            return self._lines_at(session, game_ids, func.max)
+
+    @cached_query
+    def get_lines_at(self, game_ids: List[str], at: Union[datetime, int]) -> Dict[str, Dict]:
+        """Line fields as they stood at ``at``, keyed by game_id (games not yet posted are absent)"""
+        with self.get_session() as session:
+            return self._lines_at(session, game_ids, func.max, _epoch(at))
+
+    # ==================== PREDICTIONS ====================
+
+    @cached_query(cache='predictions_cache', version_source='get_predictions_versions')
+    def get_predictions(self, season: int, week: int, model_version: int = None) -> Dict[str, Dict]:
+        """Stored predictions for a week keyed by game_id (default: the latest model version)
+
+        Cached apart from other queries, per data and predictions version.
+        """
+        with self.get_session() as session:
+            if model_version is None:
+                model_version = session.query(func.max(Prediction.model_version)).scalar()
+                if model_version is None:
+                    return {}
+
+            rows = session.query(Prediction)\
+                .join(Game, Game.game_id == Prediction.game_id)\
+                .filter(Game.season == season, Game.week == week, Prediction.model_version == model_version)\
+                .all()
+
+            return {row.game_id: {
+                'model_version': row.model_version,
+                'data_version': row.data_version,
+                'home_win_prob': row.home_win_prob,
+                'predicted_margin': row.predicted_margin,
+                'predicted_total': row.predicted_total,
+                'home_cover_prob': row.home_cover_prob,
+                'over_prob': row.over_prob
+            } for row in rows}
+
     # ==================== MATCHUP ANALYSIS ====================
 
+    @cached_query
     def get_head_to_head(self, team1: str, team2: str, last_n: int = 10) -> List[Dict]:
-        """Get head-to-head matchups between two teams"""
+        """Get completed head-to-head matchups between two teams, newest first"""
+        if self.index:
+            return self.index.head_to_head(team1, team2, last_n)
+
         with self.get_session() as session:
-            games = session.query(Game)\
-                .filter(
-                    or_(
-                        and_(Game.home_team == team1, Game.away_team == team2),
-                        and_(Game.home_team == team2, Game.away_team == team1)
-                    )
-                )\
-                .order_by(desc(Game.game_date))\
-                .limit(last_n)\
-                .all()
+            matchup = or_(
+                and_(Game.home_team == team1, Game.away_team == team2),
+                and_(Game.home_team == team2, Game.away_team == team1)
+            )
+            return self._fetch_games(session, [matchup, COMPLETED], order_by=[desc(Game.game_date)], limit=last_n)
+
+    @cached_query
+    def get_latest_week(self, season: int = None) -> Optional[Tuple[int, int]]:
+        """(season, week) of the most recent week with completed games, optionally within a season"""
+        if self.index:
+            return self.index.latest_week(season)
 
-            return [self._game_to_dict(game, session) for game in games]
+        with self.get_session() as session:
+            query = session.query(Game.season, Game.week).filter(COMPLETED)
+
+            if season:
+                query = query.filter(Game.season == season)
+
+            latest = query.order_by(desc(Game.season), desc(Game.week)).first()
+            return (latest.season, latest.week) if latest else None
+
+    @cached_query
+    def get_current_week(self, season: int = None) -> Optional[Tuple[int, int]]:
+        """(season, week) of the next unplayed week on record, else the latest completed one
+
+        Unplayed games before the latest completed week (cancelled or
+        postponed) are ignored, so the result is the week being played or
+        the next one scheduled.
+        """
+        with self.get_session() as session:
+            query = session.query(Game.season, Game.week)
+
+            if season:
+                query = query.filter(Game.season == season)
+
+            completed = query.filter(COMPLETED).order_by(desc(Game.season), desc(Game.week)).first()
+
+            upcoming = query.filter(~COMPLETED)
+            if completed:
+                upcoming = upcoming.filter(or_(
+                    Game.season > completed.season,
+                    and_(Game.season == completed.season, Game.week >= completed.week)))
+            current = upcoming.order_by(Game.season, Game.week).first() or completed
+            return (current.season, current.week) if current else None
 
     def get_upcoming_games(self, week: int, season: int = 2024) -> List[Dict]:
         """Get games for a specific week (for betting prep)"""
@@ -189,76 +455,229 @@ class NFLQueries:
         """Convert query results to pandas DataFrame"""
         return pd.DataFrame(query_result)
 
+    @cached_query
     def get_team_season_summary(self, team: str, season: int) -> Dict:
         """Get comprehensive season summary for a team"""
         with self.get_session() as session:
-            # Get all performances
-            performances = session.query(TeamPerformance)\
+            return self._season_summaries(session, [team], season)[team]
+
+    @cached_query
+    def get_season_summaries_for_teams(self, teams: List[str], season: int) -> Dict[str, Dict]:
+        """get_team_season_summary for many teams (the whole league in two queries)"""
+        with self.get_session() as session:
+            return self._season_summaries(session, teams, season)
+
+    # ==================== HELPER METHODS ====================
+
+    def _ats_performance(self, session: Session, teams: List[str], season: Optional[int],
+                         include_performances: bool) -> Dict[str, Dict]:
+        """ATS records per team from one query grouped by team"""
+        query = session.query(TeamSeasonSummary.team,
+                              func.sum(TeamSeasonSummary.games),
+                              func.sum(TeamSeasonSummary.ats_wins),
+                              func.sum(TeamSeasonSummary.ats_losses))\
+            .filter(TeamSeasonSummary.team.in_(teams))
+
+        if season:
+            query = query.filter(TeamSeasonSummary.season == season)
+
+        records = {team: (games or 0, wins or 0, losses or 0)
+                   for team, games, wins, losses in query.group_by(TeamSeasonSummary.team)}
+
+        performances = {team: [] for team in teams}
+        if include_performances:
+            perf_query = session.query(TeamPerformance)\
                 .join(Game)\
-                .filter(TeamPerformance.team == team, Game.season == season)\
-                .order_by(Game.week)\
-                .all()
+                .filter(TeamPerformance.team.in_(teams))
 
-            # Get latest stats
-            latest_stats = session.query(TeamStatsSnapshot)\
-                .filter(
-                    TeamStatsSnapshot.team == team,
-                    TeamStatsSnapshot.season == season
-                )\
-                .order_by(desc(TeamStatsSnapshot.week))\
-                .first()
+            if season:
+                perf_query = perf_query.filter(Game.season == season)
 
-            wins = sum(1 for p in performances if p.points_scored > p.points_allowed)
-            losses = len(performances) - wins
-            ats_wins = sum(1 for p in performances if p.covered_spread)
-            overs = sum(1 for p in performances if p.total_went_over)
+            for perf in perf_query.order_by(Game.season, Game.week):
+                performances[perf.team].append(self._performance_to_dict(perf))
 
-            return {
+        results = {}
+        for team in teams:
+            total_games, ats_wins, ats_losses = records.get(team, (0, 0, 0))
+            results[team] = {
                 'team': team,
                 'season': season,
-                'record': f"{wins}-{losses}",
-                'win_percentage': wins / len(performances) if performances else 0,
-                'ats_record': f"{ats_wins}-{len(performances) - ats_wins}",
-                'ats_percentage': ats_wins / len(performances) if performances else 0,
-                'over_record': f"{overs}-{len(performances) - overs}",
-                'over_percentage': overs / len(performances) if performances else 0,
-                'avg_points_for': sum(p.points_scored for p in performances) / len(performances) if performances else 0,
-                'avg_points_against': sum(p.points_allowed for p in performances) / len(performances) if performances else 0,
-                'latest_stats': self._stats_to_dict(latest_stats) if latest_stats else None,
-                'total_games': len(performances)
+                'total_games': total_games,
+                'ats_wins': ats_wins,
+                'ats_losses': ats_losses,
+                'ats_pushes': total_games - ats_wins - ats_losses,
+                'ats_win_rate': ats_wins / total_games if total_games > 0 else 0,
+                'performances': performances[team]
             }
+        return results
 
-    # ==================== HELPER METHODS ====================
+    def _season_summaries(self, session: Session, teams: List[str], season: int) -> Dict[str, Dict]:
+        """Season summaries per team: one summary query and one latest-snapshot query"""
+        summaries = {
+            summary.team: summary for summary in session.query(TeamSeasonSummary)
+            .filter(TeamSeasonSummary.team.in_(teams), TeamSeasonSummary.season == season)
+        }
+
+        # Latest week per team, joined back to its snapshot
+        latest_week = session.query(TeamStatsSnapshot.team, func.max(TeamStatsSnapshot.week).label('week'))\
+            .filter(TeamStatsSnapshot.team.in_(teams), TeamStatsSnapshot.season == season)\
+            .group_by(TeamStatsSnapshot.team)\
+            .subquery()
+        latest = {
+            stats.team: stats for stats in session.query(TeamStatsSnapshot)
+            .join(latest_week, and_(TeamStatsSnapshot.team == latest_week.c.team,
+                                    TeamStatsSnapshot.week == latest_week.c.week))
+            .filter(TeamStatsSnapshot.season == season)
+        }
+
+        return {team: self._summary_to_dict(team, season, summaries.get(team), latest.get(team))
+                for team in teams}
 
-    def _game_to_dict(self, game: Game, session: Session) -> Dict:
-        """Convert Game object to dictionary with related data"""
-        betting_line = session.query(BettingLine).filter(BettingLine.game_id == game.game_id).first()
+    def _summary_to_dict(self, team: str, season: int, summary: Optional[TeamSeasonSummary],
+                         latest_stats: Optional[TeamStatsSnapshot]) -> Dict:
+        """Season summary row plus latest stats as the get_team_season_summary payload"""
+        games = summary.games if summary else 0
+        wins = summary.wins if summary else 0
+        ats_wins = summary.ats_wins if summary else 0
+        overs = summary.overs if summary else 0
 
+        return {
+            'team': team,
+            'season': season,
+            'record': f"{wins}-{games - wins}",
+            'win_percentage': wins / games if games else 0,
+            'ats_record': f"{ats_wins}-{games - ats_wins}",
+            'ats_percentage': ats_wins / games if games else 0,
+            'over_record': f"{overs}-{games - overs}",
+            'over_percentage': overs / games if games else 0,
+            'avg_points_for': summary.avg_points_for if games else 0,
+            'avg_points_against': summary.avg_points_against if games else 0,
+            'latest_stats': self._stats_to_dict(latest_stats) if latest_stats else None,
+            'total_games': games
+        }
+
+    def _games_select(self, include_conditions: bool = False, include_performances: bool = False):
+        """Games LEFT JOINed with their line (and optionally conditions/performances) as flat columns"""
+        columns = [
+            Game.game_id, Game.season, Game.week, Game.game_date, Game.game_type,
+            Game.home_team, Game.away_team, Game.home_score, Game.away_score,
+            Game.overtime, Game.is_divisional,
+            BettingLine.game_id.isnot(None).label('has_betting_line'),
+            BettingLine.spread_line, BettingLine.total_line,
+            BettingLine.home_moneyline, BettingLine.away_moneyline,
+            BettingLine.home_spread_odds, BettingLine.away_spread_odds,
+            BettingLine.over_odds, BettingLine.under_odds,
+        ]
+        if include_conditions:
+            columns += [
+                GameConditions.game_id.isnot(None).label('has_conditions'),
+                GameConditions.stadium_id, GameConditions.stadium_name, GameConditions.roof,
+                GameConditions.surface, GameConditions.temperature, GameConditions.wind_speed,
+                GameConditions.referee,
+            ]
+
+        home_perf = aliased(TeamPerformance, name='home_perf')
+        away_perf = aliased(TeamPerformance, name='away_perf')
+        if include_performances:
+            for prefix, perf in (('home', home_perf), ('away', away_perf)):
+                columns += [
+                    perf.team.label(f'{prefix}_perf_team'),
+                    perf.points_scored.label(f'{prefix}_points_scored'),
+                    perf.points_allowed.label(f'{prefix}_points_allowed'),
+                    perf.covered_spread.label(f'{prefix}_covered_spread'),
+                    perf.total_went_over.label(f'{prefix}_total_went_over'),
+                    perf.moneyline_odds.label(f'{prefix}_moneyline_odds'),
+                ]
+
+        stmt = select(*columns).select_from(Game)\
+            .outerjoin(BettingLine, BettingLine.game_id == Game.game_id)
+        if include_conditions:
+            stmt = stmt.outerjoin(GameConditions, GameConditions.game_id == Game.game_id)
+        if include_performances:
+            stmt = stmt\
+                .outerjoin(home_perf, and_(home_perf.game_id == Game.game_id, home_perf.is_home == True))\
+                .outerjoin(away_perf, and_(away_perf.game_id == Game.game_id, away_perf.is_home == False))
+        return stmt
+
+    def _fetch_games(self, session: Session, filters: List, order_by: List = None, limit: int = None,
+                     include_conditions: bool = False, include_performances: bool = False) -> List[Dict]:
+        """Run one joined game query and serialize the rows directly"""
+        stmt = self._games_select(include_conditions, include_performances).where(*filters)
+
+        if order_by:
+            stmt = stmt.order_by(*order_by)
+        if limit:
+            stmt = stmt.limit(limit)
+
+        return [self._row_to_game_dict(row, include_conditions, include_performances)
+                for row in session.execute(stmt)]
+
+    def _row_to_game_dict(self, row, include_conditions: bool = False,
+                          include_performances: bool = False) -> Dict:
+        """Convert a joined game row to dictionary with related data"""
         result = {
-            'game_id': game.game_id,
-            'season': game.season,
-            'week': game.week,
-            'game_date': game.game_date.isoformat() if game.game_date else None,
-            'game_type': game.game_type,
-            'home_team': game.home_team,
-            'away_team': game.away_team,
-            'home_score': game.home_score,
-            'away_score': game.away_score,
-            'final_margin': game.home_score - game.away_score if game.home_score and game.away_score else None,
-            'overtime': game.overtime,
-            'is_divisional': game.is_divisional
+            'game_id': row.game_id,
+            'season': row.season,
+            'week': row.week,
+            'game_date': row.game_date.isoformat() if row.game_date else None,
+            'game_type': row.game_type,
+            'home_team': row.home_team,
+            'away_team': row.away_team,
+            'home_score': row.home_score,
+            'away_score': row.away_score,
+            'final_margin': row.home_score - row.away_score if row.home_score and row.away_score else None,
+            'overtime': row.overtime,
+            'is_divisional': row.is_divisional
         }
 
-        if betting_line:
+        if row.has_betting_line:
             result.update({
-                'spread_line': betting_line.spread_line,
-                'total_line': betting_line.total_line,
-                'home_moneyline': betting_line.home_moneyline,
-                'away_moneyline': betting_line.away_moneyline
+                'spread_line': row.spread_line,
+                'total_line': row.total_line,
+                'home_moneyline': row.home_moneyline,
+                'away_moneyline': row.away_moneyline
             })
 
+        if include_conditions:
+            result['conditions'] = {
+                'stadium_id': row.stadium_id,
+                'stadium_name': row.stadium_name,
+                'roof': row.roof,
+                'surface': row.surface,
+                'temperature': row.temperature,
+                'wind_speed': row.wind_speed,
+                'referee': row.referee
+            } if row.has_conditions else None
+
+        if include_performances:
+            result['performances'] = [{
+                'team': getattr(row, f'{prefix}_perf_team'),
+                'is_home': prefix == 'home',
+                'points_scored': getattr(row, f'{prefix}_points_scored'),
+                'points_allowed': getattr(row, f'{prefix}_points_allowed'),
+                'covered_spread': getattr(row, f'{prefix}_covered_spread'),
+                'total_went_over': getattr(row, f'{prefix}_total_went_over'),
+                'moneyline_odds': getattr(row, f'{prefix}_moneyline_odds')
+            } for prefix in ('home', 'away') if getattr(row, f'{prefix}_perf_team') is not None]
+
         return result
 
+    def _lines_at(self, session: Session, game_ids: List[str], aggregate,
+                  at: Optional[int] = None) -> Dict[str, Dict]:
+        """Per-game {field: value} from the row each field's MIN/MAX(observed_at) picks"""
+        lines = {}
+        for start in range(0, len(game_ids), ID_CHUNK_SIZE):
+            # SQLite takes bare columns from the row that supplied the MIN/MAX
+            query = session.query(LineHistory.game_id, LineHistory.field, LineHistory.value,
+                                  aggregate(LineHistory.observed_at))\
+                .filter(LineHistory.game_id.in_(game_ids[start:start + ID_CHUNK_SIZE]))
+            if at is not None:
+                query = query.filter(LineHistory.observed_at <= at)
+
+            for game_id, field, value, _ in query.group_by(LineHistory.game_id, LineHistory.field):
+                lines.setdefault(game_id, {})[LINE_FIELDS[field]] = value
+        return lines
+
     def _performance_to_dict(self, perf: TeamPerformance) -> Dict:
         """Convert TeamPerformance to dictionary"""
         return {
@@ -286,6 +705,9 @@ class NFLQueries:
             'pts_for_avg_5': round(stats.pts_for_avg_5, 1) if stats.pts_for_avg_5 else None,
             'pts_against_avg_5': round(stats.pts_against_avg_5, 1) if stats.pts_against_avg_5 else None,
             'point_diff_avg_5': round(stats.point_diff_avg_5, 1) if stats.point_diff_avg_5 else None,
+            'pts_for_avg_10': round(stats.pts_for_avg_10, 1) if stats.pts_for_avg_10 else None,
+            'pts_against_avg_10': round(stats.pts_against_avg_10, 1) if stats.pts_against_avg_10 else None,
+            'point_diff_avg_10': round(stats.point_diff_avg_10, 1) if stats.point_diff_avg_10 else None,
             'win_pct_5': round(stats.win_pct_5, 3) if stats.win_pct_5 else None,
             'ats_pct_5': round(stats.ats_pct_5, 3) if stats.ats_pct_5 else None,
             'over_pct_5': round(stats.over_pct_5, 3) if stats.over_pct_5 else None,
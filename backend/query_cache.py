@@ -0,0 +1,127 @@
+"""
+NFL Query Result Cache
+In-process LRU cache for NFLQueries, invalidated by the pipeline's data version
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+
+def _freeze(value) -> Hashable:
+    """Hashable form of query arguments (lists/dicts become tuples)"""
+    if isinstance(value, (list, tuple, set)):
+        frozen = tuple(_freeze(v) for v in value)
+        return tuple(sorted(frozen, key=repr)) if isinstance(value, set) else frozen
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class QueryCache:
+    """LRU result cache with size and TTL limits
+
+    The data version is re-read at most every ``version_check_interval``
+    seconds; when it moves, every entry is dropped. Between checks a hit
+    never touches SQLite. Cached results are shared between callers and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300, version_check_interval: float = 1.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = float('-inf')
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable, version_source: Callable[[], int]):
+        """Cached value for ``key``, computing and storing it on a miss"""
+        now = time.monotonic()
+        self._check_version(now, version_source)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self._version
+
+        value = compute()
+
+        with self._lock:
+            if self._version != version:
+                # The version moved while computing: the value may predate it, so don't keep it
+                return value
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return value
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'data_version': self._version,
+        }
+
+    def _check_version(self, now: float, version_source: Callable[[], int]):
+        """Clear the cache if the data version moved since the last check"""
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+
+        version = version_source()
+        with self._lock:
+            if self._version is not None and version != self._version:
+                self._entries.clear()
+                self.invalidations += 1
+            self._version = version
+            self._version_checked_at = now
+
+
+def cached_query(method: Callable = None, *, cache: str = 'cache', version_source: str = 'get_data_version'):
+    """Cache an NFLQueries method by name and arguments in ``self.cache``
+
+    ``cache`` and ``version_source`` name another cache attribute and the
+    method whose value invalidates it, e.g. ``@cached_query(cache=...)``.
+    """
+    if method is None:
+        return functools.partial(cached_query, cache=cache, version_source=version_source)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        store = getattr(self, cache)
+        if store is None:
+            return method(self, *args, **kwargs)
+
+        key = (method.__name__, _freeze(args), _freeze(kwargs))
+        return store.get_or_compute(
+            key, lambda: method(self, *args, **kwargs), getattr(self, version_source))
+
+    return wrapper
@@ -0,0 +1,200 @@
+"""
+NFL Query Plan Harness
+EXPLAIN QUERY PLAN and timings for every NFLQueries method, with before/after comparison
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, func
+
+from database import get_database_manager, Game, TeamStatsSnapshot
+from migrations import SchemaMigrator
+from queries import NFLQueries
+
+# Plan details that mean a whole table or index is walked, or rows are sorted/grouped in a temp b-tree
+# (a scan under ORDER BY ... LIMIT may still stop early; VALUES lists show up as constant-row scans)
+SCAN_MARKER = 'SCAN '
+CONSTANT_MARKER = 'CONSTANT ROW'
+TEMP_MARKER = 'USE TEMP B-TREE'
+
+# The query workload: label -> call with arguments drawn from the sample context
+WORKLOAD: Dict[str, Callable] = {
+    'get_data_status': lambda q, c: q.get_data_status(),
+    'get_games_by_week': lambda q, c: q.get_games_by_week(c['season'], c['week']),
+    'get_team_games': lambda q, c: q.get_team_games(c['team'], c['season']),
+    'get_team_games[last_10]': lambda q, c: q.get_team_games(c['team'], limit=10),
+    'get_games_by_weeks[full]': lambda q, c: q.get_games_by_weeks(
+        c['weeks'], include_conditions=True, include_performances=True),
+    'get_games_for_teams': lambda q, c: q.get_games_for_teams(c['teams'], c['season']),
+    'get_team_ats_performance': lambda q, c: q.get_team_ats_performance(
+        c['team'], c['season'], include_performances=True),
+    'get_ats_performance_for_teams': lambda q, c: q.get_ats_performance_for_teams(
+        c['teams'], c['season'], include_performances=True),
+    'get_over_under_trends': lambda q, c: q.get_over_under_trends(c['season']),
+    'get_league_over_under_trend': lambda q, c: q.get_league_over_under_trend(c['season']),
+    'get_team_current_stats': lambda q, c: q.get_team_current_stats(c['team'], c['season'], c['week']),
+    'get_current_stats_for_teams': lambda q, c: q.get_current_stats_for_teams(c['teams'], c['season'], c['week']),
+    'get_stats_by_weeks': lambda q, c: q.get_stats_by_weeks(c['weeks']),
+    'get_power_rankings': lambda q, c: q.get_power_rankings(c['season'], c['week']),
+    'get_line_movements': lambda q, c: q.get_line_movements(c['game_id']),
+    'get_line_history': lambda q, c: q.get_line_history(c['game_id']),
+    'get_opening_lines': lambda q, c: q.get_opening_lines(c['game_ids']),
+    'get_closing_lines': lambda q, c: q.get_closing_lines(c['game_ids']),
+    'get_lines_at': lambda q, c: q.get_lines_at(c['game_ids'], c['at']),
+    'get_predictions': lambda q, c: q.get_predictions(c['season'], c['week']),
+    'get_head_to_head': lambda q, c: q.get_head_to_head(c['team'], c['opponent']),
+    'get_latest_week': lambda q, c: q.get_latest_week(),
+    'get_latest_week[season]': lambda q, c: q.get_latest_week(c['season']),
+    'get_current_week': lambda q, c: q.get_current_week(),
+    'get_team_season_summary': lambda q, c: q.get_team_season_summary(c['team'], c['season']),
+    'get_season_summaries_for_teams': lambda q, c: q.get_season_summaries_for_teams(c['teams'], c['season']),
+}
+
+
+def sample_context(db_manager) -> Dict:
+    """Workload arguments from the latest stored week: its games, teams and season"""
+    with db_manager.get_read_session() as session:
+        season, week = session.query(Game.season, Game.week)\
+            .order_by(Game.season.desc(), Game.week.desc()).first()
+        game = session.query(Game).filter(Game.season == season, Game.week == week).first()
+        game_ids = [game_id for (game_id,) in
+                    session.query(Game.game_id).filter(Game.season == season, Game.week == week)]
+        weeks = [(season, w) for (w,) in
+                 session.query(Game.week).filter(Game.season == season).distinct().order_by(Game.week)]
+        teams = [team for (team,) in session.query(TeamStatsSnapshot.team).distinct().order_by(TeamStatsSnapshot.team)]
+        stats_week = session.query(func.max(TeamStatsSnapshot.week))\
+            .filter(TeamStatsSnapshot.season == season).scalar() or week
+
+    return {
+        'season': season, 'week': stats_week, 'weeks': weeks,
+        'team': game.home_team, 'opponent': game.away_team, 'teams': teams,
+        'game_id': game.game_id, 'game_ids': game_ids,
+        'at': datetime.now(timezone.utc),
+    }
+
+
+class StatementCapture:
+    """Records the SQL statements (with parameters) a block sends to an engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+
+def explain(engine, statement: str, parameters) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines, indented by plan depth"""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+
+    depth = {0: -1}
+    lines = []
+    for node_id, parent_id, _, detail in rows:
+        depth[node_id] = depth.get(parent_id, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+def profile_workload(db_path: str, repeat: int = 5, methods: Optional[List[str]] = None) -> Dict:
+    """Plans and best-of-``repeat`` milliseconds for each workload call (result cache off)"""
+    queries = NFLQueries(db_path, cache_size=0)
+    engine = queries.db_manager.read_engine
+    context = sample_context(queries.db_manager)
+
+    results = {}
+    for label, call in WORKLOAD.items():
+        if methods and label.split('[')[0] not in methods:
+            continue
+
+        with StatementCapture(engine) as capture:
+            call(queries, context)
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call(queries, context)
+            timings.append(time.perf_counter() - start)
+
+        plans = [explain(engine, statement, parameters) for statement, parameters in capture.statements]
+        details = [line for plan in plans for line in plan]
+        results[label] = {
+            'ms': round(min(timings) * 1000, 3),
+            'statements': len(plans),
+            'scans': sum(SCAN_MARKER in line and CONSTANT_MARKER not in line for line in details),
+            'temp_btrees': sum(TEMP_MARKER in line for line in details),
+            'plans': plans,
+        }
+    return results
+
+
+def report(results: Dict, baseline: Optional[Dict] = None, show_plans: bool = True) -> str:
+    """Summary table plus each method's plans; with a baseline, before/after side by side"""
+    lines = [f"{'method':<36}{'stmts':>6}{'scans':>7}{'temp':>6}{'ms':>10}"
+             + (f"{'before ms':>11}{'scans':>7}{'temp':>6}{'ratio':>8}" if baseline else "")]
+    for label, result in results.items():
+        line = (f"{label:<36}{result['statements']:>6}{result['scans']:>7}"
+                f"{result['temp_btrees']:>6}{result['ms']:>10.3f}")
+        before = baseline.get(label) if baseline else None
+        if before:
+            ratio = before['ms'] / result['ms'] if result['ms'] else float('inf')
+            line += f"{before['ms']:>11.3f}{before['scans']:>7}{before['temp_btrees']:>6}{ratio:>7.2f}x"
+        lines.append(line)
+
+    if show_plans:
+        for label, result in results.items():
+            before = baseline.get(label) if baseline else None
+            if before and before['plans'] == result['plans']:
+                continue
+            lines += ["", f"== {label}"]
+            if before:
+                lines.append("-- before")
+                lines += [f"   {detail}" for plan in before['plans'] for detail in plan + ['']][:-1]
+                lines.append("-- after")
+            lines += [f"   {detail}" for plan in result['plans'] for detail in plan + ['']][:-1]
+    return "\n".join(lines)
+
+
+def main():
+    """Print the plan report; --save records it, --baseline compares against a saved one"""
+    parser = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN harness for NFLQueries")
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed calls per method (fastest kept)")
+    parser.add_argument('--methods', nargs='*', help="Only these NFLQueries methods")
+    parser.add_argument('--migrate', action='store_true',
+                        help="Apply pending schema migrations before profiling")
+    parser.add_argument('--save', help="Write the results as JSON (e.g. before a migration)")
+    parser.add_argument('--baseline', help="Compare against results saved with --save")
+    parser.add_argument('--summary', action='store_true', help="Table only, no plans")
+    args = parser.parse_args()
+
+    if args.migrate:
+        SchemaMigrator(get_database_manager(args.db)).upgrade()
+
+    results = profile_workload(args.db, args.repeat, args.methods)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print(report(results, baseline, show_plans=not args.summary))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
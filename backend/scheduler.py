@@ -1,56 +1,155 @@
 """
 NFL Pipeline Scheduler
-Runs the autonomous pipeline on a schedule during NFL season
+Runs the autonomous pipeline around kickoff windows instead of on a fixed clock
 """
 
+import argparse
 import time
-import schedule
-from datetime import datetime, date
-from autonomous_pipeline import AutonomousNFLPipeline
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
 
-def run_pipeline():
-    """Execute the pipeline and log results"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"\n[{timestamp}] Starting scheduled pipeline run...")
+import pandas as pd
 
-    try:
-        pipeline = AutonomousNFLPipeline()
-        result = pipeline.run()
+from autonomous_pipeline import AutonomousNFLPipeline, PipelineLock
+
+# A game counts as live from kickoff until its final score is loaded, for at most
+# this long (covers overtime and feed lag; older unscored games are postponed)
+LIVE_GAME_LIMIT = timedelta(hours=12)
+
+# Seconds between runs while a game is live or awaiting its final score
+LIVE_POLL_INTERVAL = 5 * 60
+
+# Longest sleep between runs when nothing is scheduled (catches revisions and line changes)
+IDLE_POLL_INTERVAL = 24 * 60 * 60
+
+# Retry interval when kickoff times could not be read
+RETRY_INTERVAL = 60 * 60
+
+
+def _eastern_offset(day: date) -> timedelta:
+    """UTC offset of US Eastern time on ``day`` (DST from the 2nd Sunday of March to the 1st Sunday of November)"""
+    march = date(day.year, 3, 8)
+    november = date(day.year, 11, 1)
+    dst_start = march + timedelta(days=(6 - march.weekday()) % 7)
+    dst_end = november + timedelta(days=(6 - november.weekday()) % 7)
+    return timedelta(hours=-4) if dst_start <= day < dst_end else timedelta(hours=-5)
+
+
+def kickoff_times(schedule: pd.DataFrame) -> pd.DataFrame:
+    """Unscored games with their kickoff as an aware UTC datetime
+
+    ``gameday``/``gametime`` in the schedule source are US Eastern; games
+    without a listed time are assumed to kick off at 13:00.
+    """
+    if len(schedule) == 0:
+        return pd.DataFrame(columns=['game_id', 'kickoff'])
+
+    pending = schedule[schedule['home_score'].isna() | schedule['away_score'].isna()]
+    gametimes = pending['gametime'] if 'gametime' in pending.columns else pd.Series(None, index=pending.index)
+
+    kickoffs = []
+    for gameday, gametime in zip(pending['gameday'], gametimes):
+        day = pd.to_datetime(gameday).date()
+        hour, minute = (int(part) for part in (gametime if isinstance(gametime, str) else '13:00').split(':')[:2])
+        local = datetime(day.year, day.month, day.day, hour, minute)
+        kickoffs.append((local - _eastern_offset(day)).replace(tzinfo=timezone.utc))
+
+    return pd.DataFrame({'game_id': pending['game_id'].values, 'kickoff': kickoffs})
 
-        if result['games_updated'] > 0:
-            print(f"[{timestamp}] ✅ Updated {result['games_updated']} games")
-        else:
-            print(f"[{timestamp}] ✅ Database current, no updates needed")
 
-    except Exception as e:
-        print(f"[{timestamp}] ❌ Pipeline failed: {e}")
+class GameDayScheduler:
+    """Schedule-aware runner around one long-lived pipeline
+
+    From a game's kickoff until its final score is loaded (at most
+    LIVE_GAME_LIMIT), the pipeline runs every ``live_interval`` seconds
+    with the schedule cache on its live TTL.
+    Otherwise the scheduler sleeps until the next kickoff, waking at least
+    every ``idle_interval`` seconds. Each run holds the pipeline lock file,
+    so it never overlaps a manual or second scheduled run.
+    """
+
+    def __init__(self, pipeline: Optional[AutonomousNFLPipeline] = None,
+                 lock_path: str = "logs/pipeline.lock",
+                 live_interval: int = LIVE_POLL_INTERVAL, idle_interval: int = IDLE_POLL_INTERVAL):
+        self.pipeline = pipeline or AutonomousNFLPipeline()
+        self.lock = PipelineLock(lock_path)
+        self.live_interval = live_interval
+        self.idle_interval = idle_interval
+        self.logger = self.pipeline.logger
+
+    def upcoming_kickoffs(self) -> List[datetime]:
+        """Kickoffs of every unscored game in the current and next season"""
+        season = self.pipeline.get_current_nfl_context()['current_season']
+        kickoffs = []
+        for candidate in (season, season + 1):
+            kickoffs.extend(kickoff_times(self.pipeline.fetch_schedules(candidate))['kickoff'])
+        return sorted(kickoffs)
+
+    def plan(self, now: datetime, kickoffs: List[datetime]) -> Tuple[bool, datetime]:
+        """(live now?, when to wake next) for the given kickoff times"""
+        live = any(kickoff <= now < kickoff + LIVE_GAME_LIMIT for kickoff in kickoffs)
+        if live:
+            return True, now + timedelta(seconds=self.live_interval)
+
+        idle_wake = now + timedelta(seconds=self.idle_interval)
+        upcoming = [kickoff for kickoff in kickoffs if kickoff > now]
+        return False, min([idle_wake] + upcoming[:1])
+
+    def run_once(self, live: bool = False) -> Optional[dict]:
+        """One pipeline run under the lock; None if another run holds it"""
+        if not self.lock.acquire():
+            self.logger.info("Another pipeline run holds the lock; skipping")
+            return None
+        try:
+            self.pipeline.live = live
+            return self.pipeline.run()
+        except Exception as e:
+            self.logger.error(f"Scheduled run failed: {e}")
+            return None
+        finally:
+            self.pipeline.live = False
+            self.lock.release()
+
+    def next_plan(self) -> Tuple[bool, datetime]:
+        """plan() for the current time, retrying later if kickoffs cannot be read"""
+        now = datetime.now(timezone.utc)
+        try:
+            return self.plan(now, self.upcoming_kickoffs())
+        except Exception as e:
+            self.logger.error(f"Could not read kickoff times: {e}")
+            return False, now + timedelta(seconds=RETRY_INTERVAL)
+
+    def serve_forever(self):
+        """Run, then sleep until the next live poll, kickoff or idle wake-up"""
+        self.logger.info("🏈 Game-day scheduler starting...")
+        while True:
+            live, _ = self.next_plan()
+            self.run_once(live)
+
+            # Kickoffs are re-read after the run, which may have just loaded final scores
+            live, wake = self.next_plan()
+            if not live:
+                self.logger.info(f"Next run at {wake.astimezone():%a %Y-%m-%d %H:%M}")
+            time.sleep(max(0.0, (wake - datetime.now(timezone.utc)).total_seconds()))
 
-def is_nfl_season():
-    """Check if we're currently in NFL season (September-February)"""
-    today = date.today()
-    month = today.month
-    return month >= 9 or month <= 2
 
 def main():
-    """Set up scheduling based on NFL season context"""
-    print("🏈 NFL Pipeline Scheduler Starting...")
-
-    if is_nfl_season():
-        # During season: run every 4 hours
-        schedule.every(4).hours.do(run_pipeline)
-        print("📅 NFL Season detected - Running every 4 hours")
-    else:
-        # Off-season: run daily at 6 AM
-        schedule.every().day.at("06:00").do(run_pipeline)
-        print("📅 Off-season detected - Running daily at 6 AM")
-
-    # Run once immediately
-    run_pipeline()
-
-    # Keep running scheduled jobs
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+    """Start the game-day scheduler"""
+    parser = argparse.ArgumentParser(description="Run the NFL pipeline around game windows")
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    parser.add_argument('--live-interval', type=int, default=LIVE_POLL_INTERVAL,
+                        help="Seconds between runs while games are live")
+    parser.add_argument('--idle-interval', type=int, default=IDLE_POLL_INTERVAL,
+                        help="Longest sleep between runs when no game is near")
+    args = parser.parse_args()
+
+    scheduler = GameDayScheduler(AutonomousNFLPipeline(db_path=args.db),
+                                 live_interval=args.live_interval, idle_interval=args.idle_interval)
+    try:
+        scheduler.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
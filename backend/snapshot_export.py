@@ -0,0 +1,273 @@
+"""
+NFL Analytics Snapshot
+Season-partitioned Parquet/Arrow export of the team-centric dataset with a memory-mapped reader
+"""
+
+import argparse
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import and_, case, select
+from sqlalchemy.exc import OperationalError
+
+from database import (
+    get_database_manager, Game, BettingLine, GameConditions,
+    TeamPerformance, TeamStatsSnapshot, DataVersion
+)
+
+# Rows fetched from SQLite and written per record batch
+EXPORT_CHUNK_SIZE = 50000
+
+# TeamStatsSnapshot columns carried into the snapshot
+STATS_FEATURES = tuple(
+    f'{stat}_{size}' for size in (3, 5, 10) for stat in ('pts_for_avg', 'pts_against_avg', 'point_diff_avg')
+) + ('win_pct_5', 'ats_pct_5', 'over_pct_5',
+     'season_wins', 'season_losses', 'season_ats_wins', 'season_ats_losses')
+
+# Output column -> (source column, Arrow type). One row per team per game; the
+# stats snapshot is the team's as of that week, so it includes the game itself.
+SNAPSHOT_COLUMNS = {
+    'season': (Game.season, pa.int16()),
+    'week': (Game.week, pa.int8()),
+    'game_id': (Game.game_id, pa.string()),
+    'game_date': (Game.game_date, pa.date32()),
+    'game_type': (Game.game_type, pa.string()),
+    'team': (TeamPerformance.team, pa.string()),
+    'opponent': (case((TeamPerformance.is_home, Game.away_team), else_=Game.home_team), pa.string()),
+    'is_home': (TeamPerformance.is_home, pa.bool_()),
+    'is_divisional': (Game.is_divisional, pa.bool_()),
+    'overtime': (Game.overtime, pa.bool_()),
+    'points_scored': (TeamPerformance.points_scored, pa.int16()),
+    'points_allowed': (TeamPerformance.points_allowed, pa.int16()),
+    'covered_spread': (TeamPerformance.covered_spread, pa.bool_()),
+    'total_went_over': (TeamPerformance.total_went_over, pa.bool_()),
+    'moneyline_odds': (TeamPerformance.moneyline_odds, pa.int32()),
+    'spread_odds': (TeamPerformance.spread_odds, pa.int32()),
+    'spread_line': (BettingLine.spread_line, pa.float64()),
+    'total_line': (BettingLine.total_line, pa.float64()),
+    'over_odds': (BettingLine.over_odds, pa.int32()),
+    'under_odds': (BettingLine.under_odds, pa.int32()),
+    'stadium_id': (GameConditions.stadium_id, pa.string()),
+    'stadium_name': (GameConditions.stadium_name, pa.string()),
+    'roof': (GameConditions.roof, pa.string()),
+    'surface': (GameConditions.surface, pa.string()),
+    'temperature': (GameConditions.temperature, pa.float64()),
+    'wind_speed': (GameConditions.wind_speed, pa.float64()),
+    'referee': (GameConditions.referee, pa.string()),
+    **{
+        name: (getattr(TeamStatsSnapshot, name), pa.int16() if name.startswith('season_') else pa.float64())
+        for name in STATS_FEATURES
+    },
+}
+
+# Low-cardinality strings stored as dictionaries shared by every partition
+DICTIONARY_COLUMNS = {
+    'team': [TeamPerformance.team],
+    'opponent': [TeamPerformance.team],
+    'game_type': [Game.game_type],
+    'stadium_id': [GameConditions.stadium_id],
+    'stadium_name': [GameConditions.stadium_name],
+    'roof': [GameConditions.roof],
+    'surface': [GameConditions.surface],
+    'referee': [GameConditions.referee],
+}
+
+
+def snapshot_select():
+    """Team-centric join: performance + game + line + conditions + same-week stats snapshot"""
+    return select(*(column.label(name) for name, (column, _) in SNAPSHOT_COLUMNS.items()))\
+        .select_from(TeamPerformance)\
+        .join(Game, Game.game_id == TeamPerformance.game_id)\
+        .outerjoin(BettingLine, BettingLine.game_id == Game.game_id)\
+        .outerjoin(GameConditions, GameConditions.game_id == Game.game_id)\
+        .outerjoin(TeamStatsSnapshot, and_(
+            TeamStatsSnapshot.team == TeamPerformance.team,
+            TeamStatsSnapshot.season == Game.season,
+            TeamStatsSnapshot.week == Game.week
+        ))
+
+
+class SnapshotExporter:
+    """Streams the team-centric join out of SQLite into columnar files
+
+    Each season is written twice: ``parquet/season_<season>.parquet``
+    (compressed, for interchange) and ``arrow/season_<season>.arrow``
+    (uncompressed Arrow IPC, memory-mapped by SnapshotReader). Dictionary
+    columns share one dictionary across all seasons, so category codes
+    line up when partitions are concatenated. The dictionaries are kept in
+    the manifest; when new values change them, a partial export re-exports
+    every season so no partition keeps the old codes.
+    """
+
+    def __init__(self, db_path: str = "nfl_autonomous.db", chunk_size: int = EXPORT_CHUNK_SIZE):
+        self.db_manager = get_database_manager(db_path)
+        self.chunk_size = chunk_size
+        self.schema = pa.schema([
+            (name, pa.dictionary(pa.int16(), pa.string()) if name in DICTIONARY_COLUMNS else arrow_type)
+            for name, (_, arrow_type) in SNAPSHOT_COLUMNS.items()
+        ])
+
+    def export(self, out_dir: str, seasons: Optional[List[int]] = None) -> Dict:
+        """Write the requested seasons (default: all) and return the manifest"""
+        out_path = Path(out_dir)
+        (out_path / 'parquet').mkdir(parents=True, exist_ok=True)
+        (out_path / 'arrow').mkdir(parents=True, exist_ok=True)
+
+        with self.db_manager.read_engine.connect() as conn:
+            all_seasons = list(conn.execute(select(Game.season).distinct().order_by(Game.season)).scalars())
+            dictionaries = self._dictionaries(conn)
+            data_version = self._data_version(conn)
+
+            manifest = self._load_manifest(out_path)
+            values = {name: dictionary.to_pylist() for name, dictionary in dictionaries.items()}
+            if seasons is None or (manifest['seasons'] and manifest.get('dictionaries') != values):
+                # Codes are only comparable under one dictionary, so a changed one re-encodes every season
+                seasons = all_seasons
+                manifest['seasons'] = {}
+            manifest['dictionaries'] = values
+
+            for season in seasons:
+                rows = self._write_season(conn, out_path, season, dictionaries)
+                manifest['seasons'][str(season)] = rows
+                print(f"Exported {season}: {rows} team-games")
+
+        manifest.update({
+            'data_version': data_version,
+            'exported_at': datetime.now().isoformat(),
+            'columns': list(SNAPSHOT_COLUMNS),
+        })
+        with open(out_path / 'manifest.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def _write_season(self, conn, out_path: Path, season: int, dictionaries: Dict[str, pa.Array]) -> int:
+        """Stream one season into its Parquet and Arrow files (written to temp names, then swapped in)"""
+        parquet_file = out_path / 'parquet' / f'season_{season}.parquet'
+        arrow_file = out_path / 'arrow' / f'season_{season}.arrow'
+        parquet_tmp = parquet_file.with_suffix('.tmp')
+        arrow_tmp = arrow_file.with_suffix('.tmp')
+
+        rows = 0
+        with pq.ParquetWriter(parquet_tmp, self.schema, compression='zstd') as parquet_writer, \
+                pa.OSFile(str(arrow_tmp), 'wb') as sink, \
+                pa.ipc.new_file(sink, self.schema) as arrow_writer:
+            for batch in self._batches(conn, season, dictionaries):
+                parquet_writer.write_batch(batch)
+                arrow_writer.write_batch(batch)
+                rows += batch.num_rows
+
+        parquet_tmp.replace(parquet_file)
+        arrow_tmp.replace(arrow_file)
+        return rows
+
+    def _batches(self, conn, season: int, dictionaries: Dict[str, pa.Array]) -> Iterator[pa.RecordBatch]:
+        """Record batches of at most chunk_size rows for one season"""
+        statement = snapshot_select()\
+            .where(Game.season == season)\
+            .order_by(Game.week, Game.game_id, TeamPerformance.is_home)
+        result = conn.execution_options(stream_results=True).execute(statement)
+
+        for chunk in result.partitions(self.chunk_size):
+            arrays = []
+            for field, values in zip(self.schema, zip(*chunk)):
+                if field.name in dictionaries:
+                    plain = pa.array(values, pa.string())
+                    indices = pc.index_in(plain, value_set=dictionaries[field.name]).cast(pa.int16())
+                    arrays.append(pa.DictionaryArray.from_arrays(indices, dictionaries[field.name]))
+                else:
+                    arrays.append(pa.array(values, field.type))
+            yield pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def _dictionaries(self, conn) -> Dict[str, pa.Array]:
+        """Sorted distinct values of every dictionary column across the whole database"""
+        dictionaries = {}
+        for name, sources in DICTIONARY_COLUMNS.items():
+            values = set()
+            for column in sources:
+                values.update(conn.execute(select(column).distinct().where(column.isnot(None))).scalars())
+            dictionaries[name] = pa.array(sorted(values), pa.string())
+        return dictionaries
+
+    def _data_version(self, conn) -> int:
+        try:
+            version = conn.execute(select(DataVersion.version).where(DataVersion.id == 1)).scalar()
+        except OperationalError:
+            return 0
+        return version or 0
+
+    def _load_manifest(self, out_path: Path) -> Dict:
+        manifest_file = out_path / 'manifest.json'
+        if not manifest_file.exists():
+            return {'seasons': {}}
+        with open(manifest_file, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('columns') != list(SNAPSHOT_COLUMNS):
+            # Layout changed; seasons not re-exported this run are stale
+            manifest['seasons'] = {}
+        return manifest
+
+
+class SnapshotReader:
+    """Memory-mapped access to an exported snapshot
+
+    Arrow files are mapped rather than read, so loading a season costs a
+    few page-table entries; data is paged in only as columns are touched.
+    Tables stay valid while the underlying files exist.
+    """
+
+    def __init__(self, snapshot_dir: str):
+        self.snapshot_dir = Path(snapshot_dir)
+        with open(self.snapshot_dir / 'manifest.json', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+
+    @property
+    def data_version(self) -> int:
+        """Pipeline data version the snapshot was exported at"""
+        return self.manifest.get('data_version', 0)
+
+    def seasons(self) -> List[int]:
+        """Seasons available in the snapshot"""
+        return sorted(int(season) for season in self.manifest['seasons'])
+
+    def read_table(self, seasons: Optional[List[int]] = None, columns: Optional[List[str]] = None) -> pa.Table:
+        """Zero-copy Arrow table for the given seasons (default: all)"""
+        tables = []
+        for season in seasons or self.seasons():
+            source = pa.memory_map(str(self.snapshot_dir / 'arrow' / f'season_{season}.arrow'), 'r')
+            table = pa.ipc.open_file(source).read_all()
+            tables.append(table.select(columns) if columns else table)
+        if not tables:
+            return pa.schema([]).empty_table()
+        return pa.concat_tables(tables)
+
+    def read_frame(self, seasons: Optional[List[int]] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """pandas DataFrame for the given seasons; dictionary columns become categoricals"""
+        return self.read_table(seasons, columns).to_pandas()
+
+    def parquet_files(self, seasons: Optional[List[int]] = None) -> List[Path]:
+        """Parquet partition paths, for tools that read Parquet directly"""
+        return [self.snapshot_dir / 'parquet' / f'season_{season}.parquet' for season in seasons or self.seasons()]
+
+
+def main():
+    """Export a snapshot of the database"""
+    parser = argparse.ArgumentParser(description="Export the team-centric dataset to Parquet/Arrow")
+    parser.add_argument('--db', default="nfl_autonomous.db", help="SQLite database path")
+    parser.add_argument('--out', default="snapshot", help="Output directory")
+    parser.add_argument('--seasons', type=int, nargs='*', help="Seasons to export (default: all)")
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help="Rows per record batch")
+    args = parser.parse_args()
+
+    manifest = SnapshotExporter(args.db, args.chunk_size).export(args.out, args.seasons)
+    print(f"Snapshot at data version {manifest['data_version']}: "
+          f"{sum(manifest['seasons'].values())} rows in {len(manifest['seasons'])} seasons")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Team stats backends: the original loop, the vectorized rebuild and the incremental engine
+must write identical team_stats_snapshot columns
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import generate_schedule
+from database import Game, TeamStatsSnapshot
+from etl_pipeline_db import DatabaseETL, ROLLING_WINDOWS
+
+KEY_COLUMNS = ['team', 'season', 'week']
+
+# Columns calculate_team_stats (the original loop) writes
+LOOP_COLUMNS = [
+    'pts_for_avg_3', 'pts_against_avg_3', 'point_diff_avg_3',
+    'pts_for_avg_5', 'pts_against_avg_5', 'point_diff_avg_5',
+    'win_pct_5', 'ats_pct_5', 'over_pct_5',
+    'season_wins', 'season_losses', 'season_ats_wins', 'season_ats_losses',
+]
+
+ALL_COLUMNS = LOOP_COLUMNS + [f'{stat}_{size}' for size in ROLLING_WINDOWS if size not in (3, 5)
+                              for stat in ('pts_for_avg', 'pts_against_avg', 'point_diff_avg')]
+
+SEASONS = (2020, 2021, 2022)
+
+
+@pytest.fixture
+def etl(tmp_path):
+    """Three synthetic seasons, the last one only half played"""
+    etl = DatabaseETL(str(tmp_path / 'stats.db'))
+    with etl.db_manager.get_session() as session:
+        for season in SEASONS:
+            completed_weeks = 9 if season == SEASONS[-1] else None
+            etl.bulk_load(generate_schedule(season, 16, completed_weeks=completed_weeks), session)
+        session.commit()
+    yield etl
+    etl.db_manager.dispose()
+
+
+def snapshots(etl: DatabaseETL, columns=ALL_COLUMNS) -> pd.DataFrame:
+    with etl.db_manager.get_session() as session:
+        rows = session.query(*(getattr(TeamStatsSnapshot, c) for c in KEY_COLUMNS + columns)).all()
+    return pd.DataFrame.from_records(rows, columns=KEY_COLUMNS + columns)\
+        .sort_values(KEY_COLUMNS).reset_index(drop=True)
+
+
+def rebuild(etl: DatabaseETL, calculate) -> pd.DataFrame:
+    """Snapshots written by ``calculate(session)`` into an empty table"""
+    with etl.db_manager.get_session() as session:
+        session.query(TeamStatsSnapshot).delete()
+        calculate(session)
+        session.commit()
+    return snapshots(etl)
+
+
+def assert_columns_equal(expected: pd.DataFrame, actual: pd.DataFrame, columns):
+    pd.testing.assert_frame_equal(expected[KEY_COLUMNS], actual[KEY_COLUMNS])
+    for column in columns:
+        np.testing.assert_allclose(actual[column].astype(float), expected[column].astype(float),
+                                   rtol=0, atol=1e-9, err_msg=column)
+
+
+def game_ids(etl: DatabaseETL, *filters):
+    with etl.db_manager.get_session() as session:
+        return [game_id for game_id, in session.query(Game.game_id).filter(*filters)]
+
+
+def test_vectorized_matches_loop(etl):
+    loop = rebuild(etl, etl.calculate_team_stats)
+    vectorized = rebuild(etl, etl.calculate_team_stats_vectorized)
+
+    assert len(vectorized) > 0
+    assert_columns_equal(loop, vectorized, LOOP_COLUMNS)
+
+
+def test_incremental_rebuild_matches_vectorized(etl):
+    vectorized = rebuild(etl, etl.calculate_team_stats_vectorized)
+    incremental = rebuild(etl, lambda session: etl.update_team_stats(session, game_ids(etl)))
+
+    assert_columns_equal(vectorized, incremental, ALL_COLUMNS)
+
+
+def test_incremental_update_from_mid_season_matches_vectorized(etl):
+    vectorized = rebuild(etl, etl.calculate_team_stats_vectorized)
+
+    # Drop the second half of the middle season onwards and roll it forward from the games changed there
+    changed = (Game.season > SEASONS[1]) | ((Game.season == SEASONS[1]) & (Game.week >= 10))
+    with etl.db_manager.get_session() as session:
+        session.query(TeamStatsSnapshot).filter(
+            (TeamStatsSnapshot.season > SEASONS[1])
+            | ((TeamStatsSnapshot.season == SEASONS[1]) & (TeamStatsSnapshot.week >= 10))
+        ).delete(synchronize_session=False)
+        etl.update_team_stats(session, game_ids(etl, changed))
+        session.commit()
+
+    assert_columns_equal(vectorized, snapshots(etl), ALL_COLUMNS)